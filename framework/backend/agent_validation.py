@@ -0,0 +1,236 @@
+import ast
+import asyncio
+import builtins
+import importlib.util
+import os
+import py_compile
+import sys
+import time
+from datetime import datetime
+from typing import List, Optional
+from agent_workers import AgentWorkerPool
+
+# Ahead-of-time checks for generated agent code, run by POST /agents and again
+# by POST /agents/{id}/validate:
+#   1. the source parses, imports only installed modules and uses no unbound names
+#   2. an agent class subclasses BaseAgent, implements run() or async arun(),
+#      and accepts agent_class(name=..., config=...)
+#   3. the file is compiled to __pycache__ so loaders never compile it
+#   4. optionally, a smoke run in a throwaway worker process returns a string
+#      in time. It calls the real agent (LLM, mail, HTTP), so it is off unless
+#      AGENT_SMOKE_RUN=true or requested, and a failure is only a warning:
+#      it may be an outage or missing config rather than broken code.
+# The report is stored on the agent document as `validation`; agents whose
+# status is "failed" are refused by the chain executor without being loaded.
+
+AGENT_SMOKE_RUN = os.getenv("AGENT_SMOKE_RUN", "false").lower() == "true"
+AGENT_SMOKE_MESSAGE = os.getenv("AGENT_SMOKE_MESSAGE", "Hello")
+AGENT_SMOKE_TIMEOUT_SECONDS = float(os.getenv("AGENT_SMOKE_TIMEOUT_SECONDS", "30"))
+
+_BUILTINS = set(dir(builtins)) | {"__name__", "__file__", "__doc__", "__spec__", "__loader__", "__package__", "__builtins__"}
+
+
+class _Bindings(ast.NodeVisitor):
+    """Collects every name the module binds anywhere, and every name it reads."""
+
+    def __init__(self):
+        self.bound = set()
+        self.loaded = {}
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.bound.add(alias.asname or alias.name.split(".")[0])
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            self.bound.add(alias.asname or alias.name)
+
+    def _visit_def(self, node):
+        self.bound.add(node.name)
+        args = node.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]:
+            if arg is not None:
+                self.bound.add(arg.arg)
+        self.generic_visit(node)
+
+    visit_FunctionDef = visit_AsyncFunctionDef = _visit_def
+
+    def visit_Lambda(self, node):
+        args = node.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]:
+            if arg is not None:
+                self.bound.add(arg.arg)
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node):
+        self.bound.add(node.name)
+        self.generic_visit(node)
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            self.bound.add(node.name)
+        self.generic_visit(node)
+
+    def visit_Global(self, node):
+        self.bound.update(node.names)
+
+    visit_Nonlocal = visit_Global
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, (ast.Store, ast.Del)):
+            self.bound.add(node.id)
+        else:
+            self.loaded.setdefault(node.id, node.lineno)
+
+    def visit_MatchAs(self, node):
+        if node.name:
+            self.bound.add(node.name)
+        self.generic_visit(node)
+
+
+def _accepts_keyword(args: ast.arguments, name: str) -> bool:
+    return args.kwarg is not None or any(a.arg == name for a in args.args + args.kwonlyargs)
+
+
+def _check_agent_class(tree: ast.Module, class_name: str, errors: List[str], warnings: List[str]) -> Optional[str]:
+    classes = [n for n in tree.body if isinstance(n, ast.ClassDef)]
+    agent_classes = [
+        c for c in classes
+        if any((isinstance(b, ast.Name) and b.id == "BaseAgent") or (isinstance(b, ast.Attribute) and b.attr == "BaseAgent") for b in c.bases)
+    ]
+    if not agent_classes:
+        errors.append("No class inheriting from BaseAgent")
+        return None
+    cls = next((c for c in agent_classes if c.name == class_name), agent_classes[0])
+    if cls.name != class_name:
+        warnings.append(f"Agent class is named {cls.name}, expected {class_name}")
+
+    methods = {n.name: n for n in cls.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))}
+    run, arun = methods.get("run"), methods.get("arun")
+    if run is None and arun is None:
+        errors.append(f"{cls.name} implements neither run(self, message) nor async arun(self, message)")
+    if run is not None:
+        if isinstance(run, ast.AsyncFunctionDef):
+            errors.append(f"{cls.name}.run must be synchronous; name the coroutine arun")
+        elif len(run.args.args) < 2 and run.args.vararg is None:
+            errors.append(f"{cls.name}.run must accept (self, message)")
+    if arun is not None:
+        if not isinstance(arun, ast.AsyncFunctionDef):
+            errors.append(f"{cls.name}.arun must be declared with async def")
+        elif len(arun.args.args) < 2 and arun.args.vararg is None:
+            errors.append(f"{cls.name}.arun must accept (self, message)")
+
+    init = methods.get("__init__")
+    if init is not None:
+        # The executor always calls agent_class(name=..., config=...)
+        for keyword in ("name", "config"):
+            if not _accepts_keyword(init.args, keyword):
+                errors.append(f"{cls.name}.__init__ does not accept the '{keyword}' keyword")
+        defaults = len(init.args.defaults)
+        required = [a.arg for a in init.args.args[1:len(init.args.args) - defaults]]
+        extra = [a for a in required if a not in ("name", "config")]
+        extra += [a.arg for a, d in zip(init.args.kwonlyargs, init.args.kw_defaults) if d is None and a.arg not in ("name", "config")]
+        if extra:
+            errors.append(f"{cls.name}.__init__ requires arguments the executor does not pass: {', '.join(extra)}")
+        calls_super = any(
+            isinstance(n, ast.Call) and isinstance(n.func, ast.Attribute) and n.func.attr == "__init__"
+            for n in ast.walk(init)
+        )
+        if not calls_super:
+            warnings.append(f"{cls.name}.__init__ does not call super().__init__(name, config)")
+    return cls.name
+
+
+def check_source(code: str, class_name: str) -> dict:
+    """Static checks only; returns {"errors", "warnings", "class_name"}."""
+    errors: List[str] = []
+    warnings: List[str] = []
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return {"errors": [f"Syntax error on line {e.lineno}: {e.msg}"], "warnings": [], "class_name": None}
+
+    # Imports inside try/except ImportError are optional by design
+    guarded = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Try) and any(
+            h.type is None or any(isinstance(n, ast.Name) and n.id in ("ImportError", "ModuleNotFoundError", "Exception") for n in ast.walk(h.type))
+            for h in node.handlers
+        ):
+            guarded.update(id(n) for stmt in node.body for n in ast.walk(stmt))
+
+    for node in ast.walk(tree):
+        if id(node) in guarded:
+            continue
+        modules = []
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules = [node.module]
+        for module in modules:
+            top = module.split(".")[0]
+            if top in sys.modules:
+                continue
+            try:
+                found = importlib.util.find_spec(top) is not None
+            except (ImportError, ValueError):
+                found = False
+            if not found:
+                errors.append(f"Line {node.lineno}: module '{module}' is not installed")
+
+    bindings = _Bindings()
+    bindings.visit(tree)
+    star_import = any(isinstance(n, ast.ImportFrom) and any(a.name == "*" for a in n.names) for n in ast.walk(tree))
+    if not star_import:
+        for name, lineno in sorted(bindings.loaded.items(), key=lambda item: item[1]):
+            if name not in bindings.bound and name not in _BUILTINS:
+                errors.append(f"Line {lineno}: name '{name}' is used but never imported or defined")
+
+    found_class = _check_agent_class(tree, class_name, errors, warnings)
+    return {"errors": errors, "warnings": warnings, "class_name": found_class}
+
+
+def precompile(file_path: str) -> str:
+    """Writes the module's bytecode to __pycache__ and returns its path."""
+    return py_compile.compile(file_path, cfile=importlib.util.cache_from_source(file_path), doraise=True)
+
+
+async def smoke_run(file_path: str, name: str, config: Optional[dict], message: str = AGENT_SMOKE_MESSAGE,
+                    timeout: float = AGENT_SMOKE_TIMEOUT_SECONDS) -> dict:
+    """Runs the agent once in its own short-lived worker process, isolated from the shared pool."""
+    pool = AgentWorkerPool(size=1, timeout=timeout, preload=[])
+    started = time.perf_counter()
+    try:
+        output = await pool.run(file_path, name, config, message)
+        result = {"ok": isinstance(output, str), "output_preview": str(output)[:200]}
+        if not result["ok"]:
+            result["error"] = f"run() returned {type(output).__name__}, expected str"
+    except Exception as e:
+        result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        await pool.shutdown()
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+async def validate_agent(file_path: str, name: str, config: Optional[dict], smoke: bool = AGENT_SMOKE_RUN) -> dict:
+    class_name = f"{name.replace(' ', '')}Agent"
+    with open(file_path, "r", encoding="utf-8") as f:
+        code = f.read()
+
+    report = await asyncio.to_thread(check_source, code, class_name)
+    report["bytecode"] = None
+    report["smoke"] = None
+    if not report["errors"]:
+        try:
+            report["bytecode"] = await asyncio.to_thread(precompile, file_path)
+        except py_compile.PyCompileError as e:
+            report["errors"].append(f"Compilation failed: {e.msg}")
+    if not report["errors"] and smoke:
+        report["smoke"] = await smoke_run(file_path, name, config)
+        if not report["smoke"]["ok"]:
+            report["warnings"].append(f"Smoke run failed: {report['smoke']['error']}")
+
+    report["status"] = "failed" if report["errors"] else "passed"
+    report["checked_at"] = datetime.utcnow()
+    return report
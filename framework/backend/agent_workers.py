@@ -0,0 +1,456 @@
+import asyncio
+import glob
+import importlib.util
+import inspect
+import itertools
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional, Tuple
+from agents.base import BaseAgent, invoke_agent
+
+# Execution of code agents (files under agents/). By default they run in a
+# pool of long-lived worker processes: each worker imports every agent module
+# and its dependencies once at startup, then serves run requests over a pipe,
+# so agents start warm and a crash, leak or slow import never touches the API
+# process. Each worker multiplexes runs over its pipe (AGENT_WORKER_CONCURRENCY
+# at once), so the pool keeps the concurrency of async and threaded agents.
+# Workers are recycled after AGENT_WORKER_MAX_RUNS runs or once their resident
+# memory passes AGENT_WORKER_MAX_RSS_MB. AGENT_EXECUTION_MODE=inprocess restores
+# loading agents inside the API process.
+
+AGENT_EXECUTION_MODE = os.getenv("AGENT_EXECUTION_MODE", "workers").strip().lower()
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "2"))
+AGENT_WORKER_MAX_RUNS = int(os.getenv("AGENT_WORKER_MAX_RUNS", "500"))
+AGENT_WORKER_MAX_RSS_MB = float(os.getenv("AGENT_WORKER_MAX_RSS_MB", "1024"))
+AGENT_WORKER_TIMEOUT_SECONDS = float(os.getenv("AGENT_WORKER_TIMEOUT_SECONDS", "300"))
+# Runs one worker serves at once; sync agents use its AGENT_SYNC_WORKERS threads
+AGENT_WORKER_CONCURRENCY = int(os.getenv("AGENT_WORKER_CONCURRENCY", os.getenv("AGENT_SYNC_WORKERS", "32")))
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "agents")
+
+_AGENT_CLASS_PATTERN = re.compile(r"^class\s+\w+\s*\(\s*(agents\.base\.)?BaseAgent\s*\)", re.MULTILINE)
+
+
+class AgentWorkerError(Exception):
+    pass
+
+
+class AgentWorkerUnavailable(AgentWorkerError):
+    """No worker could take the run before its timeout (all busy, or none could be started)."""
+
+
+def load_agent_module(file_path: str):
+    module_name = f"agents.{os.path.splitext(os.path.basename(file_path))[0]}"
+    spec = importlib.util.spec_from_file_location(module_name, file_path)
+    if not spec or not spec.loader:
+        raise AgentWorkerError(f"Could not load agent module {file_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def find_agent_class(module, agent_name: str):
+    """`<Name>Agent` if defined, else the module's own BaseAgent subclass, else any class named *Agent."""
+    agent_class = getattr(module, f"{agent_name.replace(' ', '')}Agent", None)
+    if inspect.isclass(agent_class):
+        return agent_class
+    own_classes = [obj for _, obj in inspect.getmembers(module, inspect.isclass) if obj.__module__ == module.__name__]
+    for obj in own_classes:
+        if issubclass(obj, BaseAgent):
+            return obj
+    for obj in own_classes:
+        if "Agent" in obj.__name__:
+            return obj
+    raise AgentWorkerError("Agent class not found")
+
+
+def agent_files(directory: str = AGENTS_DIR) -> List[str]:
+    """Agent modules to preload: files that define a BaseAgent subclass (helpers are imported normally)."""
+    paths = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.py"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                if _AGENT_CLASS_PATTERN.search(f.read()):
+                    paths.append(os.path.abspath(path))
+        except OSError:
+            continue
+    return paths
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current; ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return 0
+
+
+def _worker_main(conn, preload: List[str]):
+    """
+    Worker process: preload agent modules, then serve requests concurrently on
+    one event loop until told to stop. Requests carry ids; async agents run as
+    tasks and sync agents on the worker's own agent executor threads, so one
+    worker serves many calls at once, like the API process does in inprocess mode.
+    """
+    modules: Dict[str, tuple] = {}
+
+    def module_for(file_path: str):
+        # Reload only when the agent file has been rewritten since it was loaded
+        mtime = os.path.getmtime(file_path)
+        cached = modules.get(file_path)
+        if cached is None or cached[0] != mtime:
+            modules[file_path] = (mtime, load_agent_module(file_path))
+        return modules[file_path][1]
+
+    for path in preload:
+        try:
+            module_for(path)
+        except Exception as e:
+            print(f"Agent worker {os.getpid()} could not preload {os.path.basename(path)}: {e}")
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    tasks: Dict[int, asyncio.Task] = {}
+    stopping = asyncio.Event()
+
+    def send(reply: dict):
+        try:
+            conn.send(reply)
+        except (EOFError, OSError):
+            stopping.set()
+        except Exception as e:
+            # Unpicklable agent output: report it rather than killing the worker
+            conn.send({"id": reply["id"], "ok": False, "error": f"Agent returned an unsendable result: {e}",
+                       "rss_bytes": reply["rss_bytes"]})
+
+    async def handle(request: dict):
+        try:
+            agent_class = find_agent_class(module_for(request["file_path"]), request["name"])
+            agent = agent_class(name=request["name"], config=request.get("config") or {})
+            reply = {"ok": True, "response": await invoke_agent(agent, request["message"])}
+        except asyncio.CancelledError:
+            reply = {"ok": False, "error": "Agent run was cancelled"}
+        except Exception as e:
+            reply = {"ok": False, "error": str(e), "traceback": traceback.format_exc()}
+        finally:
+            tasks.pop(request["id"], None)
+        reply["id"] = request["id"]
+        reply["rss_bytes"] = _rss_bytes()
+        send(reply)
+
+    def dispatch(message):
+        if message is None:
+            stopping.set()
+        elif "cancel" in message:
+            task = tasks.get(message["cancel"])
+            if task is not None:
+                task.cancel()
+        else:
+            tasks[message["id"]] = loop.create_task(handle(message))
+
+    def read():
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                message = None
+            loop.call_soon_threadsafe(dispatch, message)
+            if message is None:
+                break
+
+    async def serve():
+        threading.Thread(target=read, daemon=True, name="agent-worker-reader").start()
+        await stopping.wait()
+        # A graceful stop lets in-flight runs finish
+        if tasks:
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    loop.run_until_complete(serve())
+    loop.close()
+
+
+class _Worker:
+    """Parent-side handle: sends requests with ids and resolves their futures from a reader thread."""
+
+    def __init__(self, context, preload: List[str]):
+        self.conn, child_conn = context.Pipe()
+        # Not a daemon: agents may start their own process pools
+        self.process = context.Process(target=_worker_main, args=(child_conn, preload), daemon=False, name="agent-worker")
+        self.process.start()
+        child_conn.close()
+        self.runs = 0
+        self.started = time.monotonic()
+        self.retired = False
+        # request id -> (loop, future); abandoned ids timed out and are not waited for
+        self.pending: Dict[int, tuple] = {}
+        self.abandoned = set()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read, daemon=True, name="agent-worker-replies")
+        self._reader.start()
+
+    @property
+    def load(self) -> int:
+        with self._lock:
+            return len(self.pending)
+
+    @property
+    def live_requests(self) -> int:
+        with self._lock:
+            return len(set(self.pending) - self.abandoned)
+
+    def submit(self, request: dict) -> Tuple[int, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            request_id = next(self._ids)
+            self.pending[request_id] = (loop, future)
+            try:
+                self.conn.send({**request, "id": request_id})
+            except (EOFError, OSError) as e:
+                self.pending.pop(request_id)
+                raise AgentWorkerError(f"Agent worker is gone (exit code {self.process.exitcode})") from e
+        return request_id, future
+
+    def abandon(self, request_id: int):
+        """Stops waiting for a request and asks the worker to cancel it."""
+        with self._lock:
+            if request_id not in self.pending:
+                return
+            self.abandoned.add(request_id)
+            try:
+                self.conn.send({"cancel": request_id})
+            except (EOFError, OSError):
+                pass
+
+    def _read(self):
+        while True:
+            try:
+                reply = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                entry = self.pending.pop(reply.get("id"), None)
+                self.abandoned.discard(reply.get("id"))
+            if entry is not None:
+                loop, future = entry
+                loop.call_soon_threadsafe(_resolve, future, reply)
+        # Worker exited or was killed: fail whatever it still owed
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            self.abandoned.clear()
+        error = AgentWorkerError(f"Agent worker exited unexpectedly (exit code {self.process.exitcode})")
+        for loop, future in pending.values():
+            loop.call_soon_threadsafe(_fail, future, error)
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            try:
+                self.conn.send(None)
+            except Exception:
+                pass
+        self.process.join(timeout)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1)
+        self.conn.close()
+        self._reader.join(1)
+
+
+def _resolve(future: asyncio.Future, reply: dict):
+    if not future.done():
+        future.set_result(reply)
+
+
+def _fail(future: asyncio.Future, error: Exception):
+    if not future.done():
+        future.set_exception(error)
+
+
+class AgentWorkerPool:
+    """
+    `size` worker processes, each serving up to `concurrency` runs at once.
+    A worker that hits max_runs or max_rss_mb, or has a run time out, is
+    retired: it takes no new runs, a replacement is started, and it is
+    stopped once its other runs have finished (killed if a timed-out run is
+    still stuck in it).
+    """
+
+    def __init__(self, size: int = AGENT_WORKERS, max_runs: int = AGENT_WORKER_MAX_RUNS,
+                 max_rss_mb: float = AGENT_WORKER_MAX_RSS_MB, timeout: float = AGENT_WORKER_TIMEOUT_SECONDS,
+                 preload: Optional[List[str]] = None, concurrency: int = AGENT_WORKER_CONCURRENCY):
+        self.size = size
+        self.max_runs = max_runs
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.preload = agent_files() if preload is None else preload
+        # Spawned, not forked: workers must not inherit the API's threads and sockets
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List[_Worker] = []
+        self._retiring: List[_Worker] = []
+        self._changed: Optional[asyncio.Condition] = None
+        self._background = set()
+        self.spawn_retry_delay = 1.0
+        self.stats = {"runs": 0, "recycled": 0, "crashed": 0, "timed_out": 0, "unavailable": 0, "spawn_failures": 0}
+
+    @property
+    def started(self) -> bool:
+        return self._changed is not None
+
+    async def start(self):
+        if self.started:
+            return
+        self._changed = asyncio.Condition()
+        spawns = [asyncio.ensure_future(self._spawn()) for _ in range(self.size)]
+        for task in spawns:
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        # A caller that gives up waiting must not cancel the spawns themselves
+        await asyncio.shield(asyncio.gather(*spawns))
+
+    async def _spawn(self, max_retry_delay: float = 30.0):
+        """Adds one worker, retrying with backoff until it starts; the slot is never given up."""
+        delay = self.spawn_retry_delay
+        while True:
+            try:
+                worker = await asyncio.to_thread(_Worker, self._context, self.preload)
+                break
+            except Exception as e:
+                self.stats["spawn_failures"] += 1
+                print(f"Agent worker could not be started, retrying in {delay:g}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_retry_delay)
+        async with self._changed:
+            self._workers.append(worker)
+            self._changed.notify_all()
+
+    def _in_background(self, coro):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _acquire(self) -> _Worker:
+        await self.start()
+        async with self._changed:
+            while True:
+                candidates = [w for w in self._workers if w.load < self.concurrency]
+                if candidates:
+                    return min(candidates, key=lambda w: w.load)
+                await self._changed.wait()
+
+    async def _retire(self, worker: _Worker):
+        """Takes the worker out of rotation, starts its replacement and stops it once drained."""
+        if worker.retired:
+            return
+        worker.retired = True
+        async with self._changed:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            self._retiring.append(worker)
+        self._in_background(self._spawn())
+        await self._finish_if_drained(worker)
+
+    async def _finish_if_drained(self, worker: _Worker):
+        if not worker.retired or worker not in self._retiring or worker.live_requests:
+            return
+        self._retiring.remove(worker)
+        # Anything still pending was abandoned after a timeout and may never return
+        await asyncio.to_thread(worker.kill if worker.load else worker.stop)
+
+    async def _submit(self, request: dict) -> Tuple[_Worker, int, asyncio.Future]:
+        while True:
+            worker = await self._acquire()
+            try:
+                request_id, future = worker.submit(request)
+                return worker, request_id, future
+            except AgentWorkerError:
+                # Died while idle; replace it and pick another
+                self.stats["crashed"] += 1
+                await self._retire(worker)
+
+    async def run(self, file_path: str, name: str, config: Optional[dict], message: str, timeout: Optional[float] = None) -> str:
+        request = {"file_path": os.path.abspath(file_path), "name": name, "config": config or {}, "message": message}
+        timeout = timeout or self.timeout
+        # The timeout covers the whole call, including waiting for a free worker
+        deadline = time.monotonic() + timeout
+        try:
+            worker, request_id, future = await asyncio.wait_for(self._submit(request), timeout)
+        except asyncio.TimeoutError:
+            self.stats["unavailable"] += 1
+            raise AgentWorkerUnavailable(f"No agent worker became available within {timeout:g}s")
+
+        try:
+            try:
+                reply = await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                self.stats["timed_out"] += 1
+                worker.abandon(request_id)
+                await self._retire(worker)
+                raise TimeoutError(f"Agent did not finish within {timeout:g}s")
+            except AgentWorkerError:
+                self.stats["crashed"] += 1
+                await self._retire(worker)
+                raise
+
+            worker.runs += 1
+            self.stats["runs"] += 1
+            if not worker.retired and (worker.runs >= self.max_runs or reply.get("rss_bytes", 0) > self.max_rss_bytes):
+                self.stats["recycled"] += 1
+                await self._retire(worker)
+            if not reply["ok"]:
+                raise AgentWorkerError(reply["error"])
+            return reply["response"]
+        finally:
+            await self._finish_if_drained(worker)
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def shutdown(self):
+        for task in list(self._background):
+            task.cancel()
+        workers, self._workers = self._workers, []
+        retiring, self._retiring = self._retiring, []
+        await asyncio.gather(*(asyncio.to_thread(w.stop) for w in workers),
+                             *(asyncio.to_thread(w.kill) for w in retiring))
+        self._changed = None
+
+
+_worker_pool: Optional[AgentWorkerPool] = None
+
+
+def get_worker_pool() -> AgentWorkerPool:
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = AgentWorkerPool()
+    return _worker_pool
+
+
+async def shutdown_worker_pool():
+    if _worker_pool is not None:
+        await _worker_pool.shutdown()
+
+
+async def run_agent(agent_doc: dict, message: str) -> str:
+    """Runs a code agent described by its database document."""
+    if AGENT_EXECUTION_MODE == "workers":
+        return await get_worker_pool().run(agent_doc["file_path"], agent_doc["name"], agent_doc.get("config"), message)
+
+    module = load_agent_module(agent_doc["file_path"])
+    agent_class = find_agent_class(module, agent_doc["name"])
+    agent_instance = agent_class(name=agent_doc["name"], config=agent_doc.get("config") or {})
+    return await invoke_agent(agent_instance, message)
@@ -1,26 +1,23 @@
 from agents.base import BaseAgent
+from agents.translation import ChunkedTranslator, TRANSLATION_CONCURRENCY, TRANSLATION_MAX_CHARS
 from deep_translator import GoogleTranslator
 
 class EnglishToHindiAgent(BaseAgent):
-    def run(self, message: str) -> str:
+    async def arun(self, message: str) -> str:
         try:
-            translator = GoogleTranslator(source='en', target='hi')
-            
-            # chunk limit is usually 5000, keep it safe at 2000
-            chunk_size = 2000
-            chunks = [message[i:i+chunk_size] for i in range(0, len(message), chunk_size)]
-            
-            translated_chunks = []
-            for chunk in chunks:
-                try:
-                    res = translator.translate(chunk)
-                except Exception:
-                    res = "" # fallback
-                
-                if not res:
-                     res = "" 
-                translated_chunks.append(res)
-                
-            return " ".join(translated_chunks)
+            # A GoogleTranslator instance keeps per-request state, so each
+            # concurrent segment gets its own
+            def translate(segment: str) -> str:
+                return GoogleTranslator(source='en', target='hi').translate(segment)
+
+            translator = ChunkedTranslator(
+                translate,
+                source='en',
+                target='hi',
+                # chunk limit is usually 5000, keep it safe at 2000
+                max_chars=int(self.config.get("chunk_size", TRANSLATION_MAX_CHARS)),
+                concurrency=int(self.config.get("concurrency", TRANSLATION_CONCURRENCY)),
+            )
+            return await translator.translate(message)
         except Exception as e:
             return f"Translation Error: {str(e)}"
@@ -1,48 +1,56 @@
 from agents.base import BaseAgent
-import requests
-import json
-import re
+from agents.llm_map_reduce import LLM_MAP_CHUNK_TOKENS, MapReduce
+import httpx
 
 class SkillscheckerAgent(BaseAgent):
     def __init__(self, name: str = None, config: dict = None):
         super().__init__(name, config)
         self.GROQ_API_KEY = "PLACEHOLDER_KEY" # Replace with actual key or use env var
 
-    def run(self, message: str) -> str:
+    async def arun(self, message: str) -> str:
         try:
-            # message is likely raw text from a PDF
+            # message is likely raw text from a PDF (or several, from a chained email dump)
             url = "https://api.groq.com/openai/v1/chat/completions"
             headers = {
                 "Authorization": f"Bearer {self.GROQ_API_KEY}",
                 "Content-Type": "application/json"
             }
-            
-            # Prompt to extract skills
-            prompt_content = (
-                f"Analyze the technical skills, qualifications, and key competencies from the following text. "
-                f"Provide a comprehensive summary in plain English paragraphs. Do not return JSON.\n\n"
-                f"Text:\n{message[:15000]}" # Limit context window just in case
-            )
-            
-            messages = [{
-                "role": "user", 
-                "content": prompt_content
-            }]
-            
-            data = {
-                "model": "llama-3.3-70b-versatile",
-                "messages": messages,
-                "temperature": 0.3, # Slightly higher for more natural text
-                "max_tokens": 1000
-            }
-            
-            # Call LLM
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            
-            content = response.json()["choices"][0]["message"]["content"]
-            
-            return content
+
+            async with httpx.AsyncClient(timeout=60) as client:
+                async def call_llm(prompt_content: str) -> str:
+                    data = {
+                        "model": "llama-3.3-70b-versatile",
+                        "messages": [{"role": "user", "content": prompt_content}],
+                        "temperature": 0.3, # Slightly higher for more natural text
+                        "max_tokens": 1000
+                    }
+                    response = await client.post(url, headers=headers, json=data)
+                    response.raise_for_status()
+                    return response.json()["choices"][0]["message"]["content"]
+
+                # Long inputs are split by tokens, analysed part by part in
+                # parallel, and merged, instead of being truncated
+                skills = MapReduce(
+                    call_llm,
+                    single_prompt=(
+                        "Analyze the technical skills, qualifications, and key competencies from the following text. "
+                        "Provide a comprehensive summary in plain English paragraphs. Do not return JSON.\n\n"
+                        "Text:\n{text}"
+                    ),
+                    map_prompt=(
+                        "The following is one part of a longer text. List the technical skills, qualifications, "
+                        "and key competencies it mentions, with brief supporting detail. Do not return JSON.\n\n"
+                        "Text:\n{text}"
+                    ),
+                    reduce_prompt=(
+                        "Below are notes on the technical skills, qualifications, and key competencies found in "
+                        "different parts of one text. Merge them, removing duplicates, into a comprehensive summary "
+                        "in plain English paragraphs. Do not return JSON.\n\n"
+                        "Notes:\n{partials}"
+                    ),
+                    max_tokens=int(self.config.get("chunk_tokens", LLM_MAP_CHUNK_TOKENS)),
+                )
+                return await skills.run(message)
 
         except Exception as e:
-            return f"Error extracting skills: {str(e)}"
\ No newline at end of file
+            return f"Error extracting skills: {str(e)}"
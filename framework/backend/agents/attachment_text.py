@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+# Text extraction for downloaded attachments, run in a process pool so PDF
+# parsing uses every core and overlaps with the IMAP downloads. The pool is
+# module-level (agent modules are re-executed per call). When a file overruns
+# its timeout the pool is swapped for a fresh one and terminated, the only way
+# to stop a worker stuck on a malformed document, after the other extractions
+# already running in it have finished.
+
+EXTRACT_WORKERS = int(os.getenv("ATTACHMENT_EXTRACT_WORKERS", "0")) or os.cpu_count() or 1
+EXTRACT_TIMEOUT_SECONDS = float(os.getenv("ATTACHMENT_EXTRACT_TIMEOUT_SECONDS", "60"))
+# Recycle workers periodically; PDF parsers are not known for giving memory back
+MAX_TASKS_PER_WORKER = 50
+
+
+def extract_text(filepath: str, filename: str) -> str:
+    try:
+        if filename.lower().endswith(".pdf"):
+            from langchain_community.document_loaders import PyPDFLoader
+            loader = PyPDFLoader(filepath)
+            pages = loader.load()
+            text = "\n".join([p.page_content for p in pages])
+            return f"\n\n--- Content of {filename} ---\n{text}"
+        elif filename.lower().endswith(".txt"):
+            with open(filepath, "r", encoding="utf-8") as f:
+                return f"\n\n--- Content of {filename} ---\n{f.read()}"
+        else:
+            return f"\n\n--- File {filename} (Not supported for text extraction) ---"
+    except Exception as e:
+        return f"\n\n--- Error reading {filename}: {e} ---"
+
+
+class _Generation:
+    """One multiprocessing pool and the extractions submitted to it."""
+
+    def __init__(self, workers: int):
+        self.pool = multiprocessing.Pool(workers, maxtasksperchild=MAX_TASKS_PER_WORKER)
+        self.pending = []
+        # Results whose caller gave up on them; retirement does not wait for these
+        self.abandoned = set()
+
+
+class ExtractionPool:
+    def __init__(self, workers: int = EXTRACT_WORKERS, extractor=extract_text):
+        self.workers = workers
+        self.extractor = extractor
+        self._current: Optional[_Generation] = None
+        self._retired: List[_Generation] = []
+        self._lock = threading.Lock()
+
+    def submit(self, filepath: str, filename: str):
+        """Starts extraction in a worker; returns a handle for collect()."""
+        try:
+            with self._lock:
+                if self._current is None:
+                    self._current = _Generation(self.workers)
+                generation = self._current
+                generation.pending = [r for r in generation.pending if not r.ready()]
+                result = generation.pool.apply_async(self.extractor, (filepath, filename))
+                generation.pending.append(result)
+            return generation, result
+        except OSError as e:
+            # No process support (sandboxed hosts): extract inline instead
+            print(f"Extraction pool unavailable, extracting inline: {e}")
+            return self.extractor(filepath, filename)
+
+    def collect(self, pending: List[Tuple[str, object]], timeout: float = EXTRACT_TIMEOUT_SECONDS) -> List[str]:
+        """Waits for (filename, handle) pairs in order; a file that overruns `timeout` yields an error entry."""
+        results = []
+        stuck_generations = []
+        for filename, handle in pending:
+            if isinstance(handle, str):
+                results.append(handle)
+                continue
+            generation, result = handle
+            try:
+                results.append(result.get(timeout))
+            except multiprocessing.TimeoutError:
+                with self._lock:
+                    generation.abandoned.add(result)
+                if generation not in stuck_generations:
+                    stuck_generations.append(generation)
+                results.append(f"\n\n--- Error reading {filename}: extraction timed out after {timeout:g}s ---")
+            except Exception as e:
+                results.append(f"\n\n--- Error reading {filename}: {e} ---")
+        for generation in stuck_generations:
+            # Other callers' files get as long as their own collect() would wait
+            self._retire(generation, grace=max(timeout, EXTRACT_TIMEOUT_SECONDS))
+        return results
+
+    def _retire(self, generation: _Generation, grace: float):
+        """
+        Replaces a pool that holds a stuck worker. New submissions go to a fresh
+        pool at once; the old one is terminated (the only way to stop the stuck
+        worker) once the other extractions in it, which may belong to concurrent
+        agent runs, have finished or `grace` seconds have passed.
+        """
+        with self._lock:
+            if generation in self._retired:
+                return
+            if self._current is generation:
+                self._current = None
+            self._retired.append(generation)
+        generation.pool.close()
+        threading.Thread(target=self._reap, args=(generation, grace), daemon=True, name="extraction-reaper").start()
+
+    def _reap(self, generation: _Generation, grace: float):
+        deadline = time.monotonic() + grace
+        while time.monotonic() < deadline:
+            with self._lock:
+                waiting = [r for r in generation.pending if r not in generation.abandoned and not r.ready()]
+            if not waiting:
+                break
+            time.sleep(0.05)
+        generation.pool.terminate()
+        generation.pool.join()
+        with self._lock:
+            if generation in self._retired:
+                self._retired.remove(generation)
+
+    def close(self):
+        """Terminates every pool immediately, including retired ones still draining."""
+        with self._lock:
+            generations = self._retired + ([self._current] if self._current else [])
+            self._current, self._retired = None, []
+        for generation in generations:
+            generation.pool.terminate()
+            generation.pool.join()
+
+extraction_pool = ExtractionPool()
@@ -1,13 +1,53 @@
-from abc import ABC, abstractmethod
+import asyncio
+import inspect
+import os
+from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads that run legacy synchronous agents, so a blocking run() never stalls
+# the event loop. Bounded separately from the default executor, which the
+# rest of the app (password hashing, embeddings) also relies on.
+AGENT_SYNC_WORKERS = int(os.getenv("AGENT_SYNC_WORKERS", "32"))
+sync_agent_executor = ThreadPoolExecutor(max_workers=AGENT_SYNC_WORKERS, thread_name_prefix="agent-sync")
+
 
 class BaseAgent(ABC):
+    """
+    Agents implement either `run` (synchronous) or `async def arun`; the
+    other one is derived. I/O-bound agents should implement `arun` so one
+    event loop can serve many concurrent calls.
+    """
+
     def __init__(self, name: str = None, config: dict = None):
         self.name = name or self.__class__.__name__
         self.config = config or {}
 
-    @abstractmethod
     def run(self, message: str) -> str:
         """
         Process the input message and return a response.
         """
-        pass
+        if not has_native_arun(self):
+            raise NotImplementedError(f"{type(self).__name__} must implement run() or arun()")
+        # Sync callers of an async agent; only valid outside a running event loop
+        return asyncio.run(self.arun(message))
+
+    async def arun(self, message: str) -> str:
+        """
+        Async counterpart of `run`; the default runs `run` on the sync agent executor.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(sync_agent_executor, self.run, message)
+
+
+def has_native_arun(agent) -> bool:
+    """True when the agent's class provides its own coroutine `arun`."""
+    arun = getattr(type(agent), "arun", None)
+    return arun is not None and arun is not BaseAgent.arun and inspect.iscoroutinefunction(arun)
+
+
+async def invoke_agent(agent, message: str) -> str:
+    """Runs any agent without blocking the loop: native `arun` if present, else `run` on the executor."""
+    if has_native_arun(agent):
+        return await agent.arun(message)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(sync_agent_executor, agent.run, message)
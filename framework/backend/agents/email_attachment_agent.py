@@ -1,11 +1,19 @@
 from agents.base import BaseAgent
+from agents.mail_sessions import imap_sessions
+from agents.attachment_text import EXTRACT_TIMEOUT_SECONDS, extraction_pool
+from agents.imap_parts import DEFAULT_CHUNK_SIZE, attachment_parts, parse_fetch_response, stream_part
+from blob_store import BlobStore, get_blob_store
 import imaplib
 import email
+import json
 import os
 import time
 import datetime
 from email.header import decode_header
-from langchain_community.document_loaders import PyPDFLoader
+
+# Attachments the agent can turn into text; others are listed but not fetched
+EXTRACTABLE_EXTENSIONS = (".pdf", ".txt")
+STRUCTURE_BATCH_SIZE = 200
 
 class EmailDownloaderAgent(BaseAgent):
     def __init__(self, name: str = None, config: dict = None):
@@ -15,100 +23,154 @@ class EmailDownloaderAgent(BaseAgent):
         self.EMAIL_USER = self.config.get("email_user", "manishramlani2004@gmail.com") 
         self.EMAIL_PASS = self.config.get("email_pass", "vaqw dmpk mxgv uppa")
         self.IMAP_SERVER = self.config.get("imap_server", "imap.gmail.com")
+        self.IMAP_PORT = int(self.config.get("imap_port", 993))
+        self.IMAP_SSL = self.config.get("imap_ssl", True)
+        self.MAILBOX = self.config.get("mailbox", "INBOX")
+        # Seconds an open connection may sit unused before it is replaced
+        self.IDLE_TIMEOUT = self.config.get("idle_timeout")
+        # Attachment sections are fetched in partial chunks of this many bytes
+        self.FETCH_CHUNK_SIZE = int(self.config.get("fetch_chunk_size", DEFAULT_CHUNK_SIZE))
+        # Seconds one attachment may spend in text extraction before it is given up on
+        self.EXTRACT_TIMEOUT = float(self.config.get("extract_timeout", EXTRACT_TIMEOUT_SECONDS))
         
         # Folder to save documents - relative to backend or absolute
         self.OUTPUT_FOLDER = self.config.get("output_folder", "email_attachments")
+        # Per-mailbox UIDVALIDITY and last processed UID, so each run only fetches new mail
+        self.SYNC_STATE_PATH = self.config.get("sync_state_path", os.path.join(self.OUTPUT_FOLDER, ".imap_sync_state.json"))
+        # Attachments are stored once in the blob store and hard-linked into OUTPUT_FOLDER
+        self.BLOB_STORE_DIR = self.config.get("blob_store_dir")
 
     def clean_filename(self, filename):
         """Cleans the filename to prevent errors."""
         if not filename: return "untitled"
         return "".join(c for c in filename if c.isalnum() or c in (' ', '.', '_', '-')).strip()
 
+    def sync_key(self) -> str:
+        return f"{self.EMAIL_USER}@{self.IMAP_SERVER}:{self.IMAP_PORT}/{self.MAILBOX}"
+
+    def load_sync_state(self) -> dict:
+        try:
+            with open(self.SYNC_STATE_PATH, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_sync_state(self, uidvalidity: int, last_uid: int):
+        state = self.load_sync_state()
+        state[self.sync_key()] = {"uidvalidity": uidvalidity, "last_uid": last_uid}
+        tmp_path = f"{self.SYNC_STATE_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.SYNC_STATE_PATH)
+
+    @staticmethod
+    def selected_uidvalidity(mail):
+        _, data = mail.response("UIDVALIDITY")
+        if data and data[-1]:
+            return int(data[-1])
+        return None
+
     def run(self, message: str) -> str:
         """
-        Connects to email, searches for today's UNSEEN emails, downloads attachments,
+        Connects to email, fetches messages that arrived since the last run
+        (or today's emails on the first run), downloads attachments,
         and returns the EXTRACTED TEXT from them for chaining.
         """
         downloaded_files = []
         status_log = []
-        extracted_text_content = ""
+        # (filename, text or pending extraction), in download order
+        extractions = []
 
         if not os.path.exists(self.OUTPUT_FOLDER):
             try:
                 os.makedirs(self.OUTPUT_FOLDER)
             except Exception as e:
                 return f"Error creating output folder: {e}"
+        blob_store = BlobStore(self.BLOB_STORE_DIR) if self.BLOB_STORE_DIR else get_blob_store()
 
         mail = None
+        reusable = False
+        uidvalidity = None
+        last_uid = 0
+        synced_uid = 0
         try:
-            # 1. Connect
+            # 1. Connect (or reuse the connection left open by the previous run)
             status_log.append(f"Connecting to {self.IMAP_SERVER} as {self.EMAIL_USER}...")
-            mail = imaplib.IMAP4_SSL(self.IMAP_SERVER)
-            mail.login(self.EMAIL_USER, self.EMAIL_PASS)
-            mail.select("INBOX")
+            mail = imap_sessions.acquire(
+                self.IMAP_SERVER, self.IMAP_PORT, self.EMAIL_USER, self.EMAIL_PASS,
+                use_ssl=self.IMAP_SSL, idle_timeout=self.IDLE_TIMEOUT,
+            )
+            mail.select(self.MAILBOX)
+            uidvalidity = self.selected_uidvalidity(mail)
 
-            # 2. Search for ALL emails from TODAY (SEEN or UNSEEN)
-            # This ensures that even if an email is opened elsewhere, we still process it if it's from today.
+            # 2. Search for mail newer than the last processed UID. UIDs are only
+            # comparable while UIDVALIDITY is unchanged; without saved state (or
+            # after the server renumbered the mailbox) fall back to today's emails.
             # Date format: 11-Jan-2026
             today_str = datetime.datetime.now().strftime("%d-%b-%Y")
-            search_criteria = f'(SINCE "{today_str}")'
-            
-            status, messages = mail.search(None, search_criteria)
-            email_ids = messages[0].split()
+            state = self.load_sync_state().get(self.sync_key())
+            incremental = bool(state) and uidvalidity is not None and state.get("uidvalidity") == uidvalidity
+            if incremental:
+                last_uid = state.get("last_uid", 0)
+                status, messages = mail.uid("SEARCH", None, f"UID {last_uid + 1}:*")
+            else:
+                status, messages = mail.uid("SEARCH", None, f'(SINCE "{today_str}")')
+            # "n:*" always matches the highest UID, even when it is below n
+            email_uids = sorted(int(uid) for uid in messages[0].split() if int(uid) > last_uid)
+            synced_uid = last_uid
 
-            if not email_ids:
+            if not email_uids:
+                reusable = True
+                if incremental:
+                    return f"Connected successfully. No new emails since the last sync ({today_str})."
                 return f"Connected successfully. No new unread emails found for today ({today_str})."
             
-            status_log.append(f"Found {len(email_ids)} new emails for today. Processing...")
-
-            for email_id in email_ids:
-                # Fetch email
-                res, msg = mail.fetch(email_id, "(RFC822)")
-                for response in msg:
-                    if isinstance(response, tuple):
-                        msg = email.message_from_bytes(response[1])
-                        subject, encoding = decode_header(msg["Subject"])[0]
-                        if isinstance(subject, bytes):
-                            subject = subject.decode(encoding if encoding else "utf-8")
-
-                        # Check for attachments
-                        for part in msg.walk():
-                            if part.get_content_maintype() == 'multipart':
-                                continue
-                            if part.get("Content-Disposition") is None:
-                                continue
-
-                            filename = part.get_filename()
-                            if filename:
-                                # Decode and clean filename
-                                fname, fencoding = decode_header(filename)[0]
-                                if isinstance(fname, bytes):
-                                    filename = fname.decode(fencoding if fencoding else "utf-8")
-                                filename = self.clean_filename(filename)
-                                
-                                filepath = os.path.join(self.OUTPUT_FOLDER, filename)
-                                
-                                # Save file
-                                with open(filepath, "wb") as f:
-                                    f.write(part.get_payload(decode=True))
-                                
-                                downloaded_files.append(filename)
-                                status_log.append(f"Downloaded: {filename} from '{subject}'")
-                                
-                                # EXTRACT TEXT
-                                try:
-                                    if filename.lower().endswith(".pdf"):
-                                        loader = PyPDFLoader(filepath)
-                                        pages = loader.load()
-                                        text = "\n".join([p.page_content for p in pages])
-                                        extracted_text_content += f"\n\n--- Content of {filename} ---\n{text}"
-                                    elif filename.lower().endswith(".txt"):
-                                        with open(filepath, "r", encoding="utf-8") as f:
-                                            extracted_text_content += f"\n\n--- Content of {filename} ---\n{f.read()}"
-                                    else:
-                                        extracted_text_content += f"\n\n--- File {filename} (Not supported for text extraction) ---"
-                                except Exception as e:
-                                    extracted_text_content += f"\n\n--- Error reading {filename}: {e} ---"
+            status_log.append(f"Found {len(email_uids)} new emails. Processing...")
+
+            # Structure and subject only; attachment bodies are fetched per part below
+            structures = {}
+            for i in range(0, len(email_uids), STRUCTURE_BATCH_SIZE):
+                batch = ",".join(str(uid) for uid in email_uids[i:i + STRUCTURE_BATCH_SIZE])
+                res, data = mail.uid("FETCH", batch, "(BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS (SUBJECT)])")
+                structures.update(parse_fetch_response(data))
+
+            for email_uid in email_uids:
+                items = structures.get(email_uid, {})
+                header = next((v for k, v in items.items() if k.startswith("BODY[HEADER")), None) or b""
+                if isinstance(header, str):
+                    header = header.encode("utf-8")
+                subject, encoding = decode_header(email.message_from_bytes(header)["Subject"] or "")[0]
+                if isinstance(subject, bytes):
+                    subject = subject.decode(encoding if encoding else "utf-8")
+
+                # Check for attachments
+                for part in attachment_parts(items.get("BODYSTRUCTURE")):
+                    filename = self.clean_filename(part.filename)
+                    if not filename.lower().endswith(EXTRACTABLE_EXTENSIONS):
+                        # Not downloaded: nothing downstream could read it
+                        status_log.append(f"Skipped: {filename} from '{subject}'")
+                        extractions.append((filename, f"\n\n--- File {filename} (Not supported for text extraction) ---"))
+                        continue
+
+                    if filename in downloaded_files:
+                        # An earlier file of this run may still be under extraction
+                        filename = f"{email_uid}_{filename}"
+                    filepath = os.path.join(self.OUTPUT_FOLDER, filename)
+
+                    # Stream the part into the blob store (hashed on the way in, stored
+                    # once however many mails carry it) and link it into the output folder
+                    with blob_store.writer() as writer:
+                        stream_part(mail, email_uid, part, writer, chunk_size=self.FETCH_CHUNK_SIZE)
+                        blob = writer.commit()
+                    blob_store.link(blob, filepath)
+
+                    downloaded_files.append(filename)
+                    status_log.append(f"Downloaded: {filename} from '{subject}'")
+                    # Extract in a worker process while the next parts download
+                    extractions.append((filename, extraction_pool.submit(filepath, filename)))
+
+                synced_uid = email_uid
+            reusable = True
 
         except imaplib.IMAP4.error as e:
             return f"IMAP Error: {e}. Please check your credentials."
@@ -116,12 +178,22 @@ class EmailDownloaderAgent(BaseAgent):
             return f"Error: {e}"
         
         finally:
-            if mail:
+            # Only a completed run advances the cursor: a failed run returns no
+            # text, so the messages it did process must be fetched again next time
+            if reusable and uidvalidity is not None and synced_uid != last_uid:
                 try:
-                    mail.close()
-                    mail.logout()
-                except:
-                    pass
+                    self.save_sync_state(uidvalidity, synced_uid)
+                except OSError as e:
+                    print(f"Could not save IMAP sync state: {e}")
+            if mail:
+                # Keep the session open for the next run unless it failed mid-protocol
+                if reusable:
+                    imap_sessions.release(mail)
+                else:
+                    imap_sessions.discard(mail)
+
+        # Reassemble in download order; a stuck file costs at most its timeout
+        extracted_text_content = "".join(extraction_pool.collect(extractions, timeout=self.EXTRACT_TIMEOUT))
 
         if not downloaded_files:
             return "\n".join(status_log) + "\nNo attachments found in the new emails."
@@ -1,9 +1,13 @@
 from agents.base import BaseAgent
+from agents.mail_sessions import smtp_sessions
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import re
 
+# Batch input: blocks separated by a line of dashes, each starting with its own "To:"
+BATCH_SEPARATOR = re.compile(r'\n-{3,}[ \t]*\n(?=\s*to:)', re.IGNORECASE)
+
 class EmailSenderAgent(BaseAgent):
     def __init__(self, name: str = None, config: dict = None):
         super().__init__(name, config)
@@ -13,6 +17,109 @@ class EmailSenderAgent(BaseAgent):
         self.EMAIL_PASS = self.config.get("email_pass", "vaqw dmpk mxgv uppa")
         self.SMTP_SERVER = self.config.get("smtp_server", "smtp.gmail.com")
         self.SMTP_PORT = int(self.config.get("smtp_port", 587))
+        self.SMTP_STARTTLS = self.config.get("smtp_starttls", True)
+
+    def parse_message(self, message: str):
+        """Returns (to_addresses, subject, body) or an error string."""
+        # Parse the message
+        lines = message.strip().split('\n')
+        to_email = None
+        subject = "No Subject"
+        body_start_index = 0
+
+        # 1. Try explicit headers
+        for i, line in enumerate(lines):
+            if line.lower().startswith("to:"):
+                to_email = line[3:].strip()
+            elif line.lower().startswith("subject:"):
+                subject = line[8:].strip()
+            elif line.strip() == "":
+                # Empty line denotes start of body
+                if to_email: # Only finalize header parsing if we found a To address
+                    body_start_index = i + 1
+                    break
+        
+        # 2. Fallback: Search for email in the entire text if not found in headers
+        if not to_email:
+            # Regex for email address
+            email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', message)
+            if email_match:
+                to_email = email_match.group(0)
+                # If we found it via regex, we assume the whole message is likely the body 
+                # or there's some mixed content. We'll use the whole message as body 
+                # but try to strip the found email if it looks like a directive? 
+                # For safety, let's just keep the body as is.
+                body_start_index = 0 
+            else:
+                return "Error: Could not find a recipient email address. Please specify 'To: <email>' in the message or context."
+
+        body = "\n".join(lines[body_start_index:])
+        # Several recipients on one To: line each get their own copy
+        recipients = [r.strip() for r in re.split(r'[,;]', to_email) if r.strip()]
+        return recipients, subject, body
+
+    def send_batch(self, messages: list) -> list:
+        """
+        Sends [{"to", "subject", "body"}, ...] over pooled, authenticated sessions,
+        moving to a fresh one whenever a session reaches the pool's per-session
+        message cap. Returns one {"to", "status", "error"} result per message;
+        status is "sent", "refused" (the server rejected the recipient) or "error".
+
+        Delivery is at least once: if the connection drops after the server
+        accepted a message's DATA but before its reply arrived, the message is
+        resent on a new session and the recipient may get it twice.
+        """
+        results = []
+        session = None
+        try:
+            for item in messages:
+                # Setup the MIME
+                msg = MIMEMultipart()
+                msg['From'] = self.EMAIL_USER
+                msg['To'] = item["to"]
+                msg['Subject'] = item["subject"]
+                msg.attach(MIMEText(item["body"], 'plain'))
+                text = msg.as_string()
+
+                if session is not None and session.sent >= smtp_sessions.max_messages:
+                    # Per-session cap reached mid-batch; release() closes it
+                    smtp_sessions.release(session)
+                    session = None
+
+                # One retry on a fresh session if the pooled one dropped mid-batch
+                for attempt in range(2):
+                    if session is None:
+                        session = smtp_sessions.acquire(
+                            self.SMTP_SERVER, self.SMTP_PORT, self.EMAIL_USER, self.EMAIL_PASS,
+                            starttls=self.SMTP_STARTTLS,
+                        )
+                    try:
+                        session.smtp.sendmail(self.EMAIL_USER, item["to"], text)
+                        session.sent += 1
+                        results.append({"to": item["to"], "status": "sent", "error": None})
+                        break
+                    except smtplib.SMTPRecipientsRefused as e:
+                        code, reason = e.recipients.get(item["to"], (None, b""))
+                        results.append({"to": item["to"], "status": "refused", "error": f"{code} {reason.decode(errors='replace')}"})
+                        break
+                    except smtplib.SMTPResponseException as e:
+                        # The server answered; the session itself is still usable
+                        results.append({"to": item["to"], "status": "error", "error": f"{e.smtp_code} {e.smtp_error.decode(errors='replace')}"})
+                        break
+                    except OSError as e:
+                        # SMTPServerDisconnected and socket errors: the session is gone
+                        smtp_sessions.discard(session)
+                        session = None
+                        if attempt == 1:
+                            results.append({"to": item["to"], "status": "error", "error": str(e)})
+        except OSError as e:
+            # Could not open a session (connection or login failed): the rest can't be sent
+            for item in messages[len(results):]:
+                results.append({"to": item["to"], "status": "error", "error": str(e)})
+        finally:
+            if session is not None:
+                smtp_sessions.release(session)
+        return results
 
     def run(self, message: str) -> str:
         """
@@ -24,61 +131,31 @@ class EmailSenderAgent(BaseAgent):
         Body of the email...
 
         If headers are missing, it attempts to find an email address in the text (e.g. from Context).
+        Several emails can be sent at once by separating blocks with a line of
+        dashes (---), each block starting with its own To: line.
         """
         try:
-            # Parse the message
-            lines = message.strip().split('\n')
-            to_email = None
-            subject = "No Subject"
-            body_start_index = 0
-
-            # 1. Try explicit headers
-            for i, line in enumerate(lines):
-                if line.lower().startswith("to:"):
-                    to_email = line[3:].strip()
-                elif line.lower().startswith("subject:"):
-                    subject = line[8:].strip()
-                elif line.strip() == "":
-                    # Empty line denotes start of body
-                    if to_email: # Only finalize header parsing if we found a To address
-                        body_start_index = i + 1
-                        break
-            
-            # 2. Fallback: Search for email in the entire text if not found in headers
-            if not to_email:
-                # Regex for email address
-                email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', message)
-                if email_match:
-                    to_email = email_match.group(0)
-                    # If we found it via regex, we assume the whole message is likely the body 
-                    # or there's some mixed content. We'll use the whole message as body 
-                    # but try to strip the found email if it looks like a directive? 
-                    # For safety, let's just keep the body as is.
-                    body_start_index = 0 
-                else:
-                    return "Error: Could not find a recipient email address. Please specify 'To: <email>' in the message or context."
-
-            body = "\n".join(lines[body_start_index:])
-            
-            # 3. Clean up "Context:" from body if it was used for routing but shouldn't be in the email
-            # (Optional, but might be nice. For now, let's leave it to avoid over-engineering)
+            messages = []
+            for block in BATCH_SEPARATOR.split(message.strip()):
+                parsed = self.parse_message(block)
+                if isinstance(parsed, str):
+                    return parsed
+                recipients, subject, body = parsed
+                messages.extend({"to": to, "subject": subject, "body": body} for to in recipients)
 
-            # Setup the MIME
-            msg = MIMEMultipart()
-            msg['From'] = self.EMAIL_USER
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            msg.attach(MIMEText(body, 'plain'))
+            results = self.send_batch(messages)
 
-            # Connect and send
-            server = smtplib.SMTP(self.SMTP_SERVER, self.SMTP_PORT)
-            server.starttls()
-            server.login(self.EMAIL_USER, self.EMAIL_PASS)
-            text = msg.as_string()
-            server.sendmail(self.EMAIL_USER, to_email, text)
-            server.quit()
+            if len(results) == 1:
+                result = results[0]
+                if result["status"] == "sent":
+                    return f"Email sent successfully to {result['to']} with subject '{messages[0]['subject']}'."
+                return f"Error sending email: {result['error']}"
 
-            return f"Email sent successfully to {to_email} with subject '{subject}'."
+            sent = sum(1 for r in results if r["status"] == "sent")
+            lines = [f"Sent {sent} of {len(results)} emails."]
+            for r in results:
+                lines.append(f"- {r['to']}: {r['status']}" + (f" ({r['error']})" if r["error"] else ""))
+            return "\n".join(lines)
 
         except Exception as e:
             return f"Error sending email: {e}"
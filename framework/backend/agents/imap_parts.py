@@ -0,0 +1,213 @@
+import binascii
+import os
+import re
+from email.header import decode_header, make_header
+from typing import BinaryIO, Dict, List, NamedTuple, Optional
+from urllib.parse import unquote
+
+# Helpers for fetching individual MIME parts over IMAP: a parser for FETCH
+# responses (including BODYSTRUCTURE), a walk of the structure that yields the
+# attachment sections, and a chunked partial fetch that decodes each section
+# to disk as it arrives, so a message is never held in memory as a whole.
+
+DEFAULT_CHUNK_SIZE = int(os.getenv("IMAP_FETCH_CHUNK_BYTES", str(1024 * 1024)))
+
+_TOKEN = re.compile(
+    rb'\s*(?:(?P<open>\()|(?P<close>\))|"(?P<quoted>(?:[^"\\]|\\.)*)"'
+    rb'|(?P<section>[^\s()"\[]*\[[^\]]*\](?:<\d+>)?)|(?P<atom>[^\s()"]+))'
+)
+_LITERAL_SUFFIX = re.compile(rb"\{(\d+)\}$")
+
+
+class AttachmentPart(NamedTuple):
+    section: str
+    filename: str
+    content_type: str
+    encoding: str
+    size: int
+
+
+def _tokenize(data) -> list:
+    """Flattens imaplib's (prefix, literal) tuples and lines into one token list."""
+    tokens = []
+    for piece in data:
+        if piece is None:
+            continue
+        literal = None
+        if isinstance(piece, tuple):
+            piece, literal = piece
+            piece = _LITERAL_SUFFIX.sub(b"", piece)
+        pos = 0
+        while pos < len(piece):
+            match = _TOKEN.match(piece, pos)
+            if not match or match.end() == pos:
+                break
+            pos = match.end()
+            if match.group("open"):
+                tokens.append(("(", None))
+            elif match.group("close"):
+                tokens.append((")", None))
+            elif match.group("quoted") is not None:
+                value = re.sub(rb"\\(.)", rb"\1", match.group("quoted"))
+                tokens.append(("value", value.decode("utf-8", "replace")))
+            else:
+                atom = (match.group("section") or match.group("atom")).decode("utf-8", "replace")
+                tokens.append(("value", None if atom.upper() == "NIL" else atom))
+        if literal is not None:
+            tokens.append(("value", literal))
+    return tokens
+
+
+def _parse(tokens: list, pos: int):
+    kind, value = tokens[pos]
+    if kind != "(":
+        return value, pos + 1
+    items = []
+    pos += 1
+    while pos < len(tokens) and tokens[pos][0] != ")":
+        item, pos = _parse(tokens, pos)
+        items.append(item)
+    return items, pos + 1
+
+
+def parse_fetch_response(data) -> Dict[int, Dict[str, object]]:
+    """Maps each message's UID to its FETCH items, e.g. {"BODYSTRUCTURE": [...], "BODY[1]<0>": b"..."}."""
+    tokens = _tokenize(data)
+    messages = {}
+    pos = 0
+    while pos < len(tokens):
+        # "<seq> (<name> <value> ...)"; imaplib has already stripped "FETCH"
+        if tokens[pos][0] != "(":
+            pos += 1
+            continue
+        items, pos = _parse(tokens, pos)
+        fields = {str(items[i]).upper(): items[i + 1] for i in range(0, len(items) - 1, 2)}
+        if "UID" in fields:
+            messages[int(fields["UID"])] = fields
+    return messages
+
+
+def _params(value) -> Dict[str, str]:
+    if not isinstance(value, list):
+        return {}
+    return {str(value[i]).lower(): value[i + 1] for i in range(0, len(value) - 1, 2)}
+
+
+def _decode_filename(params: Dict[str, str]) -> Optional[str]:
+    extended = params.get("filename*")
+    if extended:
+        # RFC 2231: charset'language'percent-encoded-value
+        charset, value = "utf-8", str(extended)
+        if value.count("'") >= 2:
+            charset, _, value = value.split("'", 2)
+        return unquote(value, encoding=charset or "utf-8", errors="replace")
+    name = params.get("filename") or params.get("name")
+    if not name:
+        return None
+    return str(make_header(decode_header(name)))
+
+
+def attachment_parts(structure, section: str = "") -> List[AttachmentPart]:
+    """Lists the parts of a BODYSTRUCTURE that carry a disposition and a filename."""
+    if not isinstance(structure, list) or not structure:
+        return []
+
+    if isinstance(structure[0], list):
+        # multipart: (part1)(part2)... subtype [params disposition ...]
+        parts = []
+        for index, child in enumerate(c for c in structure if isinstance(c, list)):
+            child_section = f"{section}.{index + 1}" if section else str(index + 1)
+            parts.extend(attachment_parts(child, child_section))
+        return parts
+
+    maintype, subtype = str(structure[0]).lower(), str(structure[1]).lower()
+    # Extension data follows the basic fields: text parts carry a line count,
+    # message/rfc822 an envelope, body and line count
+    extension = 7
+    if maintype == "text":
+        extension = 8
+    elif maintype == "message" and subtype == "rfc822":
+        extension = 10
+    disposition = structure[extension + 1] if len(structure) > extension + 1 else None
+    if not isinstance(disposition, list):
+        return []
+
+    params = _params(structure[2])
+    params.update(_params(disposition[1] if len(disposition) > 1 else None))
+    filename = _decode_filename(params)
+    if not filename:
+        return []
+    return [AttachmentPart(
+        section=section or "1",
+        filename=filename,
+        content_type=f"{maintype}/{subtype}",
+        encoding=str(structure[5] or "7bit").lower(),
+        size=int(structure[6] or 0),
+    )]
+
+
+class _Decoder:
+    """Incremental Content-Transfer-Encoding decoder for chunked section fetches."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self._pending = b""
+
+    def feed(self, chunk: bytes) -> bytes:
+        if self.encoding == "base64":
+            data = self._pending + b"".join(chunk.split())
+            usable = len(data) - len(data) % 4
+            self._pending = data[usable:]
+            return binascii.a2b_base64(data[:usable]) if usable else b""
+        if self.encoding == "quoted-printable":
+            data = self._pending + chunk
+            cut = data.rfind(b"\n") + 1
+            self._pending = data[cut:]
+            return binascii.a2b_qp(data[:cut])
+        return chunk
+
+    def finish(self) -> bytes:
+        pending, self._pending = self._pending, b""
+        if not pending:
+            return b""
+        if self.encoding == "base64":
+            return binascii.a2b_base64(pending + b"=" * (-len(pending) % 4))
+        if self.encoding == "quoted-printable":
+            return binascii.a2b_qp(pending)
+        return pending
+
+
+def stream_part(mail, uid: int, part: AttachmentPart, out: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Writes one decoded body section to `out` in partial fetches; returns the decoded size."""
+    decoder = _Decoder(part.encoding)
+    offset = 0
+    written = 0
+    while True:
+        _, data = mail.uid("FETCH", str(uid), f"(BODY.PEEK[{part.section}]<{offset}.{chunk_size}>)")
+        items = parse_fetch_response(data).get(uid, {})
+        chunk = next((v for k, v in items.items() if k.startswith("BODY[")), None) or b""
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        decoded = decoder.feed(chunk)
+        out.write(decoded)
+        written += len(decoded)
+        offset += len(chunk)
+        if len(chunk) < chunk_size:
+            break
+    tail = decoder.finish()
+    out.write(tail)
+    return written + len(tail)
+
+
+def download_part(mail, uid: int, part: AttachmentPart, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Streams one body section to `path`; returns the decoded size."""
+    tmp_path = f"{path}.part"
+    try:
+        with open(tmp_path, "wb") as f:
+            written = stream_part(mail, uid, part, f, chunk_size)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return written
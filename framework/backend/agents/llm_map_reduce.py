@@ -0,0 +1,135 @@
+import asyncio
+import os
+import re
+from typing import Awaitable, Callable, List, Optional
+from rate_limit import TokenBucketLimiter, llm_rate_limiter
+from agents.translation import split_sentences
+
+# Map-reduce over long inputs for LLM-backed agents. The input is split into
+# chunks that fit a token budget, each chunk is sent through the map prompt
+# concurrently, and the partial answers are merged by the reduce prompt
+# (recursively, when the partials themselves exceed the budget). Every call
+# first takes a token from the process's LLM budget (rate_limit.llm_rate_limiter)
+# when one is configured, else from map-reduce's own LLM_MAP_REQUESTS_PER_MINUTE
+# limit, so concurrent chunks from all agents in a process stay under it.
+
+LLM_MAP_CHUNK_TOKENS = int(os.getenv("LLM_MAP_CHUNK_TOKENS", "3000"))
+LLM_MAP_CONCURRENCY = int(os.getenv("LLM_MAP_CONCURRENCY", "4"))
+LLM_MAP_REQUESTS_PER_MINUTE = float(os.getenv("LLM_MAP_REQUESTS_PER_MINUTE", "30"))
+
+map_rate_limiter = llm_rate_limiter or (TokenBucketLimiter(
+    rate_per_minute=LLM_MAP_REQUESTS_PER_MINUTE,
+    burst=max(1, int(os.getenv("LLM_MAP_REQUESTS_BURST", "5"))),
+) if LLM_MAP_REQUESTS_PER_MINUTE > 0 else None)
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count via tiktoken's cl100k_base; about 4 characters per token if it can't load."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # The encoding file is fetched on first use; offline hosts estimate instead
+            print(f"tiktoken unavailable, estimating token counts: {e}")
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def split_by_tokens(text: str, max_tokens: int = LLM_MAP_CHUNK_TOKENS, counter: Callable[[str], int] = count_tokens) -> List[str]:
+    """Packs paragraphs, then sentences, into chunks of at most max_tokens; oversized sentences are cut by words."""
+    units = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if counter(paragraph) <= max_tokens:
+            units.append(paragraph)
+            continue
+        for sentence in split_sentences(paragraph):
+            if counter(sentence) <= max_tokens:
+                units.append(sentence)
+                continue
+            piece = []
+            for word in sentence.split():
+                if piece and counter(" ".join(piece + [word])) > max_tokens:
+                    units.append(" ".join(piece))
+                    piece = []
+                piece.append(word)
+            if piece:
+                units.append(" ".join(piece))
+
+    chunks = []
+    current, current_tokens = [], 0
+    for unit in units:
+        tokens = counter(unit)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+class MapReduce:
+    """
+    `call(prompt) -> str` is the agent's async LLM call. Prompts are format
+    strings: `map_prompt` and `single_prompt` receive {text}, `reduce_prompt`
+    receives {partials}. Inputs that fit one chunk make a single call with
+    `single_prompt` (defaults to `map_prompt`).
+    """
+
+    def __init__(self, call: Callable[[str], Awaitable[str]], map_prompt: str, reduce_prompt: str,
+                 single_prompt: Optional[str] = None, max_tokens: int = LLM_MAP_CHUNK_TOKENS,
+                 concurrency: int = LLM_MAP_CONCURRENCY, limiter: Optional[TokenBucketLimiter] = map_rate_limiter,
+                 limiter_key: str = "llm", counter: Callable[[str], int] = count_tokens):
+        self.call = call
+        self.map_prompt = map_prompt
+        self.reduce_prompt = reduce_prompt
+        self.single_prompt = single_prompt or map_prompt
+        self.max_tokens = max_tokens
+        self.limiter = limiter
+        self.limiter_key = limiter_key
+        self.counter = counter
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _call(self, prompt: str) -> str:
+        async with self._semaphore:
+            if self.limiter is not None:
+                await self.limiter.acquire(self.limiter_key)
+            return await self.call(prompt)
+
+    async def run(self, text: str) -> str:
+        chunks = split_by_tokens(text, self.max_tokens, self.counter)
+        if len(chunks) <= 1:
+            return await self._call(self.single_prompt.format(text=chunks[0] if chunks else ""))
+
+        partials = await asyncio.gather(*(self._call(self.map_prompt.format(text=chunk)) for chunk in chunks))
+        return await self.reduce(list(partials))
+
+    async def reduce(self, partials: List[str]) -> str:
+        # Merge groups that fit the budget until a single answer remains
+        truncated = False
+        while True:
+            groups = split_by_tokens("\n\n".join(partials), self.max_tokens, self.counter)
+            if len(groups) <= 1:
+                return await self._call(self.reduce_prompt.format(partials="\n\n".join(partials)))
+            if len(groups) >= len(partials):
+                # No group holds two partials: they are too long to merge within
+                # the budget. Cut each to half the budget once, so pairs fit.
+                if truncated:
+                    raise ValueError(f"Partial answers can not be reduced within {self.max_tokens} tokens")
+                limit = max(1, self.max_tokens // 2)
+                print(f"Map-reduce: truncating {len(partials)} partial answers to {limit} tokens each to merge them")
+                partials = [split_by_tokens(p, limit, self.counter)[0] if self.counter(p) > limit else p for p in partials]
+                truncated = True
+                continue
+            partials = list(await asyncio.gather(*(self._call(self.reduce_prompt.format(partials=group)) for group in groups)))
+            truncated = False
@@ -0,0 +1,173 @@
+import hashlib
+import imaplib
+import os
+import smtplib
+import threading
+import time
+import weakref
+
+# Mail server sessions shared across agent runs. chat_service re-executes agent
+# modules on every call, so anything that must outlive a single run (open
+# connections) lives here, in a normally imported module.
+
+IMAP_IDLE_TIMEOUT_SECONDS = float(os.getenv("IMAP_IDLE_TIMEOUT_SECONDS", "300"))
+SMTP_IDLE_TIMEOUT_SECONDS = float(os.getenv("SMTP_IDLE_TIMEOUT_SECONDS", "60"))
+# Providers cap messages per connection; start a new session before hitting it
+SMTP_MAX_MESSAGES_PER_SESSION = int(os.getenv("SMTP_MAX_MESSAGES_PER_SESSION", "100"))
+
+
+def session_key(host: str, port: int, user: str, password: str, *security) -> tuple:
+    """
+    Identity of a pooled session: a connection is only reused by callers with
+    the same server, credentials and TLS settings, so a changed password or a
+    STARTTLS agent never gets a session opened under other settings.
+    """
+    digest = hashlib.sha256((password or "").encode("utf-8")).hexdigest()
+    return (host, port, user, digest) + security
+
+
+class IMAPSessionPool:
+    """Keeps one logged-in IMAP connection per server, credentials and TLS mode between runs.
+
+    acquire() hands out the idle connection if it was used within idle_timeout
+    and still answers NOOP, otherwise it logs in afresh. A connection is held by
+    one caller at a time; release() returns it, discard() drops a broken one.
+    """
+
+    def __init__(self, idle_timeout: float = IMAP_IDLE_TIMEOUT_SECONDS, clock=time.monotonic):
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._idle = {}
+        self._keys = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str, port: int, user: str, password: str, use_ssl: bool = True, idle_timeout: float = None):
+        idle_timeout = self.idle_timeout if idle_timeout is None else idle_timeout
+        key = session_key(host, port, user, password, use_ssl)
+        with self._lock:
+            entry = self._idle.pop(key, None)
+
+        if entry is not None:
+            conn, last_used = entry
+            if self.clock() - last_used <= idle_timeout:
+                try:
+                    conn.noop()
+                    return conn
+                except (imaplib.IMAP4.error, OSError):
+                    pass
+            self.discard(conn)
+
+        conn = imaplib.IMAP4_SSL(host, port) if use_ssl else imaplib.IMAP4(host, port)
+        try:
+            conn.login(user, password)
+        except Exception:
+            self.discard(conn)
+            raise
+        with self._lock:
+            self._keys[conn] = key
+        return conn
+
+    def release(self, conn):
+        with self._lock:
+            key = self._keys.get(conn)
+        if key is None:
+            self.discard(conn)
+            return
+        with self._lock:
+            previous = self._idle.pop(key, None)
+            self._idle[key] = (conn, self.clock())
+        if previous is not None:
+            self.discard(previous[0])
+
+    def discard(self, conn):
+        try:
+            conn.logout()
+        except Exception:
+            pass
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conn, _ in idle.values():
+            self.discard(conn)
+
+
+class SMTPSession:
+    __slots__ = ("smtp", "key", "sent", "last_used")
+
+    def __init__(self, smtp: smtplib.SMTP, key: tuple, clock):
+        self.smtp = smtp
+        self.key = key
+        self.sent = 0
+        self.last_used = clock()
+
+
+class SMTPSessionPool:
+    """Keeps authenticated SMTP sessions open between sends.
+
+    Idle sessions are health-checked with NOOP before reuse and replaced once
+    they exceed idle_timeout or have sent max_messages. Several sessions per
+    server, credentials and TLS mode may be idle at once so concurrent senders
+    don't queue.
+    """
+
+    def __init__(self, idle_timeout: float = SMTP_IDLE_TIMEOUT_SECONDS, max_messages: int = SMTP_MAX_MESSAGES_PER_SESSION, clock=time.monotonic):
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self.clock = clock
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str, port: int, user: str, password: str, starttls: bool = True, timeout: float = 30) -> SMTPSession:
+        key = session_key(host, port, user, password, starttls)
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                session = idle.pop() if idle else None
+            if session is None:
+                break
+            if self.clock() - session.last_used <= self.idle_timeout:
+                try:
+                    if session.smtp.noop()[0] == 250:
+                        return session
+                except (smtplib.SMTPException, OSError):
+                    pass
+            self.discard(session)
+
+        smtp = smtplib.SMTP(host, port, timeout=timeout)
+        try:
+            if starttls:
+                smtp.starttls()
+            smtp.login(user, password)
+        except Exception:
+            self.discard(SMTPSession(smtp, key, self.clock))
+            raise
+        return SMTPSession(smtp, key, self.clock)
+
+    def release(self, session: SMTPSession):
+        if session.sent >= self.max_messages:
+            self.discard(session)
+            return
+        session.last_used = self.clock()
+        with self._lock:
+            self._idle.setdefault(session.key, []).append(session)
+
+    def discard(self, session: SMTPSession):
+        try:
+            session.smtp.quit()
+        except Exception:
+            try:
+                session.smtp.close()
+            except Exception:
+                pass
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for sessions in idle.values():
+            for session in sessions:
+                self.discard(session)
+
+
+imap_sessions = IMAPSessionPool()
+smtp_sessions = SMTPSessionPool()
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import re
+from typing import Callable, List, Tuple
+from cache import TTLCache
+
+# Chunked translation shared by the translator agents. Text is split into
+# paragraphs, long paragraphs are packed sentence by sentence into chunks
+# under the service's size limit, and the chunks are translated concurrently
+# with a bounded number in flight. Translations are cached per segment, so
+# boilerplate that recurs across documents (policy headers, signatures) is
+# translated once. The cache lives here because agent modules are
+# re-executed on every call.
+
+TRANSLATION_MAX_CHARS = int(os.getenv("TRANSLATION_MAX_CHARS", "2000"))
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "8"))
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "20000"))
+TRANSLATION_CACHE_TTL_SECONDS = float(os.getenv("TRANSLATION_CACHE_TTL_SECONDS", "86400"))
+
+segment_cache = TTLCache(maxsize=TRANSLATION_CACHE_MAX_ENTRIES, ttl=TRANSLATION_CACHE_TTL_SECONDS)
+
+_PARAGRAPH_BREAK = re.compile(r"(\n\s*\n)")
+# Sentence ends: Latin punctuation and the Devanagari danda
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in _SENTENCE_END.split(text) if s]
+
+
+def chunk_paragraph(paragraph: str, max_chars: int) -> List[str]:
+    """Packs whole sentences into chunks of at most max_chars; only an oversized sentence is cut, at a space."""
+    chunks = []
+    current = ""
+    for sentence in split_sentences(paragraph):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class ChunkedTranslator:
+    """
+    Translates long text with `translate(segment) -> str`, a blocking call
+    (e.g. a deep_translator translator's translate method) run in worker
+    threads. A failed segment becomes "" and is not cached.
+    """
+
+    def __init__(self, translate: Callable[[str], str], source: str, target: str,
+                 max_chars: int = TRANSLATION_MAX_CHARS, concurrency: int = TRANSLATION_CONCURRENCY,
+                 cache: TTLCache = segment_cache):
+        self.translate_segment = translate
+        self.source = source
+        self.target = target
+        self.max_chars = max_chars
+        self.concurrency = concurrency
+        self.cache = cache
+
+    def segment(self, text: str) -> List[Tuple[List[str], str]]:
+        """Returns (chunks, separator that followed them) per paragraph."""
+        pieces = _PARAGRAPH_BREAK.split(text)
+        paragraphs = []
+        for i in range(0, len(pieces), 2):
+            separator = pieces[i + 1] if i + 1 < len(pieces) else ""
+            paragraph = pieces[i].strip()
+            chunks = chunk_paragraph(paragraph, self.max_chars) if paragraph else []
+            paragraphs.append((chunks, separator))
+        return paragraphs
+
+    async def translate(self, text: str) -> str:
+        paragraphs = self.segment(text)
+        translations = {}
+        missing = []
+        for chunks, _ in paragraphs:
+            for chunk in chunks:
+                if chunk in translations:
+                    continue
+                cached = self.cache.get((self.source, self.target, chunk))
+                translations[chunk] = cached
+                if cached is None:
+                    missing.append(chunk)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def translate_one(chunk: str):
+            async with semaphore:
+                try:
+                    result = await asyncio.to_thread(self.translate_segment, chunk)
+                except Exception as e:
+                    print(f"Translation of a {len(chunk)}-character segment failed: {e}")
+                    result = None
+            if result:
+                self.cache.set((self.source, self.target, chunk), result)
+            translations[chunk] = result or ""
+
+        await asyncio.gather(*(translate_one(chunk) for chunk in missing))
+
+        return "".join(
+            " ".join(translations[chunk] for chunk in chunks) + separator
+            for chunks, separator in paragraphs
+        )
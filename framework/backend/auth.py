@@ -1,4 +1,6 @@
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Union
 from jose import JWTError, jwt
@@ -7,14 +9,48 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from models import TokenData, User
 from database import get_database
+from cache import TTLCache
+from rate_limit import TokenBucketLimiter
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Authenticated user lookups are cached briefly so the hot path skips Atlas.
+# Writes made through the API call invalidate_user(); out-of-band edits
+# (create_admin.py, fix_user.py) become visible once the TTL lapses.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS)
+
+# When enabled, role and allowed projects are signed into the access token and
+# trusted until it expires, so authenticated requests need no user lookup at all.
+EMBED_USER_CLAIMS = os.getenv("AUTH_EMBED_USER_CLAIMS", "false").lower() == "true"
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# bcrypt is deliberately slow (~100-250 ms of CPU), so it runs on a small
+# dedicated pool instead of the event loop. Work beyond PASSWORD_HASH_MAX_PENDING
+# queued operations is rejected rather than left to pile up.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_pending_hash_jobs = 0
+
+# Login admission control, applied before any bcrypt work is done. The per-IP
+# bucket is the main control. The account bucket is keyed on (account, IP): it
+# caps guessing one account from one address, and it can't be drained from
+# elsewhere to lock the account's owner out.
+login_ip_limiter = TokenBucketLimiter(
+    rate_per_minute=float(os.getenv("LOGIN_RATE_PER_IP_PER_MINUTE", "30")),
+    burst=int(os.getenv("LOGIN_BURST_PER_IP", "30")),
+)
+login_account_limiter = TokenBucketLimiter(
+    rate_per_minute=float(os.getenv("LOGIN_RATE_PER_ACCOUNT_PER_MINUTE", "10")),
+    burst=int(os.getenv("LOGIN_BURST_PER_ACCOUNT", "10")),
+)
+
 def verify_password(plain_password, hashed_password):
     # bcrypt.checkpw requires bytes
     if isinstance(plain_password, str):
@@ -30,6 +66,37 @@ def get_password_hash(password):
     hashed = bcrypt.hashpw(password, bcrypt.gensalt())
     return hashed.decode('utf-8')
 
+async def _run_password_job(func, *args):
+    global _pending_hash_jobs
+    if _pending_hash_jobs >= PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _pending_hash_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        _pending_hash_jobs -= 1
+
+async def averify_password(plain_password, hashed_password) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def aget_password_hash(password) -> str:
+    return await _run_password_job(get_password_hash, password)
+
+def check_login_admission(username: str, client_ip: str):
+    """Sheds login attempts over the per-IP or per-account-and-IP budget with a 429."""
+    for limiter, key in ((login_ip_limiter, client_ip), (login_account_limiter, (username.lower(), client_ip))):
+        if not limiter.allow(key):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, please try again later",
+                headers={"Retry-After": str(limiter.retry_after(key))},
+            )
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -40,6 +107,33 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def user_claims(user: dict) -> dict:
+    """Claims to sign into the access token for a user document."""
+    claims = {"sub": user["email"]}
+    if EMBED_USER_CLAIMS:
+        claims.update({
+            "role": user.get("role", "user"),
+            "allowed_projects": list(user.get("allowed_projects", [])),
+            "active": user.get("is_active", True),
+        })
+    return claims
+
+def invalidate_user(email: str):
+    user_cache.invalidate(email)
+
+async def load_user(email: str) -> Optional[User]:
+    user = user_cache.get(email)
+    if user is not None:
+        return user
+
+    db = await get_database()
+    user_doc = await db.users.find_one({"email": email})
+    if user_doc is None:
+        return None
+    user = User(**user_doc)
+    user_cache.set(email, user)
+    return user
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -54,12 +148,20 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
-        
-    db = await get_database()
-    user = await db.users.find_one({"email": token_data.email})
+
+    if EMBED_USER_CLAIMS and "role" in payload:
+        return User(
+            email=token_data.email,
+            hashed_password="",
+            role=payload["role"],
+            allowed_projects=payload.get("allowed_projects", []),
+            is_active=payload.get("active", True),
+        )
+
+    user = await load_user(token_data.email)
     if user is None:
         raise credentials_exception
-    return User(**user)
+    return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
@@ -0,0 +1,74 @@
+import os
+from metrics import llm_callback_handler, timed_embeddings
+
+# Backend selection for the LLM, embedding model and vector store.
+#   LLM_BACKEND=groq|fake              (FAKE_LLM_LATENCY_MS, FAKE_LLM_JITTER_MS)
+#   EMBEDDINGS_BACKEND=huggingface|hash (FAKE_EMBEDDINGS_LATENCY_MS)
+#   VECTOR_STORE_BACKEND=atlas|memory
+# The fakes live in fake_backends.py and need no network access.
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_DIMENSIONS = 384
+LLM_MODEL = "llama-3.1-8b-instant"
+
+
+def _backend(name: str, default: str) -> str:
+    return os.getenv(name, default).strip().lower()
+
+
+def create_llm():
+    if _backend("LLM_BACKEND", "groq") == "fake":
+        from fake_backends import FakeChatGroq
+        return FakeChatGroq(
+            latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "0")),
+            jitter_ms=float(os.getenv("FAKE_LLM_JITTER_MS", "0")),
+            callbacks=[llm_callback_handler()],
+        )
+
+    from langchain_groq import ChatGroq
+    return ChatGroq(model=LLM_MODEL, api_key=os.getenv("GROQ_API_KEY"), callbacks=[llm_callback_handler()],
+                    rate_limiter=shared_llm_rate_limiter())
+
+
+def shared_llm_rate_limiter():
+    """rate_limit.llm_rate_limiter as a LangChain rate limiter, or None when no LLM budget is configured."""
+    from rate_limit import llm_rate_limiter
+    if llm_rate_limiter is None:
+        return None
+    from langchain_core.rate_limiters import BaseRateLimiter
+
+    class SharedRateLimiter(BaseRateLimiter):
+        def acquire(self, *, blocking: bool = True) -> bool:
+            if not blocking:
+                return llm_rate_limiter.allow("llm")
+            llm_rate_limiter.wait("llm")
+            return True
+
+        async def aacquire(self, *, blocking: bool = True) -> bool:
+            if not blocking:
+                return llm_rate_limiter.allow("llm")
+            await llm_rate_limiter.acquire("llm")
+            return True
+
+    return SharedRateLimiter()
+
+
+def create_embeddings():
+    if _backend("EMBEDDINGS_BACKEND", "huggingface") == "hash":
+        from fake_backends import HashEmbeddings
+        return timed_embeddings(HashEmbeddings(
+            dimensions=EMBEDDING_DIMENSIONS,
+            latency_ms=float(os.getenv("FAKE_EMBEDDINGS_LATENCY_MS", "0")),
+        ))
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return timed_embeddings(HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL))
+
+
+def uses_memory_vector_store() -> bool:
+    return _backend("VECTOR_STORE_BACKEND", "atlas") == "memory"
+
+
+def create_memory_vector_store(embeddings):
+    from fake_backends import InMemoryVectorStore
+    return InMemoryVectorStore(embedding=embeddings)
@@ -0,0 +1,178 @@
+"""
+Load benchmark for /projects/{id}/chat and /projects/{id}/ingest.
+
+By default the app runs in-process with the offline fake backends
+(LLM_BACKEND=fake, EMBEDDINGS_BACKEND=hash, VECTOR_STORE_BACKEND=memory), so only
+a MongoDB for the application collections is needed (a local mongod is fine).
+Pass --base-url to drive an already running server instead.
+
+Usage:
+    cd framework/backend
+    MONGO_URI=mongodb://localhost:27017 python benchmarks/bench_api.py \
+        --concurrency 32 --chat-requests 500 --ingest-requests 50 --llm-latency-ms 300
+"""
+import argparse
+import asyncio
+import math
+import os
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SAMPLE_SENTENCES = [
+    "Employees must keep customer data confidential at all times.",
+    "Internet access is provided for business purposes only.",
+    "Expense reports are due within thirty days of travel.",
+    "All laptops must use full disk encryption.",
+    "Remote work requires manager approval and a secure connection.",
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    # Nearest-rank percentile
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def report(name: str, latencies: List[float], errors: int, wall_seconds: float) -> Dict[str, float]:
+    total = len(latencies) + errors
+    stats = {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": total / wall_seconds if wall_seconds else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": (sum(latencies) / len(latencies) * 1000) if latencies else 0.0,
+    }
+    print(
+        f"{name:<8} n={stats['requests']:<6} err={stats['errors']:<4} "
+        f"rps={stats['throughput_rps']:>8.1f}  p50={stats['p50_ms']:>8.1f}ms  "
+        f"p95={stats['p95_ms']:>8.1f}ms  p99={stats['p99_ms']:>8.1f}ms  mean={stats['mean_ms']:>8.1f}ms"
+    )
+    return stats
+
+
+async def run_phase(name: str, total: int, concurrency: int, make_request) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await make_request(i)
+                if response.status_code >= 400:
+                    errors += 1
+                    return
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return report(name, latencies, errors, time.perf_counter() - started)
+
+
+def build_document(i: int, kilobytes: int) -> bytes:
+    lines = []
+    size = 0
+    while size < kilobytes * 1024:
+        line = f"Section {i}.{len(lines)}: {SAMPLE_SENTENCES[len(lines) % len(SAMPLE_SENTENCES)]}\n"
+        lines.append(line)
+        size += len(line)
+    return "".join(lines).encode("utf-8")
+
+
+async def seed_admin(email: str, password: str, db_name: str):
+    """In-process mode only: points the app at a scratch database and creates an admin."""
+    import database
+    from auth import get_password_hash
+
+    database.db = database.client[db_name]
+    await database.db.users.update_one(
+        {"email": email},
+        {"$set": {
+            "email": email,
+            "hashed_password": get_password_hash(password),
+            "role": "admin",
+            "is_active": True,
+            "allowed_projects": [],
+        }},
+        upsert=True,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Chat/ingest load benchmark")
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the in-process app")
+    parser.add_argument("--email", default="bench-admin@example.com")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--db-name", default="agent_framework_bench")
+    parser.add_argument("--keep-db", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--chat-requests", type=int, default=200)
+    parser.add_argument("--ingest-requests", type=int, default=20)
+    parser.add_argument("--doc-kb", type=int, default=32)
+    parser.add_argument("--llm-latency-ms", type=float, default=250)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50)
+    parser.add_argument("--embeddings-latency-ms", type=float, default=1)
+    args = parser.parse_args()
+
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        os.environ.setdefault("LLM_BACKEND", "fake")
+        os.environ.setdefault("EMBEDDINGS_BACKEND", "hash")
+        os.environ.setdefault("VECTOR_STORE_BACKEND", "memory")
+        os.environ.setdefault("FAKE_LLM_LATENCY_MS", str(args.llm_latency_ms))
+        os.environ.setdefault("FAKE_LLM_JITTER_MS", str(args.llm_jitter_ms))
+        os.environ.setdefault("FAKE_EMBEDDINGS_LATENCY_MS", str(args.embeddings_latency_ms))
+        os.chdir(BACKEND_DIR)
+        sys.path.insert(0, BACKEND_DIR)
+
+        from main import app
+        await seed_admin(args.email, args.password, args.db_name)
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=300, limits=limits) as client:
+        response = await client.post("/token", data={"username": args.email, "password": args.password})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        response = await client.post("/projects", json={"name": "Benchmark Project", "description": "load test"}, headers=headers)
+        response.raise_for_status()
+        project_id = response.json()["_id"]
+
+        async def ingest(i: int):
+            files = {"file": (f"bench_{i}.txt", build_document(i, args.doc_kb), "text/plain")}
+            return await client.post(f"/projects/{project_id}/ingest", files=files, headers=headers)
+
+        async def chat(i: int):
+            query = f"What does the policy say about item {i % 50}? {SAMPLE_SENTENCES[i % len(SAMPLE_SENTENCES)]}"
+            return await client.post(f"/projects/{project_id}/chat", json={"query": query}, headers=headers)
+
+        print(f"project={project_id} concurrency={args.concurrency}")
+        await run_phase("ingest", args.ingest_requests, args.concurrency, ingest)
+        await run_phase("chat", args.chat_requests, args.concurrency, chat)
+
+    if not args.base_url and not args.keep_db:
+        import database
+        await database.client.drop_database(args.db_name)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from typing import BinaryIO, NamedTuple, Optional
+
+# Content-addressed storage for uploaded documents and email attachments.
+# Every file is hashed while it is streamed in and kept once, under its
+# SHA-256, at <root>/<aa>/<bb>/<digest>. The paths the rest of the app reads
+# (documents/<project_id>/<name>, local_repository/<name>, the email agent's
+# output folder) are hard links to the blob, so storing a file is a single
+# write and identical uploads share their bytes. Links fall back to symlinks,
+# then copies, when the view lives on another filesystem.
+
+BLOB_STORE_DIR = os.getenv(
+    "BLOB_STORE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "blob_store")),
+)
+BLOB_CHUNK_BYTES = 1024 * 1024
+# Largest upload accepted; 0 disables the limit
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(512 * 1024 * 1024)))
+
+
+class BlobTooLarge(Exception):
+    def __init__(self, limit: int):
+        super().__init__(f"File exceeds the {limit}-byte upload limit")
+        self.limit = limit
+
+
+class Blob(NamedTuple):
+    sha256: str
+    size: int
+    path: str
+    # False when identical content was already stored
+    created: bool
+
+
+class BlobWriter:
+    """Streams one blob into the store: write() chunks, then commit() (or abort())."""
+
+    def __init__(self, store: "BlobStore"):
+        self.store = store
+        self.size = 0
+        self._hash = hashlib.sha256()
+        fd, self.tmp_path = tempfile.mkstemp(dir=store.tmp_dir, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> int:
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+        return len(chunk)
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def commit(self) -> Blob:
+        self._file.close()
+        digest = self.sha256
+        path = self.store.path_for(digest)
+        if os.path.exists(path):
+            os.remove(self.tmp_path)
+            return Blob(digest, self.size, path, False)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.tmp_path, path)
+        return Blob(digest, self.size, path, True)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # commit() has already moved the file when the block succeeded
+        if exc_type is not None or not self._file.closed:
+            self.abort()
+
+
+class BlobStore:
+    def __init__(self, root: str = BLOB_STORE_DIR):
+        self.root = os.path.abspath(root)
+        # Partial blobs live inside the store so commit() is a same-filesystem rename
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.path_for(sha256))
+
+    def writer(self) -> BlobWriter:
+        return BlobWriter(self)
+
+    def put_stream(self, source: BinaryIO, chunk_size: int = BLOB_CHUNK_BYTES) -> Blob:
+        with self.writer() as writer:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                writer.write(chunk)
+            return writer.commit()
+
+    async def put_async(self, source, max_bytes: int = MAX_UPLOAD_BYTES, chunk_size: int = BLOB_CHUNK_BYTES) -> Blob:
+        """
+        Streams an async reader (e.g. FastAPI's UploadFile) into the store in
+        one pass: each chunk is hashed, size-checked and written in a worker
+        thread, so the event loop is never blocked on disk. Raises BlobTooLarge,
+        leaving nothing behind, as soon as the limit is crossed.
+        """
+        writer = await asyncio.to_thread(self.writer)
+        try:
+            while True:
+                chunk = await source.read(chunk_size)
+                if not chunk:
+                    break
+                if max_bytes and writer.size + len(chunk) > max_bytes:
+                    raise BlobTooLarge(max_bytes)
+                await asyncio.to_thread(writer.write, chunk)
+            return await asyncio.to_thread(writer.commit)
+        except BaseException:
+            await asyncio.to_thread(writer.abort)
+            raise
+
+    def put_file(self, path: str) -> Blob:
+        with open(path, "rb") as f:
+            return self.put_stream(f)
+
+    @staticmethod
+    def holds(path: str, blob: Blob) -> bool:
+        """True when `path` already has the blob's content (a link to it, or a copy)."""
+        if not os.path.exists(path):
+            return False
+        if os.path.samefile(path, blob.path):
+            return True
+        if os.path.getsize(path) != blob.size:
+            return False
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(BLOB_CHUNK_BYTES), b""):
+                digest.update(chunk)
+        return digest.hexdigest() == blob.sha256
+
+    def link(self, blob: Blob, dest: str) -> str:
+        """Points `dest` at the blob, replacing whatever was there."""
+        os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+        if self.holds(dest, blob):
+            return dest
+        # Link under a temporary name, then rename over dest so readers never see it missing
+        # (unique per call: links run in worker threads, possibly for the same dest at once)
+        tmp = f"{dest}.{uuid.uuid4().hex}.link"
+        try:
+            try:
+                os.link(blob.path, tmp)
+            except OSError:
+                try:
+                    os.symlink(blob.path, tmp)
+                except OSError:
+                    shutil.copyfile(blob.path, tmp)
+            os.replace(tmp, dest)
+        finally:
+            # rename(2) is a no-op when tmp and dest are already links to the same
+            # inode (another thread linked this blob first), leaving tmp behind
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+        return dest
+
+    def link_unique(self, blob: Blob, directory: str, filename: str) -> str:
+        """
+        Links the blob as directory/filename unless that name already holds
+        different content, in which case the name gets a short hash suffix.
+        Returns the path used.
+        """
+        dest = os.path.join(directory, filename)
+        if os.path.exists(dest) and not self.holds(dest, blob):
+            stem, ext = os.path.splitext(filename)
+            dest = os.path.join(directory, f"{stem}-{blob.sha256[:8]}{ext}")
+        return self.link(blob, dest)
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore()
+    return _blob_store
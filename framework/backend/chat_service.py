@@ -1,16 +1,15 @@
 
 from typing import List, Optional, Dict, Any
 from database import get_database
-from models import ChainAgentConfig, ChatMessage, ChatSession, Project
-from rag_service import RAGService
+from models import ChainAgentConfig, ChatMessage, Project
+from services import get_rag_service
+from chat_writer import chat_writer
+from project_cache import project_cache
+import time
+from metrics import chain_step_duration_seconds
+from agent_workers import run_agent
 from bson import ObjectId
 import os
-import sys
-import importlib.util
-from langchain_community.document_loaders import TextLoader, PyPDFLoader
-
-# Initialize RAG Service (shared instance logic)
-rag_service = RAGService()
 
 async def process_chat_request(
     project_id: str,
@@ -30,9 +29,10 @@ async def process_chat_request(
         raise ValueError("Invalid Project ID")
 
     db = await get_database()
-    project = await db.projects.find_one({"_id": ObjectId(project_id)})
+    # Cached with its parsed chain config and allowed agent ids (see project_cache)
+    cached_project = await project_cache.get(project_id)
     
-    if not project:
+    if not cached_project:
         raise ValueError("Project not found")
         
     # Check permissions
@@ -40,12 +40,8 @@ async def process_chat_request(
          raise ValueError("Not authorized to access this project")
 
     # Determine Chain Configuration
-    project_chain_config = []
-    if project.get("chain_config") and len(project["chain_config"]) > 0:
-        project_chain_config = [ChainAgentConfig(**c) for c in project["chain_config"]]
-    elif project.get("agents"):
-        # Legacy support
-        project_chain_config = [ChainAgentConfig(agent_id=str(aid) if isinstance(aid, ObjectId) else str(aid)) for aid in project["agents"] if ObjectId.is_valid(aid)]
+    project = cached_project.doc
+    project_chain_config = cached_project.chain_config
 
     # Determine execution chain
     final_execution_chain = []
@@ -55,10 +51,9 @@ async def process_chat_request(
              final_execution_chain = chain_config
         else:
              # Basic users: Validate subset
-             allowed_agent_ids = set(c.agent_id for c in project_chain_config)
              requested_agent_ids = set(c.agent_id for c in chain_config)
              
-             if requested_agent_ids.issubset(allowed_agent_ids):
+             if requested_agent_ids.issubset(cached_project.chain_agent_ids):
                   final_execution_chain = chain_config
              else:
                   # Fallback to project default
@@ -94,6 +89,7 @@ async def process_chat_request(
                          continue
                          
                      try:
+                         from langchain_community.document_loaders import TextLoader, PyPDFLoader
                          content = ""
                          if filename.endswith(".pdf"):
                              loader = PyPDFLoader(file_path)
@@ -116,58 +112,47 @@ async def process_chat_request(
                      context_prompt += f"\nReferenced Files: {', '.join(chain_item.files)} (Could not read content)\n"
 
             # Execute Agent
+            step_started = time.perf_counter()
+            step_status = "ok"
             try:
                 # Handle RAG Agents
                 if agent_doc.get("type", "").lower() == "rag" or "document" in agent_doc.get("type", "").lower():  
                      rag_query = f"{current_input} {context_prompt}"
-                     rag_result = await rag_service.query(project_id, rag_query)
+                     rag_result = await get_rag_service().query(project_id, rag_query)
                      response = rag_result["answer"]
                 else:
                     # Dynamic Load Code Agent
                     if not agent_doc.get("file_path"):
                          current_input = f"Error: Agent {agent_doc['name']} has no file path."
+                         step_status = "error"
                          continue
                          
-                    # Load module dynamically
-                    # We might need to ensure sys.path is correct or use absolute imports appropriately
-                    spec = importlib.util.spec_from_file_location(agent_doc["name"], agent_doc["file_path"])
-                    module = importlib.util.module_from_spec(spec)
-                    # We need to handle potential module name collisions if not careful, 
-                    # but for now we trust the agent name is unique enough or we overwrite
-                    sys.modules[agent_doc["name"]] = module
-                    spec.loader.exec_module(module)
-                    
-                    # Find agent class
-                    class_name = f"{agent_doc['name'].replace(' ', '')}Agent"
-                    agent_class = getattr(module, class_name, None)
-                    
-                    if not agent_class:
-                         for name, obj in module.__dict__.items():
-                            if isinstance(obj, type) and "Agent" in name:
-                                agent_class = obj
-                                break
-                
-                    if not agent_class:
-                        raise Exception("Agent class not found")
-                    
-                    agent_config_dict = agent_doc.get("config", {})
+                    validation = agent_doc.get("validation") or {}
+                    if validation.get("status") == "failed":
+                         # Rejected when it was created; don't load it on every chat
+                         current_input = f"Error: Agent {agent_doc['name']} failed validation: {'; '.join(validation.get('errors', []))}"
+                         step_status = "error"
+                         continue
+
                     agent_input = f"{current_input}{context_prompt}"
-                    
-                    agent_instance = agent_class(name=agent_doc["name"], config=agent_config_dict)
-                    response = agent_instance.run(agent_input)
+                    # Warm worker process by default; native async agents and sync
+                    # agents are both handled there (or on the loop/executor in-process)
+                    response = await run_agent(agent_doc, agent_input)
             
                 current_input = response # Output becomes input for next
             
             except Exception as e:
                 import traceback
                 traceback.print_exc()
+                step_status = "error"
                 current_input = f"Error executing agent {agent_doc['name']}: {str(e)}"
+            finally:
+                chain_step_duration_seconds.observe(time.perf_counter() - step_started, agent_id=agent_id, status=step_status)
     
         final_response = current_input
 
     else:
         # Default RAG behavior if no chain
-        project = await db.projects.find_one({"_id": ObjectId(project_id)})
         agent_contexts = []
         if project and project.get("agents"):
             agent_ids = [ObjectId(aid) for aid in project["agents"] if ObjectId.is_valid(aid)]
@@ -181,7 +166,7 @@ async def process_chat_request(
                     "file_path": agent_doc.get("file_path")
                 })
 
-        result = await rag_service.query(project_id, query, agents_metadata=agent_contexts)
+        result = await get_rag_service().query(project_id, query, agents_metadata=agent_contexts)
         final_response = result["answer"]
         source_docs = result.get("source_documents", [])
     
@@ -193,27 +178,10 @@ async def process_chat_request(
         sources=source_docs
     )
     
-    existing_session = await db.chat_sessions.find_one({
-        "project_id": project_id,
-        "user_email": user_email
-    })
-    
     chain_data = [c.dict() for c in final_execution_chain] if final_execution_chain else []
 
-    if existing_session:
-        update_data = {
-            "$push": {"messages": {"$each": [user_msg.dict(), ai_msg.dict()]}},
-            "$set": {"current_chain": chain_data}
-        }
-        await db.chat_sessions.update_one({"_id": existing_session["_id"]}, update_data)
-    else:
-        new_session = ChatSession(
-            project_id=project_id,
-            user_email=user_email,
-            messages=[user_msg, ai_msg],
-            current_chain=final_execution_chain 
-        )
-        await db.chat_sessions.insert_one(new_session.dict(by_alias=True, exclude={"id"}))
+    # Persisted by the write-behind writer; the answer does not wait on Atlas
+    await chat_writer.enqueue(project_id, user_email, [user_msg.dict(), ai_msg.dict()], chain_data)
     
     return {
         "answer": final_response,
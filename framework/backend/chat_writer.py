@@ -0,0 +1,172 @@
+import os
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+from pymongo import UpdateOne
+from database import get_database
+import stats_service
+
+# Write-behind persistence of chat turns. process_chat_request enqueues each
+# turn and returns immediately; a background task drains the queue, coalesces
+# turns per (project_id, user_email) and writes them as one unordered batch of
+# upserts. The queue is bounded, so a slow database applies backpressure to
+# new chats instead of growing memory. stop() flushes everything on shutdown.
+
+SessionKey = Tuple[str, str]
+
+MAX_PENDING = int(os.getenv("CHAT_WRITER_MAX_PENDING", "10000"))
+MAX_BATCH = int(os.getenv("CHAT_WRITER_MAX_BATCH", "500"))
+FLUSH_INTERVAL_SECONDS = float(os.getenv("CHAT_WRITER_FLUSH_INTERVAL_MS", "50")) / 1000
+MAX_RETRIES = 3
+
+
+class ChatHistoryWriter:
+    def __init__(self, max_pending: int = MAX_PENDING, max_batch: int = MAX_BATCH, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = None
+        self._task: asyncio.Task = None
+        self._pending: Dict[SessionKey, int] = {}
+        self._flushed: asyncio.Condition = None
+        self._stopping: asyncio.Event = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._flushed = asyncio.Condition()
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flushes every queued turn, then stops the writer."""
+        if not self.running:
+            return
+        self._stopping.set()
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def enqueue(self, project_id: str, user_email: str, messages: List[dict], chain: List[dict]):
+        turn = (project_id, user_email, messages, chain)
+        if not self.running:
+            # No background writer (scripts, tests without lifespan): write inline
+            await self._write_batch([turn])
+            return
+        # Blocks when the queue is full: backpressure rather than unbounded memory
+        await self._queue.put(turn)
+        # Counted only once queued, so a request cancelled while blocked in put()
+        # leaves no phantom turn behind. Nothing yields between put() returning
+        # and this line, so the writer can not flush the turn before it is counted.
+        key = (project_id, user_email)
+        self._pending[key] = self._pending.get(key, 0) + 1
+
+    async def wait_until_flushed(self, project_id: str, user_email: str, timeout: float = 5.0):
+        """Read-your-writes for history reads: waits for this session's queued turns."""
+        key = (project_id, user_email)
+        if not self.running or not self._pending.get(key):
+            return
+        async with self._flushed:
+            try:
+                await asyncio.wait_for(self._flushed.wait_for(lambda: not self._pending.get(key)), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            batch = []
+            if first is None:
+                stopping = True
+            else:
+                batch.append(first)
+
+            # Give concurrent chats one flush window to join this batch
+            # (cut short when shutdown begins)
+            if not stopping and self.flush_interval and not self._stopping.is_set():
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            while not stopping and len(batch) < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+
+            if stopping:
+                # Drain everything still queued before exiting
+                while not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is not None:
+                        batch.append(item)
+
+            if batch:
+                try:
+                    await self._write_batch(batch)
+                except Exception as e:
+                    print(f"ERROR: Chat history batch failed: {e}")
+                for project_id, user_email, _, _ in batch:
+                    key = (project_id, user_email)
+                    self._pending[key] -= 1
+                    if not self._pending[key]:
+                        del self._pending[key]
+                async with self._flushed:
+                    self._flushed.notify_all()
+
+    async def _write_batch(self, batch: List[Tuple[str, str, List[dict], List[dict]]]):
+        # Coalesce turns per session, keeping message order and the latest chain
+        sessions: "OrderedDict[SessionKey, Dict[str, Any]]" = OrderedDict()
+        for project_id, user_email, messages, chain in batch:
+            entry = sessions.setdefault((project_id, user_email), {"messages": [], "chain": chain, "turns": 0})
+            entry["messages"].extend(messages)
+            entry["chain"] = chain
+            entry["turns"] += 1
+
+        keys = list(sessions)
+        operations = [
+            UpdateOne(
+                {"project_id": project_id, "user_email": user_email},
+                {
+                    "$push": {"messages": {"$each": sessions[(project_id, user_email)]["messages"]}},
+                    "$set": {"current_chain": sessions[(project_id, user_email)]["chain"]},
+                    "$setOnInsert": {"title": "New Chat", "created_at": datetime.utcnow()},
+                },
+                upsert=True,
+            )
+            for project_id, user_email in keys
+        ]
+
+        db = await get_database()
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                result = await db.chat_sessions.bulk_write(operations, ordered=False)
+                break
+            except Exception as e:
+                if attempt == MAX_RETRIES:
+                    turns = sum(s["turns"] for s in sessions.values())
+                    print(f"ERROR: Dropping {turns} chat turns after {attempt} failed writes: {e}")
+                    return
+                await asyncio.sleep(0.1 * 2 ** attempt)
+
+        for index in result.upserted_ids:
+            project_id, _ = keys[index]
+            await stats_service.increment("total_sessions")
+            await stats_service.mark_project_active(project_id)
+
+        chats_by_project: Dict[str, int] = {}
+        for (project_id, _), entry in sessions.items():
+            chats_by_project[project_id] = chats_by_project.get(project_id, 0) + entry["turns"]
+        for project_id, turns in chats_by_project.items():
+            await stats_service.record_usage("chats", project_id, amount=turns)
+
+
+chat_writer = ChatHistoryWriter()
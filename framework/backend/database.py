@@ -1,6 +1,9 @@
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure, PyMongoError
 from dotenv import load_dotenv
+from metrics import mongo_command_listener
 
 load_dotenv()
 
@@ -10,8 +13,104 @@ MONGO_URI = os.getenv("MONGO_URI")
 if not MONGO_URI:
     raise ValueError("MONGO_URI not found in environment variables")
 
-client = AsyncIOMotorClient(MONGO_URI, tlsCAFile=certifi.where())
+# One pool per process, shared by the API and RAGService's vector store
+client = AsyncIOMotorClient(
+    MONGO_URI,
+    tlsCAFile=certifi.where(),
+    maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+    minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", "5")),
+    maxIdleTimeMS=int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+    event_listeners=[mongo_command_listener()],
+)
 db = client.get_database("agent_framework")
 
 async def get_database():
     return db
+
+
+# Indexes backing the hot queries: login and auth lookups by email, the
+# per-user chat session lookup and distinct("project_id") for stats (served by
+# the compound index prefix). projects.find({"_id": {"$in": ...}}) already uses _id.
+# project_user is unique because chat_writer upserts on it: without that, two
+# API processes can both insert a session for the same user. Deployments that
+# already hold duplicates must merge them first; find them with
+#   db.chat_sessions.aggregate([{$group: {_id: {p: "$project_id", u: "$user_email"},
+#                                         n: {$sum: 1}}}, {$match: {n: {$gt: 1}}}])
+# Until then the index stays non-unique and is reported under "failed".
+INDEXES = [
+    ("users", [("email", ASCENDING)], {"name": "email_unique", "unique": True}),
+    ("chat_sessions", [("project_id", ASCENDING), ("user_email", ASCENDING)], {"name": "project_user", "unique": True}),
+    # Repository catalog: upserts by name, and keyset pages on _id under each filter
+    ("repository_documents", [("name", ASCENDING)], {"name": "name_unique", "unique": True}),
+    ("repository_documents", [("projects", ASCENDING), ("_id", ASCENDING)], {"name": "projects_id"}),
+    ("repository_documents", [("status", ASCENDING), ("_id", ASCENDING)], {"name": "status_id"}),
+]
+
+# Atlas Search index used by RAGService; it cannot be created through the driver
+# on every deployment tier, so it is only verified.
+VECTOR_COLLECTION = "vectors"
+VECTOR_INDEX_NAME = "vector_index"
+VECTOR_FILTER_FIELDS = ["project_id"]
+
+index_report = {}
+
+async def verify_vector_index(database) -> dict:
+    try:
+        cursor = database[VECTOR_COLLECTION].list_search_indexes(VECTOR_INDEX_NAME)
+        indexes = await cursor.to_list(length=None)
+    except PyMongoError as e:
+        return {"status": "unavailable", "error": str(e)}
+
+    if not indexes:
+        return {"status": "missing", "name": VECTOR_INDEX_NAME}
+
+    definition = indexes[0].get("latestDefinition") or indexes[0].get("definition") or {}
+    filter_paths = {f.get("path") for f in definition.get("fields", []) if f.get("type") == "filter"}
+    missing_filters = [f for f in VECTOR_FILTER_FIELDS if f not in filter_paths]
+    return {
+        "status": "ok" if not missing_filters else "incomplete",
+        "name": VECTOR_INDEX_NAME,
+        "queryable": indexes[0].get("queryable"),
+        "missing_filter_fields": missing_filters,
+    }
+
+async def _replace_index(collection, keys, options):
+    """Rebuilds an index under its new options; restores the old one if that fails."""
+    existing = (await collection.index_information()).get(options["name"], {})
+    await collection.drop_index(options["name"])
+    try:
+        await collection.create_index(keys, **options)
+    except PyMongoError:
+        # e.g. duplicate sessions block the unique build; keep the lookups indexed
+        previous = {k: v for k, v in existing.items() if k in ("unique", "sparse", "expireAfterSeconds")}
+        await collection.create_index(keys, name=options["name"], **previous)
+        raise
+
+async def ensure_indexes(database=None) -> dict:
+    """Idempotently creates the declared indexes and reports anything missing."""
+    database = database if database is not None else db
+    report = {"ok": [], "failed": [], "vector_index": None}
+
+    for collection, keys, options in INDEXES:
+        try:
+            try:
+                await database[collection].create_index(keys, **options)
+            except OperationFailure as e:
+                # IndexOptionsConflict / IndexKeySpecsConflict: an older definition
+                # (e.g. project_user before it was unique) holds the name
+                if e.code not in (85, 86):
+                    raise
+                await _replace_index(database[collection], keys, options)
+            report["ok"].append(f"{collection}.{options['name']}")
+        except PyMongoError as e:
+            # e.g. duplicate emails already stored; keep serving and surface it
+            print(f"Index {collection}.{options['name']} could not be created: {e}")
+            report["failed"].append({"index": f"{collection}.{options['name']}", "error": str(e)})
+
+    report["vector_index"] = await verify_vector_index(database)
+    if report["vector_index"]["status"] != "ok":
+        print(f"Vector index check: {report['vector_index']}")
+
+    index_report.clear()
+    index_report.update(report)
+    return report
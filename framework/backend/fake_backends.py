@@ -0,0 +1,177 @@
+import re
+import time
+import math
+import random
+import asyncio
+import hashlib
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.vectorstores import VectorStore
+
+# Deterministic, offline stand-ins for Groq, HuggingFace embeddings and the Atlas
+# vector store. They are selected through backends.py so process_chat_request and
+# RAGService.query can be load tested without network access.
+
+
+def _stable_seed(*parts: str) -> int:
+    digest = hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class FakeChatGroq(BaseChatModel):
+    """
+    Chat model with configurable latency that mimics ChatGroq's tool calling.
+    With tools bound it calls the first tool with the user's input; once a tool
+    result is present it returns that result as the final answer.
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-groq"
+
+    def bind_tools(self, tools: List[Any], **kwargs: Any):
+        from langchain_core.utils.function_calling import convert_to_openai_tool
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _delay(self, messages: List[BaseMessage]) -> float:
+        if not self.latency_ms and not self.jitter_ms:
+            return 0.0
+        # Same prompt -> same latency, so benchmark runs are reproducible
+        rng = random.Random(_stable_seed(str(self.seed), *[str(m.content) for m in messages]))
+        return max(0.0, self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def _respond(self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]]) -> AIMessage:
+        last = messages[-1]
+        prompt_tokens = sum(len(str(m.content).split()) for m in messages)
+
+        if tools and not isinstance(last, ToolMessage):
+            function = tools[0]["function"]
+            properties = function.get("parameters", {}).get("properties", {})
+            arg_name = next(iter(properties), "query")
+            call_id = f"call_{_stable_seed(str(last.content)) % 10**12}"
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": function["name"], "args": {arg_name: str(last.content)}, "id": call_id}],
+            )
+            completion_tokens = 1
+        else:
+            content = str(last.content) if isinstance(last, ToolMessage) else f"Echo: {last.content}"
+            message = AIMessage(content=content)
+            completion_tokens = len(content.split())
+
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._delay(messages))
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, kwargs.get("tools")))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._delay(messages))
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, kwargs.get("tools")))])
+
+
+class HashEmbeddings(Embeddings):
+    """Feature-hashing embeddings: identical text always maps to the same unit vector."""
+
+    def __init__(self, dimensions: int = 384, latency_ms: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "big") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms * len(texts) / 1000)
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return self._embed(text)
+
+
+def _matches(metadata: Dict[str, Any], pre_filter: Optional[Dict[str, Any]]) -> bool:
+    """Supports the subset of $vectorSearch filters RAGService uses: equality and $eq/$in."""
+    if not pre_filter:
+        return True
+    for field, condition in pre_filter.items():
+        value = metadata.get(field)
+        if isinstance(condition, dict):
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class InMemoryVectorStore(VectorStore):
+    """Thread-safe brute-force cosine search with Atlas-style `pre_filter` support."""
+
+    def __init__(self, embedding: Embeddings):
+        self.embedding = embedding
+        self._records: List[Tuple[str, str, Dict[str, Any], List[float]]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        vectors = self.embedding.embed_documents(texts)
+        with self._lock:
+            for record in zip(ids, texts, metadatas, vectors):
+                self._records.append(record)
+        return ids
+
+    def similarity_search_with_score(self, query: str, k: int = 4, pre_filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        query_vector = self.embedding.embed_query(query)
+        with self._lock:
+            records = list(self._records)
+
+        scored = []
+        for _id, text, metadata, vector in records:
+            if not _matches(metadata, pre_filter):
+                continue
+            score = sum(a * b for a, b in zip(query_vector, vector))
+            scored.append((Document(page_content=text, metadata=dict(metadata), id=_id), score))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:k]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs: Any) -> "InMemoryVectorStore":
+        store = cls(embedding=embedding)
+        store.add_texts(texts, metadatas=metadatas)
+        return store
@@ -1,37 +1,83 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, status
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, status, Request, Response, Query
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
+from responses import FastJSONResponse, ModelJSONResponse
+import metrics
 from dotenv import load_dotenv
 import os
+import asyncio
+import json
+from contextlib import asynccontextmanager
 from datetime import timedelta
-import shutil
-import tempfile
 from typing import List
-from database import get_database
+from database import get_database, ensure_indexes, index_report
 from models import Project, ProjectCreate, ChatSession, ChatMessage, ChatRequest, Agent, ProjectScreen, ChainAgentConfig
-from rag_service import RAGService
-from project_generator import ProjectGenerator
 from bson import ObjectId
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 import importlib.util
 import sys
-from langchain_community.document_loaders import TextLoader, PyPDFLoader
 from fastapi.security import OAuth2PasswordRequestForm
 from chat_service import process_chat_request
+from agent_workers import run_agent, get_worker_pool, shutdown_worker_pool, AgentWorkerUnavailable, AGENT_EXECUTION_MODE
+from agent_validation import validate_agent
+from blob_store import BlobTooLarge, MAX_UPLOAD_BYTES, get_blob_store
+from upload_sessions import UploadSessionError, get_upload_sessions
+import stats_service
+import repository_catalog
+from chat_writer import chat_writer
+from project_cache import project_cache
+from services import get_rag_service, get_project_generator, get_teams_adapter, warm_up, is_warm, warmup_state
 from auth import (
     create_access_token, 
     get_current_active_user, 
     get_admin_user, 
-    get_password_hash, 
-    verify_password,
+    aget_password_hash,
+    averify_password,
+    check_login_admission,
+    invalidate_user,
+    user_claims,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from models import User, UserCreate, Token
+from models import User, UserCreate, UserSummary, Token, ProjectSummary, AgentSummary
 
 load_dotenv()
 
-app = FastAPI(title="Agent Framework API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy subsystems are warmed in the background so liveness answers immediately
+    chat_writer.start()
+    background = []
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true":
+        background.append(asyncio.create_task(warm_up()))
+    if os.getenv("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true":
+        background.append(asyncio.create_task(ensure_indexes()))
+    background.append(asyncio.create_task(project_cache.watch_changes()))
+    if os.getenv("REPOSITORY_CATALOG_BACKFILL_ON_STARTUP", "true").lower() == "true":
+        background.append(asyncio.create_task(repository_catalog.backfill(LOCAL_REPO_DIR)))
+    if os.getenv("STATS_RECONCILE_ON_STARTUP", "true").lower() == "true":
+        background.append(asyncio.create_task(stats_service.reconciliation_loop()))
+    if AGENT_EXECUTION_MODE == "workers" and os.getenv("AGENT_WORKERS_ON_STARTUP", "true").lower() == "true":
+        # Workers import every agent module now, not on the first chat
+        background.append(asyncio.create_task(get_worker_pool().start()))
+    yield
+    for task in background:
+        if not task.done():
+            task.cancel()
+    # Flush queued chat turns before the process exits
+    await chat_writer.stop()
+    await shutdown_worker_pool()
+
+app = FastAPI(title="Agent Framework API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# Compress large bodies (chat histories, project documents); small ones are not worth it
+app.add_middleware(GZipMiddleware, minimum_size=int(os.getenv("GZIP_MINIMUM_SIZE", "4096")))
 
 # CORS
 app.add_middleware(
@@ -40,28 +86,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Outermost, so timings include compression and CORS handling
+app.add_middleware(metrics.MetricsMiddleware)
 
-rag_service = RAGService()
-project_generator = ProjectGenerator()
 
 # Teams Bot Setup
-from botbuilder.core import BotFrameworkAdapter, BotFrameworkAdapterSettings
-from botbuilder.schema import Activity
-from teams_bot import TeamsBot
-from fastapi import Request, Response
-import json
-
-BOT_SETTINGS = BotFrameworkAdapterSettings(
-    app_id=os.environ.get("MICROSOFT_APP_ID", ""),
-    app_password=os.environ.get("MICROSOFT_APP_PASSWORD", ""),
-    channel_auth_tenant=os.environ.get("MICROSOFT_APP_TENANT_ID", "")
-)
-
-ADAPTER = BotFrameworkAdapter(BOT_SETTINGS)
-BOT = TeamsBot()
-
 @app.post("/api/messages")
 async def messages(req: Request):
     if "application/json" in req.headers.get("content-type", ""):
@@ -69,12 +101,15 @@ async def messages(req: Request):
     else:
         return Response(status_code=415)
 
+    from botbuilder.schema import Activity
+    adapter, bot = get_teams_adapter()
+
     activity = Activity().deserialize(body)
     
     auth_header = req.headers.get("Authorization", "")
     
     try:
-        response = await ADAPTER.process_activity(activity, auth_header, BOT.on_turn)
+        response = await adapter.process_activity(activity, auth_header, bot.on_turn)
         if response:
             return Response(content=json.dumps(response.body), media_type="application/json", status_code=200)
         return Response(status_code=201)
@@ -88,16 +123,83 @@ async def messages(req: Request):
 LOCAL_REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "local_repository"))
 os.makedirs(LOCAL_REPO_DIR, exist_ok=True)
 
+# List endpoints are keyset-paginated on _id: the response is a page of summary
+# documents and, when more remain, the X-Next-Cursor header holds the last _id
+# to pass back as ?cursor=. Full documents are only served by detail routes.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+PROJECT_SUMMARY_PROJECTION = {
+    "name": 1, "description": 1, "agents": 1, "allow_user_chaining": 1, "created_at": 1,
+    "chain_config.agent_id": 1, "chain_config.name": 1, "chain_config.type": 1,
+}
+USER_SUMMARY_PROJECTION = {"email": 1, "role": 1, "allowed_projects": 1, "is_active": 1, "created_at": 1}
+AGENT_SUMMARY_PROJECTION = {"name": 1, "description": 1, "type": 1, "created_at": 1}
+
+async def paginate(collection, query: dict, projection: dict, limit: int, cursor: Optional[str], response: Response) -> List[dict]:
+    if cursor:
+        if not ObjectId.is_valid(cursor):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = {"$and": [query, {"_id": {"$gt": ObjectId(cursor)}}]} if query else {"_id": {"$gt": ObjectId(cursor)}}
+
+    docs = await collection.find(query, projection).sort("_id", 1).limit(limit + 1).to_list(limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers["X-Next-Cursor"] = str(docs[-1]["_id"])
+    return docs
+
+def page_response(docs: List[dict], response: Response, model_type=None) -> Response:
+    """
+    Serializes a page of projected documents, keeping the cursor header. With
+    `model_type` (the route's response_model) the page is validated through
+    it, so defaults apply and the body matches the OpenAPI schema.
+    """
+    headers = {"X-Next-Cursor": response.headers["X-Next-Cursor"]} if "X-Next-Cursor" in response.headers else None
+    if model_type is not None:
+        return ModelJSONResponse(docs, model_type, headers=headers)
+    return FastJSONResponse(docs, headers=headers)
+
 @app.get("/")
 async def root():
     return {"message": "Agent Framework API is running"}
 
+@app.get("/health/live")
+async def liveness():
+    """Process is up and serving; never touches the database or heavy subsystems."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Ready once heavy subsystems are warm and the database answers a ping."""
+    db_ok = True
+    try:
+        db = await get_database()
+        await asyncio.wait_for(db.command("ping"), timeout=2)
+    except Exception:
+        db_ok = False
+
+    warmup_disabled = os.getenv("WARMUP_ON_STARTUP", "true").lower() != "true"
+    ready = db_ok and (warmup_disabled or is_warm())
+    payload = {
+        "status": "ready" if ready else "starting",
+        "database": "ok" if db_ok else "unreachable",
+        "import_seconds": IMPORT_SECONDS,
+        "warmup": warmup_state,
+        "indexes": index_report,
+    }
+    return Response(
+        content=json.dumps(payload),
+        media_type="application/json",
+        status_code=200 if ready else 503,
+    )
+
 # Auth Routes
 @app.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
+    check_login_admission(form_data.username, request.client.host if request.client else "unknown")
     db = await get_database()
     user = await db.users.find_one({"email": form_data.username})
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    if not user or not await averify_password(form_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -105,8 +207,9 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["email"]}, expires_delta=access_token_expires
+        data=user_claims(user), expires_delta=access_token_expires
     )
+    await stats_service.record_usage("logins")
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/users/me", response_model=User)
@@ -122,20 +225,26 @@ async def create_user(user: UserCreate, current_user: User = Depends(get_admin_u
     
     new_user = User(
         email=user.email,
-        hashed_password=get_password_hash(user.password),
+        hashed_password=await aget_password_hash(user.password),
         role=user.role,
         allowed_projects=user.allowed_projects or [],
         is_active=True
     )
     result = await db.users.insert_one(new_user.dict(by_alias=True, exclude={"id"}))
+    invalidate_user(user.email)
+    await stats_service.increment("total_users")
     created_user = await db.users.find_one({"_id": result.inserted_id})
     return created_user
 
-@app.get("/users", response_model=List[User])
-async def read_users(current_user: User = Depends(get_admin_user)):
+@app.get("/users", response_model=List[UserSummary])
+async def read_users(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_admin_user),
+):
     db = await get_database()
-    users = await db.users.find().to_list(1000)
-    return users
+    return await paginate(db.users, {}, USER_SUMMARY_PROJECTION, limit, cursor, response)
 
 # Projects
 class AnalyzePromptRequest(BaseModel):
@@ -143,7 +252,7 @@ class AnalyzePromptRequest(BaseModel):
 
 @app.post("/projects/analyze-prompt")
 async def analyze_prompt(request: AnalyzePromptRequest, current_user: User = Depends(get_admin_user)):
-    screens = await project_generator.analyze_requirements(request.prompt)
+    screens = await get_project_generator().analyze_requirements(request.prompt)
     return screens
 
 class ProjectCreateFull(BaseModel):
@@ -160,7 +269,7 @@ async def create_project(project: ProjectCreateFull, current_user: User = Depend
     # Generate code for screens
     if project.screens:
         try:
-            generated_code_map = await project_generator.generate_code(project.screens)
+            generated_code_map = await get_project_generator().generate_code(project.screens)
             for screen in project.screens:
                 screen.code_content = generated_code_map.get(screen.name, "")
         except Exception as e:
@@ -174,6 +283,8 @@ async def create_project(project: ProjectCreateFull, current_user: User = Depend
         agents=[] # Agents added via chat now
     )
     result = await db.projects.insert_one(new_project.dict(by_alias=True, exclude={"id"}))
+    project_cache.invalidate(result.inserted_id)
+    await stats_service.increment("total_projects")
     created_project = await db.projects.find_one({"_id": result.inserted_id})
     
     # Create documents folder for project
@@ -182,11 +293,16 @@ async def create_project(project: ProjectCreateFull, current_user: User = Depend
     
     return created_project
 
-@app.get("/projects", response_model=List[Project])
-async def list_projects(current_user: User = Depends(get_current_active_user)):
+@app.get("/projects", response_model=List[ProjectSummary])
+async def list_projects(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+):
     db = await get_database()
     if current_user.role == "admin":
-        projects = await db.projects.find().to_list(1000)
+        query = {}
     else:
         # Filter by allowed_projects
         # Convert string IDs to ObjectIds
@@ -198,23 +314,24 @@ async def list_projects(current_user: User = Depends(get_current_active_user)):
         if not allowed_ids:
              return []
              
-        projects = await db.projects.find({"_id": {"$in": allowed_ids}}).to_list(1000)
-    return projects
+        query = {"_id": {"$in": allowed_ids}}
+    docs = await paginate(db.projects, query, PROJECT_SUMMARY_PROJECTION, limit, cursor, response)
+    return page_response(docs, response, List[ProjectSummary])
 
 @app.get("/projects/{project_id}", response_model=Project)
 async def get_project(project_id: str, current_user: User = Depends(get_current_active_user)):
-    db = await get_database()
     if not ObjectId.is_valid(project_id):
         raise HTTPException(status_code=400, detail="Invalid Project ID")
-    project = await db.projects.find_one({"_id": ObjectId(project_id)})
-    if not project:
+    cached_project = await project_cache.get(project_id)
+    if not cached_project:
         raise HTTPException(status_code=404, detail="Project not found")
         
     # Check permissions
     if current_user.role != "admin" and project_id not in current_user.allowed_projects:
          raise HTTPException(status_code=403, detail="Not authorized to view this project")
          
-    return project
+    # Validated and encoded once per cache entry
+    return ModelJSONResponse(cached_project.json())
 
 class ProjectUpdate(BaseModel):
     agents: Optional[List[str]] = None
@@ -245,72 +362,149 @@ async def update_project(project_id: str, update: ProjectUpdate, current_user: U
         {"$set": update_data}
     )
     
+    project_cache.invalidate(project_id)
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
         
     return {"message": "Project updated successfully"}
 
+REPOSITORY_SUMMARY_PROJECTION = {
+    "name": 1, "size": 1, "sha256": 1, "extension": 1, "page_count": 1,
+    "uploaded_at": 1, "updated_at": 1, "projects": 1, "status": 1, "error": 1,
+}
+
 @app.get("/repositories")
-async def list_repositories(current_user: User = Depends(get_admin_user)):
-    """List all files in the local repository"""
-    files = []
-    if os.path.exists(LOCAL_REPO_DIR):
-        for f in os.listdir(LOCAL_REPO_DIR):
-            if os.path.isfile(os.path.join(LOCAL_REPO_DIR, f)):
-                 files.append(f)
-    return files
+async def list_repositories(
+    response: Response,
+    project_id: Optional[str] = None,
+    status: Optional[str] = None,
+    q: Optional[str] = Query(None, description="File name prefix"),
+    extension: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_admin_user),
+):
+    """Pages through the repository catalog (see repository_catalog), filtered by project, status, name prefix or extension."""
+    if status and status not in repository_catalog.STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(repository_catalog.STATUSES)}")
+    db = await get_database()
+    query = repository_catalog.build_query(project_id, status, q, extension)
+    docs = await paginate(db[repository_catalog.CATALOG_COLLECTION], query, REPOSITORY_SUMMARY_PROJECTION, limit, cursor, response)
+    return page_response(docs, response)
 
 # Ingestion
-@app.post("/projects/{project_id}/ingest")
-async def ingest_document(project_id: str, file: UploadFile = File(...), current_user: User = Depends(get_current_active_user)):
+async def check_ingest_access(project_id: str, current_user: User):
     if not ObjectId.is_valid(project_id):
         raise HTTPException(status_code=400, detail="Invalid Project ID")
 
-    db = await get_database()
-    project = await db.projects.find_one({"_id": ObjectId(project_id)})
-    if not project:
+    cached_project = await project_cache.get(project_id)
+    if not cached_project:
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Check permissions
     is_admin = current_user.role == "admin"
     is_allowed_basic = (
         project_id in current_user.allowed_projects and 
-        project.get("allow_user_chaining", False)
+        cached_project.allow_user_chaining
     )
 
     if not is_admin and not is_allowed_basic:
         raise HTTPException(status_code=403, detail="Not authorized to upload files to this project")
-    
-    # Save to project specific folder
-    project_doc_dir = os.path.join("documents", project_id)
-    os.makedirs(project_doc_dir, exist_ok=True)
-    project_file_path = os.path.join(project_doc_dir, file.filename)
-    
-    # Save to local repository (global) - Parallel save
-    local_repo_path = os.path.join(LOCAL_REPO_DIR, file.filename)
-    
-    # Save temp file first to handle stream
-    suffix = os.path.splitext(file.filename)[1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        tmp_path = tmp.name
-    
+
+async def ingest_blob(project_id: str, filename: str, blob):
+    """Links a stored blob into the project folder and the local repository, then indexes it."""
+    blob_store = get_blob_store()
+    project_file_path = await asyncio.to_thread(blob_store.link, blob, os.path.join("documents", project_id, filename))
+    repository_path = await asyncio.to_thread(blob_store.link_unique, blob, LOCAL_REPO_DIR, filename)
+    repository_name = os.path.basename(repository_path)
+    await repository_catalog.record_upload(repository_name, blob.sha256, blob.size, project_id)
+
     try:
-        # Copy to project dir
-        shutil.copy2(tmp_path, project_file_path)
-        # Copy to local repo
-        shutil.copy2(tmp_path, local_repo_path)
-        
         # We only ingest into RAG for the project (optional: could be dynamic based on chaining)
         # For now, we still ingest into the base RAG service for the project context
-        await rag_service.ingest_file(project_id, tmp_path, file.filename)
+        loaded = await get_rag_service().ingest_file(project_id, project_file_path, filename)
     except Exception as e:
         print(f"ERROR: Ingest failed: {e}")
+        await repository_catalog.record_ingest(repository_name, error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        os.remove(tmp_path)
+    await repository_catalog.record_ingest(repository_name, page_count=loaded if filename.lower().endswith(".pdf") else None)
     
-    return {"message": f"Successfully ingested {file.filename}"}
+    await stats_service.record_usage("ingests", project_id)
+    return {"message": f"Successfully ingested {filename}"}
+
+@app.post("/projects/{project_id}/ingest")
+async def ingest_document(project_id: str, file: UploadFile = File(...), current_user: User = Depends(get_current_active_user)):
+    await check_ingest_access(project_id, current_user)
+
+    if MAX_UPLOAD_BYTES and file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {MAX_UPLOAD_BYTES}-byte upload limit")
+
+    # Streamed once into the blob store (hashed and size-checked on the way);
+    # the project folder and the local repository get hard links to it
+    try:
+        blob = await get_blob_store().put_async(file)
+    except BlobTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return await ingest_blob(project_id, file.filename, blob)
+
+# Resumable uploads: initiate, PUT each chunk (raw body) to .../chunks/{index},
+# GET the session to see which chunks are still missing, then commit.
+class UploadInit(BaseModel):
+    filename: str
+    size: int
+    sha256: Optional[str] = None
+
+def get_upload_session(project_id: str, upload_id: str, current_user: User) -> dict:
+    try:
+        session = get_upload_sessions().get(upload_id)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    if session["project_id"] != project_id or (current_user.role != "admin" and session["owner"] != current_user.email):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+@app.post("/projects/{project_id}/uploads", status_code=201)
+async def initiate_upload(project_id: str, request: UploadInit, current_user: User = Depends(get_current_active_user)):
+    await check_ingest_access(project_id, current_user)
+    sessions = get_upload_sessions()
+    try:
+        session = await asyncio.to_thread(sessions.create, project_id, current_user.email, request.filename, request.size, request.sha256)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return sessions.status(session)
+
+@app.get("/projects/{project_id}/uploads/{upload_id}")
+async def upload_status(project_id: str, upload_id: str, current_user: User = Depends(get_current_active_user)):
+    session = get_upload_session(project_id, upload_id, current_user)
+    return await asyncio.to_thread(get_upload_sessions().status, session)
+
+@app.put("/projects/{project_id}/uploads/{upload_id}/chunks/{index}")
+async def upload_chunk(project_id: str, upload_id: str, index: int, request: Request, current_user: User = Depends(get_current_active_user)):
+    session = get_upload_session(project_id, upload_id, current_user)
+    try:
+        size = await get_upload_sessions().put_chunk(session, index, request.stream())
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return {"index": index, "size": size}
+
+@app.post("/projects/{project_id}/uploads/{upload_id}/commit")
+async def commit_upload(project_id: str, upload_id: str, current_user: User = Depends(get_current_active_user)):
+    await check_ingest_access(project_id, current_user)
+    session = get_upload_session(project_id, upload_id, current_user)
+    sessions = get_upload_sessions()
+    try:
+        blob = await sessions.assemble(session, get_blob_store())
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    # The chunks are no longer needed once the blob is stored, whatever the ingest does
+    await asyncio.to_thread(sessions.discard, upload_id)
+    return await ingest_blob(project_id, session["filename"], blob)
+
+@app.delete("/projects/{project_id}/uploads/{upload_id}", status_code=204)
+async def abort_upload(project_id: str, upload_id: str, current_user: User = Depends(get_current_active_user)):
+    get_upload_session(project_id, upload_id, current_user)
+    await asyncio.to_thread(get_upload_sessions().discard, upload_id)
+    return Response(status_code=204)
 
 # Chat
 # Chat
@@ -346,7 +540,11 @@ async def chat(project_id: str, request: ChatRequest, current_user: User = Depen
          raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/projects/{project_id}/chat")
-async def get_chat_history(project_id: str, current_user: User = Depends(get_current_active_user)):
+async def get_chat_history(
+    project_id: str,
+    last: Optional[int] = Query(None, ge=1, description="Only return the most recent N messages"),
+    current_user: User = Depends(get_current_active_user),
+):
     # Check permissions
     if current_user.role != "admin" and project_id not in current_user.allowed_projects:
          raise HTTPException(status_code=403, detail="Not authorized to access this project chat")
@@ -354,20 +552,23 @@ async def get_chat_history(project_id: str, current_user: User = Depends(get_cur
         raise HTTPException(status_code=400, detail="Invalid Project ID")
     
     db = await get_database()
+    await chat_writer.wait_until_flushed(project_id, current_user.email)
     
     # Find session
+    projection = {"_id": 0, "messages": {"$slice": -last} if last else 1, "current_chain": 1}
     session = await db.chat_sessions.find_one({
         "project_id": project_id,
         "user_email": current_user.email
-    })
+    }, projection)
     
     if not session:
-        return {"messages": [], "chain": []}
+        return FastJSONResponse({"messages": [], "chain": []})
         
-    return {
+    # Histories can hold whole PDF dumps; serialize the stored documents directly
+    return FastJSONResponse({
         "messages": session.get("messages", []),
         "chain": session.get("current_chain", [])
-    }
+    })
 
 # Agents
 @app.post("/agents", response_model=Agent)
@@ -375,7 +576,7 @@ async def create_agent(agent: Agent, current_user: User = Depends(get_admin_user
     db = await get_database()
     
     # Generate Agent Code
-    code = await project_generator.generate_agent_code(agent.name, agent.description, agent.type)
+    code = await get_project_generator().generate_agent_code(agent.name, agent.description, agent.type)
     
     # Save code to file
     agent_id = str(ObjectId())
@@ -386,14 +587,44 @@ async def create_agent(agent: Agent, current_user: User = Depends(get_admin_user
     with open(filepath, "w") as f:
         f.write(code)
     
+    # Check and precompile once here so chats never hit a broken agent
+    validation = await validate_agent(filepath, agent.name, agent.config)
+    if validation["status"] == "failed":
+        print(f"Agent {agent.name} failed validation: {validation['errors']}")
+
     # Save to DB
-    new_agent = agent.dict(by_alias=True, exclude={"id"})
+    new_agent = agent.dict(by_alias=True, exclude={"id", "validation"})
     new_agent["file_path"] = filepath
+    new_agent["validation"] = validation
     
     result = await db.agents.insert_one(new_agent)
+    await stats_service.increment("total_agents")
     created_agent = await db.agents.find_one({"_id": result.inserted_id})
     return created_agent
 
+@app.post("/agents/{agent_id}/validate", response_model=Agent)
+async def revalidate_agent(
+    agent_id: str,
+    smoke: Optional[bool] = Query(None, description="Also run the agent once; defaults to AGENT_SMOKE_RUN"),
+    current_user: User = Depends(get_admin_user),
+):
+    # Re-checks the stored code, e.g. after fixing it or installing a missing module
+    db = await get_database()
+    if not ObjectId.is_valid(agent_id):
+        raise HTTPException(status_code=400, detail="Invalid Agent ID")
+    agent_doc = await db.agents.find_one({"_id": ObjectId(agent_id)})
+    if not agent_doc or not agent_doc.get("file_path"):
+        raise HTTPException(status_code=404, detail="Agent or agent code not found")
+    if not os.path.exists(agent_doc["file_path"]):
+        raise HTTPException(status_code=404, detail="Agent code file is missing")
+
+    kwargs = {} if smoke is None else {"smoke": smoke}
+    validation = await validate_agent(agent_doc["file_path"], agent_doc["name"], agent_doc.get("config"), **kwargs)
+    if validation["status"] == "failed":
+        print(f"Agent {agent_doc['name']} failed validation: {validation['errors']}")
+    await db.agents.update_one({"_id": agent_doc["_id"]}, {"$set": {"validation": validation}})
+    return await db.agents.find_one({"_id": agent_doc["_id"]})
+
 @app.post("/agents/{agent_id}/chat")
 async def chat_agent(agent_id: str, request: ChatRequest):
     db = await get_database()
@@ -403,55 +634,27 @@ async def chat_agent(agent_id: str, request: ChatRequest):
     agent_doc = await db.agents.find_one({"_id": ObjectId(agent_id)})
     if not agent_doc or not agent_doc.get("file_path"):
         raise HTTPException(status_code=404, detail="Agent or agent code not found")
+    validation = agent_doc.get("validation") or {}
+    if validation.get("status") == "failed":
+        raise HTTPException(status_code=422, detail=f"Agent failed validation: {'; '.join(validation.get('errors', []))}")
         
-    # Dynamic Load
-    filepath = agent_doc["file_path"]
-    module_name = f"agents.{agent_id}"
-    
-    spec = importlib.util.spec_from_file_location(module_name, filepath)
-    if not spec or not spec.loader:
-         raise HTTPException(status_code=500, detail="Could not load agent module")
-         
-    module = importlib.util.module_from_spec(spec)
-    sys.modules[module_name] = module
-    spec.loader.exec_module(module)
-    
-    # Instantiate
-    # We expect the class name to be NameAgent, e.g. CalculatorBotAgent
-    # But since we generated it, let's find the class that inherits from BaseAgent
-    from agents.base import BaseAgent
-    import inspect
-    
-    agent_class = None
-    for name, obj in inspect.getmembers(module):
-        if inspect.isclass(obj) and issubclass(obj, BaseAgent) and obj is not BaseAgent:
-            agent_class = obj
-            break
-            
-    if not agent_class:
-         # Fallback: try to find any class
-         for name, obj in inspect.getmembers(module):
-            if inspect.isclass(obj) and obj.__module__ == module.__name__:
-                 agent_class = obj
-                 break
-    
-    if not agent_class:
-        raise HTTPException(status_code=500, detail="Could not find Agent class in generated code")
-        
-    agent_instance = agent_class(name=agent_doc["name"], config=agent_doc.get("config"))
-    
     try:
-        response = agent_instance.run(request.query)
+        response = await run_agent(agent_doc, request.query)
         return {"response": response}
+    except AgentWorkerUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Agent execution failed: {str(e)}")
 
 
-@app.get("/agents", response_model=List[Agent])
-async def list_agents():
+@app.get("/agents", response_model=List[AgentSummary])
+async def list_agents(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
     db = await get_database()
-    agents = await db.agents.find().to_list(1000)
-    return agents
+    return await paginate(db.agents, {}, AGENT_SUMMARY_PROJECTION, limit, cursor, response)
 
 @app.get("/agents/{agent_id}", response_model=Agent)
 async def get_agent(agent_id: str):
@@ -466,22 +669,32 @@ async def get_agent(agent_id: str):
 
 @app.get("/api/stats")
 async def get_stats(current_user: User = Depends(get_admin_user)):
-    db = await get_database()
-    
-    # metrics
-    total_users = await db.users.count_documents({})
-    total_projects = await db.projects.count_documents({})
-    total_agents = await db.agents.count_documents({})
-    
-    # Active projects (projects that have chat sessions)
-    active_projects_ids = await db.chat_sessions.distinct("project_id")
-    active_projects = len(active_projects_ids)
-    
+    # Served from incrementally maintained counters; see stats_service
+    stats = await stats_service.get_stats()
     return {
-        "total_users": total_users,
-        "total_projects": total_projects,
-        "active_projects": active_projects,
-        "total_agents": total_agents,
+        "total_users": stats["total_users"],
+        "total_projects": stats["total_projects"],
+        "active_projects": stats["active_projects"],
+        "total_agents": stats["total_agents"],
+        "total_sessions": stats["total_sessions"],
+        "updated_at": stats["updated_at"],
         "system_status": "healthy"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/metrics/summary")
+async def metrics_summary(current_user: User = Depends(get_admin_user)):
+    """Per-route, per-agent, LLM, embedding and Mongo latency summary for the Access Logs page."""
+    return metrics.summary()
+
+@app.get("/api/stats/usage")
+async def get_usage(hours: int = Query(24, ge=1, le=24 * 31), current_user: User = Depends(get_admin_user)):
+    """Hourly logins, chats and ingests (overall and per project) for the Access Logs page."""
+    return await stats_service.usage_series(hours)
+
+
+IMPORT_SECONDS = round(time.perf_counter() - _IMPORT_STARTED, 3)
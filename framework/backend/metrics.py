@@ -0,0 +1,343 @@
+import time
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Minimal Prometheus-compatible metrics registry. Updates are a dict lookup and
+# a few additions under a lock, cheap enough for every request; /metrics renders
+# the text exposition format and summary() feeds the Access Logs dashboard.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket (non-cumulative) counts, plus +Inf, sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, ([*s[0]], s[1], s[2])) for k, s in self._values.items()]
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict[str, float]]:
+        """Per label set: count, mean and bucket-interpolated p50/p95/p99."""
+        with self._lock:
+            items = [(k, ([*s[0]], s[1], s[2])) for k, s in self._values.items()]
+        result = {}
+        for key, (counts, total, count) in items:
+            result[key] = {
+                "count": count,
+                "mean": total / count if count else 0.0,
+                "p50": self._quantile(counts, count, 0.50),
+                "p95": self._quantile(counts, count, 0.95),
+                "p99": self._quantile(counts, count, 0.99),
+            }
+        return result
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> float:
+        if not count:
+            return 0.0
+        target = q * count
+        cumulative = 0
+        lower = 0.0
+        for bound, c in zip(self.buckets, counts):
+            if cumulative + c >= target:
+                return lower + (bound - lower) * ((target - cumulative) / c if c else 0)
+            cumulative += c
+            lower = bound
+        return self.buckets[-1]
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and "status" in self.histogram.labelnames:
+            self.labels["status"] = "error"
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."))
+
+chain_step_duration_seconds = registry.register(Histogram(
+    "chain_step_duration_seconds", "Duration of one agent step in a chat chain.", ("agent_id", "status")))
+
+llm_call_duration_seconds = registry.register(Histogram(
+    "llm_call_duration_seconds", "LLM call latency.", ("model",)))
+llm_tokens_total = registry.register(Counter(
+    "llm_tokens_total", "LLM tokens consumed.", ("model", "kind")))
+
+embedding_batch_duration_seconds = registry.register(Histogram(
+    "embedding_batch_duration_seconds", "Embedding batch latency.", ("operation",)))
+embedding_texts_total = registry.register(Counter(
+    "embedding_texts_total", "Texts embedded.", ("operation",)))
+
+mongo_operation_duration_seconds = registry.register(Histogram(
+    "mongo_operation_duration_seconds", "MongoDB command latency.", ("command", "status"),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status counts and in-flight requests."""
+
+    def __init__(self, app, skip_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            # The router stores the matched route in the scope; use its template
+            # so label cardinality stays bounded by the number of routes
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_request_duration_seconds.observe(elapsed, method=method, route=route_path)
+            http_requests_total.inc(method=method, route=route_path, status=status_holder["status"])
+
+
+def mongo_command_listener():
+    """pymongo CommandListener feeding mongo_operation_duration_seconds."""
+    from pymongo import monitoring
+
+    class MongoMetricsListener(monitoring.CommandListener):
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            mongo_operation_duration_seconds.observe(event.duration_micros / 1e6, command=event.command_name, status="ok")
+
+        def failed(self, event):
+            mongo_operation_duration_seconds.observe(event.duration_micros / 1e6, command=event.command_name, status="error")
+
+    return MongoMetricsListener()
+
+
+def llm_callback_handler():
+    """LangChain callback recording LLM call latency and token usage."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMMetricsHandler(BaseCallbackHandler):
+        def __init__(self):
+            self._started: Dict[Any, Tuple[float, str]] = {}
+
+        def _start(self, serialized, run_id, kwargs):
+            params = kwargs.get("invocation_params") or {}
+            metadata = kwargs.get("metadata") or {}
+            model = params.get("model") or params.get("model_name") or metadata.get("ls_model_name") or params.get("_type") or "unknown"
+            self._started[run_id] = (time.perf_counter(), model)
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._start(serialized, run_id, kwargs)
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._start(serialized, run_id, kwargs)
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            started, model = self._started.pop(run_id, (None, "unknown"))
+            if started is not None:
+                llm_call_duration_seconds.observe(time.perf_counter() - started, model=model)
+
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            input_tokens = usage.get("prompt_tokens", 0)
+            output_tokens = usage.get("completion_tokens", 0)
+            if not usage:
+                for generations in response.generations:
+                    for generation in generations:
+                        metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                        input_tokens += metadata.get("input_tokens", 0)
+                        output_tokens += metadata.get("output_tokens", 0)
+            if input_tokens:
+                llm_tokens_total.inc(input_tokens, model=model, kind="input")
+            if output_tokens:
+                llm_tokens_total.inc(output_tokens, model=model, kind="output")
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            started, model = self._started.pop(run_id, (None, "unknown"))
+            if started is not None:
+                llm_call_duration_seconds.observe(time.perf_counter() - started, model=model)
+
+    return LLMMetricsHandler()
+
+
+def timed_embeddings(embeddings):
+    """Wraps an Embeddings model so every batch is timed."""
+    from langchain_core.embeddings import Embeddings
+
+    class TimedEmbeddings(Embeddings):
+        def __init__(self, inner):
+            self.inner = inner
+
+        def embed_documents(self, texts):
+            with embedding_batch_duration_seconds.time(operation="documents"):
+                result = self.inner.embed_documents(texts)
+            embedding_texts_total.inc(len(texts), operation="documents")
+            return result
+
+        def embed_query(self, text):
+            with embedding_batch_duration_seconds.time(operation="query"):
+                result = self.inner.embed_query(text)
+            embedding_texts_total.inc(1, operation="query")
+            return result
+
+    return TimedEmbeddings(embeddings)
+
+
+def _labelled(metric, snapshot: Dict[Tuple[str, ...], Any]) -> List[Dict[str, Any]]:
+    return [{**dict(zip(metric.labelnames, key)), **value} for key, value in snapshot.items()]
+
+
+def summary() -> Dict[str, Any]:
+    """JSON view of the registry for the Access Logs dashboard."""
+    errors: Dict[Tuple[str, str], float] = {}
+    totals: Dict[Tuple[str, str], float] = {}
+    for (method, route, status), count in http_requests_total.values().items():
+        totals[(method, route)] = totals.get((method, route), 0) + count
+        if str(status).startswith("5"):
+            errors[(method, route)] = errors.get((method, route), 0) + count
+
+    routes = []
+    for row in _labelled(http_request_duration_seconds, http_request_duration_seconds.snapshot()):
+        key = (row["method"], row["route"])
+        row["error_rate"] = errors.get(key, 0) / totals[key] if totals.get(key) else 0.0
+        routes.append(row)
+
+    tokens = [{**dict(zip(llm_tokens_total.labelnames, k)), "tokens": v} for k, v in llm_tokens_total.values().items()]
+    return {
+        "in_flight": http_requests_in_flight.values().get((), 0),
+        "routes": sorted(routes, key=lambda r: r["count"], reverse=True),
+        "chain_steps": _labelled(chain_step_duration_seconds, chain_step_duration_seconds.snapshot()),
+        "llm_calls": _labelled(llm_call_duration_seconds, llm_call_duration_seconds.snapshot()),
+        "llm_tokens": tokens,
+        "embeddings": _labelled(embedding_batch_duration_seconds, embedding_batch_duration_seconds.snapshot()),
+        "mongo": _labelled(mongo_operation_duration_seconds, mongo_operation_duration_seconds.snapshot()),
+    }
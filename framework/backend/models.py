@@ -62,6 +62,8 @@ class Agent(BaseModel):
     type: str  # e.g., "rag", "code_gen", "general"
     config: Optional[dict] = {}
     file_path: Optional[str] = None
+    # Creation-time check report (see agent_validation.py); absent on older agents
+    validation: Optional[dict] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
@@ -86,6 +88,35 @@ class Project(BaseModel):
     class Config:
         populate_by_name = True
 
+class ChainAgentSummary(BaseModel):
+    agent_id: str
+    name: Optional[str] = None
+    type: Optional[str] = None
+
+class ProjectSummary(BaseModel):
+    """List view of a project: no screen code, only the chain's agent identities."""
+    id: Optional[PyObjectId] = Field(default=None, alias="_id")
+    name: str
+    description: Optional[str] = None
+    agents: Optional[List[str]] = []
+    chain_config: Optional[List[ChainAgentSummary]] = []
+    allow_user_chaining: bool = False
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        populate_by_name = True
+
+class AgentSummary(BaseModel):
+    """List view of an agent: config (which may hold credentials) is omitted."""
+    id: Optional[PyObjectId] = Field(default=None, alias="_id")
+    name: str
+    description: Optional[str] = None
+    type: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        populate_by_name = True
+
 
 class User(BaseModel):
     id: Optional[PyObjectId] = Field(default=None, alias="_id")
@@ -99,6 +130,17 @@ class User(BaseModel):
     class Config:
         populate_by_name = True
 
+class UserSummary(BaseModel):
+    id: Optional[PyObjectId] = Field(default=None, alias="_id")
+    email: str
+    role: str = "user"
+    allowed_projects: List[str] = []
+    is_active: bool = True
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        populate_by_name = True
+
 class UserCreate(BaseModel):
     email: str
     password: str
@@ -0,0 +1,66 @@
+"""
+Import-time profile for the API module.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter and reports
+the slowest modules by cumulative import time. Exits non-zero when the total
+exceeds the budget so startup regressions show up in CI.
+
+Usage:
+    python profile_imports.py [--module main] [--top 25] [--budget-ms 1500]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+
+def profile(module: str):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit(f"Importing {module} failed")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, name = parts
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1500")))
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+    top_level = [r for r in rows if r[2].strip() == args.module]
+    total_ms = (top_level[-1][1] if top_level else sum(r[0] for r in rows)) / 1000
+
+    print(f"{'cumulative ms':>14} {'self ms':>10}  module")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>10.1f}  {name}")
+
+    heavy = sorted({r[2].strip().split(".")[0] for r in rows} & {"langchain", "langchain_community", "langchain_huggingface", "botbuilder", "torch", "transformers", "sentence_transformers"})
+    print(f"\nTotal import time of '{args.module}': {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if heavy:
+        print(f"Heavy packages imported eagerly: {', '.join(heavy)}")
+
+    if total_ms > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import asyncio
+import os
+from typing import FrozenSet, List, Optional
+from bson import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+from database import get_database
+from cache import TTLCache
+from models import ChainAgentConfig, Project
+from responses import model_dumps
+
+# In-process cache of project documents together with their parsed chain
+# configuration and the set of agent ids basic users may run. Entries are
+# invalidated by create_project/update_project and, when the deployment
+# supports change streams, by writes from any process; the TTL bounds
+# staleness when neither applies.
+
+PROJECT_CACHE_TTL_SECONDS = float(os.getenv("PROJECT_CACHE_TTL_SECONDS", "60"))
+PROJECT_CACHE_MAX_ENTRIES = int(os.getenv("PROJECT_CACHE_MAX_ENTRIES", "5000"))
+
+# Server error codes: change streams need a replica set (40573, or
+# IllegalOperation on some versions), and a resume token older than the oplog
+_NO_CHANGE_STREAMS = {20, 40573}
+_CHANGE_STREAM_HISTORY_LOST = 286
+
+
+def _change_streams_unsupported(error: OperationFailure) -> bool:
+    return error.code in _NO_CHANGE_STREAMS or "only supported on replica sets" in str(error)
+
+
+class CachedProject:
+    __slots__ = ("doc", "chain_config", "chain_agent_ids", "allow_user_chaining", "_json")
+
+    def __init__(self, doc: dict):
+        self.doc = doc
+        self.chain_config: List[ChainAgentConfig] = self._parse_chain(doc)
+        self.chain_agent_ids: FrozenSet[str] = frozenset(c.agent_id for c in self.chain_config)
+        self.allow_user_chaining: bool = doc.get("allow_user_chaining", False)
+        self._json: Optional[bytes] = None
+
+    def json(self) -> bytes:
+        """The document as served by GET /projects/{id}: validated through Project, encoded once."""
+        if self._json is None:
+            self._json = model_dumps(Project, self.doc)
+        return self._json
+
+    @staticmethod
+    def _parse_chain(doc: dict) -> List[ChainAgentConfig]:
+        if doc.get("chain_config") and len(doc["chain_config"]) > 0:
+            return [ChainAgentConfig(**c) for c in doc["chain_config"]]
+        if doc.get("agents"):
+            # Legacy support
+            return [ChainAgentConfig(agent_id=str(aid)) for aid in doc["agents"] if ObjectId.is_valid(aid)]
+        return []
+
+
+class ProjectCache:
+    def __init__(self, ttl: float = PROJECT_CACHE_TTL_SECONDS, maxsize: int = PROJECT_CACHE_MAX_ENTRIES):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, project_id: str) -> Optional[CachedProject]:
+        cached = self._cache.get(project_id)
+        if cached is not None:
+            return cached
+
+        if not ObjectId.is_valid(project_id):
+            return None
+        db = await get_database()
+        doc = await db.projects.find_one({"_id": ObjectId(project_id)})
+        if doc is None:
+            return None
+        cached = CachedProject(doc)
+        self._cache.set(project_id, cached)
+        return cached
+
+    def invalidate(self, project_id: str):
+        self._cache.invalidate(str(project_id))
+
+    def clear(self):
+        self._cache.clear()
+
+    async def watch_changes(self, collection=None, retry_delay: float = 1.0, max_retry_delay: float = 60.0):
+        """
+        Invalidates entries on any change to `projects`. Returns only when the
+        deployment has no change streams; any other failure (network blip,
+        primary stepdown) is retried with backoff, resuming after the last
+        event seen so nothing is missed.
+        """
+        if collection is None:
+            collection = (await get_database()).projects
+        resume_token = None
+        delay = retry_delay
+        while True:
+            try:
+                async with collection.watch(resume_after=resume_token) as stream:
+                    delay = retry_delay
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        document_key = change.get("documentKey") or {}
+                        if "_id" in document_key:
+                            self.invalidate(document_key["_id"])
+                        else:
+                            self.clear()
+                # The stream only ends when invalidated (e.g. the collection was dropped); start over
+                resume_token = None
+            except OperationFailure as e:
+                if _change_streams_unsupported(e):
+                    # Standalone servers have no change streams; TTL expiry still applies
+                    print(f"Project change stream unavailable, relying on TTL: {e}")
+                    self.clear()
+                    return
+                if e.code == _CHANGE_STREAM_HISTORY_LOST:
+                    # The resume point fell off the oplog: restart fresh and drop what may have been missed
+                    resume_token = None
+                    self.clear()
+                print(f"Project change stream failed, retrying in {delay:g}s: {e}")
+            except PyMongoError as e:
+                print(f"Project change stream failed, retrying in {delay:g}s: {e}")
+            if resume_token is None:
+                self.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_retry_delay)
+
+
+project_cache = ProjectCache()
@@ -1,13 +1,29 @@
 import os
+import re
 import json
 from typing import List, Dict
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from models import ProjectScreen
+from backends import create_llm
+
+# Descriptions that name network work (HTTP APIs, web pages, mail servers,
+# remote services) get an async agent (arun), so calls to them don't hold a
+# worker thread while waiting. Generic words like "file", "search" or "send"
+# are deliberately absent: agents built on blocking libraries (PyPDF, nltk,
+# local files) are better off as synchronous run() on the agent executor.
+IO_BOUND_PATTERN = re.compile(
+    r"\b(https?|api|apis|url|urls|web|website|webpage\w*|download\w*|upload\w*|scrap\w*|crawl\w*|"
+    r"rest|webhook\w*|e-?mail\w*|smtp|imap|inbox|s3|translat\w*|weather)\b",
+    re.IGNORECASE,
+)
+
+
+def is_io_bound(description: str, agent_type: str = "") -> bool:
+    return bool(IO_BOUND_PATTERN.search(f"{description} {agent_type}"))
 
 class ProjectGenerator:
     def __init__(self):
-        self.llm = ChatGroq(model="llama-3.1-8b-instant", api_key=os.getenv("GROQ_API_KEY"))
+        self.llm = create_llm()
 
     async def analyze_requirements(self, prompt: str) -> List[Dict[str, str]]:
         system_prompt = (
@@ -70,14 +86,28 @@ export default {screen.name.replace(" ", "")};
         return generated_code
 
     async def generate_agent_code(self, name: str, description: str, agent_type: str) -> str:
-        system_prompt = (
-            "You are an expert Python developer. "
-            "Write a Python class that inherits from 'BaseAgent'. "
-            "The class name should be '{class_name}'. "
-            "It must implement the 'run(self, message: str) -> str' method. "
-            "The 'run' method should implement the logic described in the description. "
-            "Return ONLY the python code. No markdown formatting."
-        )
+        use_async = is_io_bound(description, agent_type)
+        if use_async:
+            system_prompt = (
+                "You are an expert Python developer. "
+                "Write a Python class that inherits from 'BaseAgent'. "
+                "The class name should be '{class_name}'. "
+                "It must implement the 'async def arun(self, message: str) -> str' method and must NOT define 'run'. "
+                "The 'arun' method should implement the logic described in the description. "
+                "Use asyncio-native libraries for I/O (for example httpx.AsyncClient). Any blocking call "
+                "(requests, smtplib, imaplib, file reads, PDF parsing, nltk or other CPU-heavy work) must be wrapped "
+                "in 'await asyncio.to_thread(...)'; never call time.sleep or requests directly inside 'arun'. "
+                "Return ONLY the python code. No markdown formatting."
+            )
+        else:
+            system_prompt = (
+                "You are an expert Python developer. "
+                "Write a Python class that inherits from 'BaseAgent'. "
+                "The class name should be '{class_name}'. "
+                "It must implement the 'run(self, message: str) -> str' method. "
+                "The 'run' method should implement the logic described in the description. "
+                "Return ONLY the python code. No markdown formatting."
+            )
         
         class_name = name.replace(" ", "") + "Agent"
         
@@ -114,6 +144,13 @@ export default {screen.name.replace(" ", "")};
             return content
         except Exception as e:
             print(f"Error generating agent code: {e}")
+            if use_async:
+                return f"""from agents.base import BaseAgent
+
+class {class_name}(BaseAgent):
+    async def arun(self, message: str) -> str:
+        return f"Hello, I am {name}. You said: {{message}}"
+"""
             return f"""from agents.base import BaseAgent
 
 class {class_name}(BaseAgent):
@@ -1,10 +1,8 @@
+import asyncio
 import os
 import re
 import importlib.util
 from typing import List, Dict, Any
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_groq import ChatGroq
-from langchain_mongodb import MongoDBAtlasVectorSearch
 from langchain_community.document_loaders import TextLoader, PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.chains import create_retrieval_chain
@@ -14,38 +12,43 @@ from langchain_core.tools import Tool, tool, StructuredTool
 
 
 from langchain.agents import AgentExecutor, create_tool_calling_agent
-from pymongo import MongoClient
-import certifi
+import database
 from database import get_database
+from vector_store import AsyncMongoVectorStore
+from backends import create_llm, create_embeddings, uses_memory_vector_store, create_memory_vector_store
 
 class RAGService:
     def __init__(self):
         # Initialize Embeddings
-        self.embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+        self.embeddings = create_embeddings()
         
         # Initialize LLM
-        api_key = os.getenv("GROQ_API_KEY")
-        # Initialize Vector Store
-        mongo_uri = os.getenv("MONGO_URI")
-        self.client = MongoClient(mongo_uri, tlsCAFile=certifi.where(), tlsAllowInvalidCertificates=True)
-        self.db_name = "agent_framework"
-        # self.embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2") # Duplicated
-        self.llm = ChatGroq(model="llama-3.1-8b-instant", api_key=os.getenv("GROQ_API_KEY"))
+        self.llm = create_llm()
         
         # Ensure index exists
+        self.db_name = "agent_framework"
         self.collection_name = "vectors"
         self.index_name = "vector_index"
-        self.db = self.client["agent_framework"]
-        self.collection = self.db[self.collection_name]
 
-        self.vector_store = MongoDBAtlasVectorSearch(
+        if uses_memory_vector_store():
+            self.vector_store = create_memory_vector_store(self.embeddings)
+            return
+
+        # Initialize Vector Store on the shared Motor client (one pool per process)
+        self.collection = database.client[self.db_name][self.collection_name]
+        self.vector_store = AsyncMongoVectorStore(
             collection=self.collection,
             embedding=self.embeddings,
             index_name=self.index_name,
-            relevance_score_fn="cosine",
         )
 
-    async def ingest_file(self, project_id: str, file_path: str, original_filename: str):
+    async def _search(self, project_id: str, query: str, k: int = 5):
+        return await self.vector_store.asimilarity_search(
+            query, k=k, pre_filter={"project_id": {"$eq": project_id}}
+        )
+
+    async def ingest_file(self, project_id: str, file_path: str, original_filename: str) -> int:
+        """Indexes the file for the project; returns the number of loaded documents (pages, for a PDF)."""
         print(f"--- Ingesting file: {original_filename} for project: {project_id} ---")
         # Load Document
         if file_path.endswith(".txt"):
@@ -55,7 +58,8 @@ class RAGService:
         else:
             raise ValueError("Unsupported file type")
             
-        docs = loader.load()
+        # Parsing a large PDF is CPU and disk bound; keep it off the event loop
+        docs = await asyncio.to_thread(loader.load)
         print(f"Loaded {len(docs)} pages/documents.")
         
         # Add metadata
@@ -71,26 +75,19 @@ class RAGService:
         
         # Store in MongoDB
         if splits:
-            self.vector_store.add_documents(splits)
+            await self.vector_store.aadd_documents(splits)
             print("Successfully added documents to vector store.")
         else:
             print("No splits to add.")
+        return len(docs)
 
     def _get_rag_tool(self, project_id: str):
         """Creates a Tool for querying the knowledge base."""
         
-        def rag_search(query: str):
+        async def rag_search(query: str):
             print(f"DEBUG: RAG Tool called with query: {query}")
-            retriever = self.vector_store.as_retriever(
-                search_type="similarity",
-                search_kwargs={
-                    "k": 5,
-                    "pre_filter": {"project_id": {"$eq": project_id}}
-                }
-            )
-            
             # Simple retrieval for tool use
-            docs = retriever.invoke(query)
+            docs = await self._search(project_id, query)
             context = "\n".join([doc.page_content for doc in docs])
             if not context:
                 return "No relevant information found in the knowledge base."
@@ -98,23 +95,16 @@ class RAGService:
 
         return StructuredTool.from_function(
             name="KnowledgeBase",
-            func=rag_search,
+            coroutine=rag_search,
             description="Useful for answering questions based on the uploaded project documents. Use this whenever you need to look up information from the project's files. Input should be a search query."
         )
 
     def _create_rag_tool_for_agent(self, project_id: str, agent: Dict[str, Any]):
         """Creates a specific RAG tool for a RAG-type agent."""
         
-        def simple_rag_search(query: str):
+        async def simple_rag_search(query: str):
             print(f"DEBUG: {agent['name']} (RAG) called with query: {query}")
-            retriever = self.vector_store.as_retriever(
-                search_type="similarity",
-                search_kwargs={
-                    "k": 5,
-                    "pre_filter": {"project_id": {"$eq": project_id}}
-                }
-            )
-            docs = retriever.invoke(query)
+            docs = await self._search(project_id, query)
             context = "\n".join([doc.page_content for doc in docs])
             if not context:
                 return "No relevant documents found."
@@ -122,7 +112,7 @@ class RAGService:
 
         return StructuredTool.from_function(
             name=agent['name'].replace(" ", ""),
-            func=simple_rag_search,
+            coroutine=simple_rag_search,
             description=f"{agent['description']} Input should be a search query."
         )
 
@@ -0,0 +1,100 @@
+import asyncio
+import math
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token bucket. Each key may burst up to `burst` attempts and then
+    refills at `rate_per_minute`. Keys are kept in a bounded LRU so a flood of
+    distinct usernames or addresses cannot grow memory without limit.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 100000, clock: Callable[[], float] = time.monotonic):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refill(self, key: Hashable, now: float) -> list:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [float(self.burst), now]
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            tokens, updated = bucket
+            bucket[0] = min(float(self.burst), tokens + (now - updated) * self.rate_per_second)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def allow(self, key: Hashable) -> bool:
+        """Consumes one token for `key`; False means the attempt should be shed."""
+        with self._lock:
+            bucket = self._refill(key, self._clock())
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+    def retry_after(self, key: Hashable) -> int:
+        """Seconds until `key` regains a token."""
+        with self._lock:
+            bucket = self._refill(key, self._clock())
+            if bucket[0] >= 1 or not self.rate_per_second:
+                return 0
+            return math.ceil((1 - bucket[0]) / self.rate_per_second)
+
+    async def acquire(self, key: Hashable):
+        """Waits (without blocking the loop) until a token for `key` is available, then consumes it."""
+        while True:
+            with self._lock:
+                bucket = self._refill(key, self._clock())
+                if bucket[0] >= 1:
+                    bucket[0] -= 1
+                    return
+                if not self.rate_per_second:
+                    raise ValueError("Limiter never refills; a token can not be awaited")
+                wait = (1 - bucket[0]) / self.rate_per_second
+            await asyncio.sleep(wait)
+
+    def wait(self, key: Hashable):
+        """Blocking counterpart of acquire() for synchronous callers."""
+        while True:
+            with self._lock:
+                bucket = self._refill(key, self._clock())
+                if bucket[0] >= 1:
+                    bucket[0] -= 1
+                    return
+                if not self.rate_per_second:
+                    raise ValueError("Limiter never refills; a token can not be awaited")
+                wait = (1 - bucket[0]) / self.rate_per_second
+            time.sleep(wait)
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Optional LLM request budget, off unless LLM_REQUESTS_PER_MINUTE is set. When
+# set, every ChatGroq call (RAG chat, the agent executor) and every map-reduce
+# call takes a token from this bucket first. A token bucket lives in one
+# process, so the budget is per process: the API process, each uvicorn worker
+# and each agent worker (smoke-run workers, and retiring workers while their
+# replacements start, included) enforce it independently. To stay under the
+# provider's limit, set it to that limit divided by the number of processes
+# that call the LLM.
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_REQUESTS_BURST = int(os.getenv("LLM_REQUESTS_BURST", "5"))
+
+llm_rate_limiter: Optional[TokenBucketLimiter] = TokenBucketLimiter(
+    rate_per_minute=LLM_REQUESTS_PER_MINUTE, burst=max(1, LLM_REQUESTS_BURST)
+) if LLM_REQUESTS_PER_MINUTE > 0 else None
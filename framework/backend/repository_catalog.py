@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import os
+import re
+from datetime import datetime
+from typing import Optional
+from database import get_database
+
+# Catalog of the files in local_repository, one document per file name, so
+# GET /repositories is a keyset-paginated index scan instead of a directory
+# listing. Entries are written at ingest time: the upload sets size, hash and
+# owning project and marks the file "ingesting"; the RAG ingest then records
+# "ingested" with the page count, or "failed" with the error. Files that were
+# already in the directory are picked up once at startup by backfill().
+
+CATALOG_COLLECTION = "repository_documents"
+STATUSES = ("ingesting", "ingested", "failed", "stored")
+
+
+async def record_upload(name: str, sha256: str, size: int, project_id: Optional[str]):
+    try:
+        db = await get_database()
+        now = datetime.utcnow()
+        update = {
+            "$set": {"sha256": sha256, "size": size, "status": "ingesting", "error": None, "updated_at": now},
+            "$setOnInsert": {"extension": os.path.splitext(name)[1].lower(), "page_count": None, "uploaded_at": now},
+        }
+        if project_id:
+            update["$addToSet"] = {"projects": project_id}
+        else:
+            update["$setOnInsert"]["projects"] = []
+        await db[CATALOG_COLLECTION].update_one({"name": name}, update, upsert=True)
+    except Exception as e:
+        # The catalog must never fail the upload that feeds it
+        print(f"Repository catalog update for {name} failed: {e}")
+
+
+async def record_ingest(name: str, page_count: Optional[int] = None, error: Optional[str] = None):
+    try:
+        db = await get_database()
+        fields = {"status": "failed" if error else "ingested", "error": error, "updated_at": datetime.utcnow()}
+        if page_count is not None:
+            fields["page_count"] = page_count
+        await db[CATALOG_COLLECTION].update_one({"name": name}, {"$set": fields})
+    except Exception as e:
+        print(f"Repository catalog update for {name} failed: {e}")
+
+
+def build_query(project_id: Optional[str] = None, status: Optional[str] = None,
+                q: Optional[str] = None, extension: Optional[str] = None) -> dict:
+    query = {}
+    if project_id:
+        query["projects"] = project_id
+    if status:
+        query["status"] = status
+    if q:
+        # Anchored and case-sensitive, so the name index serves it
+        query["name"] = {"$regex": f"^{re.escape(q)}"}
+    if extension:
+        query["extension"] = extension.lower() if extension.startswith(".") else f".{extension.lower()}"
+    return query
+
+
+def _describe_file(path: str) -> dict:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    page_count = None
+    if path.lower().endswith(".pdf"):
+        try:
+            from pypdf import PdfReader
+            page_count = len(PdfReader(path).pages)
+        except Exception as e:
+            print(f"Could not count pages of {os.path.basename(path)}: {e}")
+    stat = os.stat(path)
+    return {
+        "sha256": digest.hexdigest(),
+        "size": stat.st_size,
+        "page_count": page_count,
+        "uploaded_at": datetime.utcfromtimestamp(stat.st_mtime),
+    }
+
+
+async def backfill(directory: str) -> int:
+    """Adds catalog entries for files in `directory` that have none; returns how many were added."""
+    try:
+        db = await get_database()
+        names = await asyncio.to_thread(
+            lambda: [f for f in os.listdir(directory) if os.path.isfile(os.path.join(directory, f))]
+        ) if os.path.isdir(directory) else []
+        known = set(await db[CATALOG_COLLECTION].distinct("name"))
+        added = 0
+        for name in names:
+            if name in known:
+                continue
+            entry = await asyncio.to_thread(_describe_file, os.path.join(directory, name))
+            entry.update({
+                "name": name,
+                "extension": os.path.splitext(name)[1].lower(),
+                # Owning projects of files that predate the catalog are unknown
+                "projects": [],
+                "status": "stored",
+                "error": None,
+                "updated_at": datetime.utcnow(),
+            })
+            result = await db[CATALOG_COLLECTION].update_one({"name": name}, {"$setOnInsert": entry}, upsert=True)
+            added += 1 if result.upserted_id is not None else 0
+        if added:
+            print(f"Repository catalog: added {added} existing files")
+        return added
+    except Exception as e:
+        print(f"Repository catalog backfill failed: {e}")
+        return 0
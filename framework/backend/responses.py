@@ -0,0 +1,52 @@
+from typing import Any, Dict
+import orjson
+from pydantic import TypeAdapter
+from bson import ObjectId
+from fastapi.responses import Response
+
+
+def _default(obj: Any):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(Response):
+    """
+    orjson-backed JSON response. Mongo documents can be returned as-is: ObjectIds
+    become strings and datetimes are encoded natively, so read paths can skip
+    Pydantic re-validation and jsonable_encoder entirely.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def model_dumps(model_type: Any, content: Any) -> bytes:
+    """
+    Validates content through a response model (applying its defaults and
+    dropping undeclared fields) and encodes it with pydantic-core's JSON
+    serializer, so the payload matches the declared OpenAPI schema.
+    """
+    adapter = _adapters.get(model_type)
+    if adapter is None:
+        adapter = _adapters[model_type] = TypeAdapter(model_type)
+    return adapter.dump_json(adapter.validate_python(content), by_alias=True)
+
+
+class ModelJSONResponse(Response):
+    """JSON response whose body went through `model_dumps` (or is already such bytes)."""
+    media_type = "application/json"
+
+    def __init__(self, content: Any, model_type: Any = None, **kwargs):
+        if model_type is not None:
+            content = model_dumps(model_type, content)
+        super().__init__(content, **kwargs)
@@ -0,0 +1,94 @@
+import os
+import time
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+# Heavy subsystems (langchain, HuggingFace embeddings, botbuilder, the RAG
+# Mongo client) are built on first use instead of at import time, so the API
+# can start answering liveness probes immediately. warm_up() builds them in
+# the background after startup and readiness reports when that is done.
+
+_lock = threading.Lock()
+
+_rag_service = None
+_project_generator = None
+_teams = None
+
+warmup_state: Dict[str, Any] = {
+    "started": False,
+    "finished": False,
+    "components": {},
+}
+
+
+def get_rag_service():
+    global _rag_service
+    if _rag_service is None:
+        with _lock:
+            if _rag_service is None:
+                from rag_service import RAGService
+                _rag_service = RAGService()
+    return _rag_service
+
+
+def get_project_generator():
+    global _project_generator
+    if _project_generator is None:
+        with _lock:
+            if _project_generator is None:
+                from project_generator import ProjectGenerator
+                _project_generator = ProjectGenerator()
+    return _project_generator
+
+
+def get_teams_adapter():
+    """Returns the (adapter, bot) pair for the Bot Framework endpoint."""
+    global _teams
+    if _teams is None:
+        with _lock:
+            if _teams is None:
+                from botbuilder.core import BotFrameworkAdapter, BotFrameworkAdapterSettings
+                from teams_bot import TeamsBot
+
+                settings = BotFrameworkAdapterSettings(
+                    app_id=os.environ.get("MICROSOFT_APP_ID", ""),
+                    app_password=os.environ.get("MICROSOFT_APP_PASSWORD", ""),
+                    channel_auth_tenant=os.environ.get("MICROSOFT_APP_TENANT_ID", "")
+                )
+                _teams = (BotFrameworkAdapter(settings), TeamsBot())
+    return _teams
+
+
+WARMUP_COMPONENTS = {
+    "rag_service": get_rag_service,
+    "project_generator": get_project_generator,
+    "teams_adapter": get_teams_adapter,
+}
+
+# Teams integration is optional; a failed adapter must not keep the pod unready.
+REQUIRED_COMPONENTS = ("rag_service", "project_generator")
+
+
+async def warm_up():
+    """Builds every heavy component in a worker thread, recording per-component timings."""
+    warmup_state["started"] = True
+    for name, factory in WARMUP_COMPONENTS.items():
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(factory)
+            warmup_state["components"][name] = {
+                "status": "ready",
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+        except Exception as e:
+            print(f"Warm-up of {name} failed: {e}")
+            warmup_state["components"][name] = {"status": "failed", "error": str(e)}
+    warmup_state["finished"] = True
+
+
+def is_warm() -> bool:
+    if not warmup_state["finished"]:
+        return False
+    components = warmup_state["components"]
+    return all(components.get(name, {}).get("status") == "ready" for name in REQUIRED_COMPONENTS)
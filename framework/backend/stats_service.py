@@ -0,0 +1,140 @@
+import os
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from pymongo import UpdateOne
+from database import get_database
+
+# Platform statistics are maintained incrementally in a single document instead
+# of being aggregated on every dashboard refresh. Writes made outside the API
+# (register_*.py, create_admin.py) are picked up by the periodic reconciliation.
+
+STATS_COLLECTION = "platform_stats"
+STATS_ID = "platform"
+ACTIVE_PROJECTS_COLLECTION = "stats_active_projects"
+USAGE_COLLECTION = "usage_buckets"
+
+COUNTERS = ("total_users", "total_projects", "total_agents", "total_sessions", "active_projects")
+
+RECONCILE_INTERVAL_SECONDS = int(os.getenv("STATS_RECONCILE_INTERVAL_SECONDS", "900"))
+
+
+def _hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+async def increment(counter: str, amount: int = 1):
+    try:
+        db = await get_database()
+        await db[STATS_COLLECTION].update_one(
+            {"_id": STATS_ID},
+            {"$inc": {counter: amount}, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+    except Exception as e:
+        # Stats must never fail the request that triggered them
+        print(f"Stats update for {counter} failed: {e}")
+
+
+async def mark_project_active(project_id: str):
+    """Counts a project as active the first time it gets a chat session."""
+    try:
+        db = await get_database()
+        result = await db[ACTIVE_PROJECTS_COLLECTION].update_one(
+            {"_id": project_id},
+            {"$setOnInsert": {"first_seen": datetime.utcnow()}},
+            upsert=True,
+        )
+        if result.upserted_id is not None:
+            await increment("active_projects")
+    except Exception as e:
+        print(f"Stats update for active project {project_id} failed: {e}")
+
+
+async def record_usage(event: str, project_id: str = None, amount: int = 1):
+    """Adds to the hourly usage bucket behind the Access Logs time series."""
+    try:
+        db = await get_database()
+        inc = {f"counts.{event}": amount}
+        if project_id:
+            inc[f"projects.{project_id}.{event}"] = amount
+        await db[USAGE_COLLECTION].update_one(
+            {"_id": _hour_bucket(datetime.utcnow())},
+            {"$inc": inc},
+            upsert=True,
+        )
+    except Exception as e:
+        print(f"Usage update for {event} failed: {e}")
+
+
+async def reconcile() -> Dict[str, Any]:
+    """Recomputes every counter from the source collections."""
+    db = await get_database()
+    active_ids = await db.chat_sessions.distinct("project_id")
+    # Drift is corrected as a delta against the values stored before counting,
+    # so increment()s that land after a count are kept rather than overwritten
+    stored = await db[STATS_COLLECTION].find_one({"_id": STATS_ID}) or {}
+    counters = {
+        "total_users": await db.users.count_documents({}),
+        "total_projects": await db.projects.count_documents({}),
+        "total_agents": await db.agents.count_documents({}),
+        "total_sessions": await db.chat_sessions.count_documents({}),
+        "active_projects": len(active_ids),
+    }
+
+    # One round trip for the whole active set, then drop projects with no sessions left
+    active = db[ACTIVE_PROJECTS_COLLECTION]
+    if active_ids:
+        now = datetime.utcnow()
+        await active.bulk_write(
+            [UpdateOne({"_id": pid}, {"$setOnInsert": {"first_seen": now}}, upsert=True) for pid in active_ids],
+            ordered=False,
+        )
+    await active.delete_many({"_id": {"$nin": active_ids}})
+
+    drift = {name: value - stored.get(name, 0) for name, value in counters.items() if value != stored.get(name, 0)}
+    update = {"$set": {"updated_at": datetime.utcnow(), "reconciled_at": datetime.utcnow()}}
+    if drift:
+        update["$inc"] = drift
+    await db[STATS_COLLECTION].update_one({"_id": STATS_ID}, update, upsert=True)
+    return counters
+
+
+async def get_stats() -> Dict[str, Any]:
+    db = await get_database()
+    doc = await db[STATS_COLLECTION].find_one({"_id": STATS_ID})
+    if not doc or "reconciled_at" not in doc:
+        await reconcile()
+        doc = await db[STATS_COLLECTION].find_one({"_id": STATS_ID})
+    stats = {name: doc.get(name, 0) for name in COUNTERS}
+    stats["updated_at"] = doc.get("updated_at")
+    return stats
+
+
+async def usage_series(hours: int = 24) -> List[Dict[str, Any]]:
+    """Hourly buckets for the last `hours` hours, oldest first, with empty hours filled in."""
+    db = await get_database()
+    end = _hour_bucket(datetime.utcnow())
+    start = end - timedelta(hours=hours - 1)
+    docs = await db[USAGE_COLLECTION].find({"_id": {"$gte": start, "$lte": end}}).to_list(hours)
+    by_bucket = {d["_id"]: d for d in docs}
+
+    series = []
+    for i in range(hours):
+        bucket = start + timedelta(hours=i)
+        doc = by_bucket.get(bucket, {})
+        series.append({
+            "bucket": bucket,
+            "counts": doc.get("counts", {}),
+            "projects": doc.get("projects", {}),
+        })
+    return series
+
+
+async def reconciliation_loop(interval: int = RECONCILE_INTERVAL_SECONDS):
+    while True:
+        try:
+            await reconcile()
+        except Exception as e:
+            print(f"Stats reconciliation failed: {e}")
+        await asyncio.sleep(interval)
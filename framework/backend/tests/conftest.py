@@ -5,10 +5,11 @@ from unittest.mock import MagicMock
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
-from auth import get_password_hash, verify_password
+from auth import get_password_hash, verify_password, user_cache, login_ip_limiter, login_account_limiter
 from motor.motor_asyncio import AsyncIOMotorClient
 import certifi
 import database # Import the module to patch it
+from project_cache import project_cache
 
 # Fix for Windows Event Loop
 if sys.platform == 'win32':
@@ -38,6 +39,10 @@ async def db():
     # Patch the global variables in database module
     database.client = client
     database.db = test_db
+    user_cache.clear()
+    project_cache.clear()
+    login_ip_limiter.reset()
+    login_account_limiter.reset()
     
     yield test_db
     
@@ -0,0 +1,225 @@
+"""
+In-process IMAP4rev1 stand-in for the email agent tests.
+
+Implements just the commands EmailDownloaderAgent issues (LOGIN, SELECT, NOOP,
+UID SEARCH, UID FETCH with RFC822 / BODYSTRUCTURE / partial BODY sections,
+CLOSE, LOGOUT) against an in-memory mailbox and records connections and fetch
+items so tests can assert on protocol behaviour.
+"""
+import re
+import socketserver
+import threading
+from datetime import date, datetime
+from email import message_from_bytes
+from email.message import Message
+
+
+class FakeMailbox:
+    def __init__(self, uidvalidity: int = 1):
+        self.uidvalidity = uidvalidity
+        self.messages = []  # (uid, raw bytes, date)
+        self.next_uid = 1
+        self.logins = 0
+        self.fetches = []  # (uid, item) for every fetched item
+
+    def add(self, raw: bytes, received: date = None) -> int:
+        uid = self.next_uid
+        self.next_uid += 1
+        self.messages.append((uid, raw, received or date.today()))
+        return uid
+
+    def reset_uids(self, uidvalidity: int):
+        """Simulates the server renumbering the mailbox."""
+        self.uidvalidity = uidvalidity
+        renumbered = []
+        self.next_uid = 1
+        for _, raw, received in self.messages:
+            renumbered.append((self.next_uid, raw, received))
+            self.next_uid += 1
+        self.messages = renumbered
+
+
+def _quote(value) -> str:
+    if value is None:
+        return "NIL"
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _param_list(params) -> str:
+    if not params:
+        return "NIL"
+    return "(" + " ".join(f"{_quote(k)} {_quote(v)}" for k, v in params) + ")"
+
+
+def _encoded_payload(part: Message) -> bytes:
+    return part.get_payload(decode=False).encode("ascii", "surrogateescape")
+
+
+def _bodystructure(part: Message) -> str:
+    if part.is_multipart():
+        children = "".join(_bodystructure(p) for p in part.get_payload())
+        return f"({children} {_quote(part.get_content_subtype().upper())})"
+
+    body = _encoded_payload(part)
+    fields = [
+        _quote(part.get_content_maintype().upper()),
+        _quote(part.get_content_subtype().upper()),
+        _param_list(part.get_params()[1:] if part.get_params() else None),
+        "NIL",
+        "NIL",
+        _quote(part.get("Content-Transfer-Encoding", "7bit").upper()),
+        str(len(body)),
+    ]
+    if part.get_content_maintype() == "text":
+        fields.append(str(body.count(b"\n")))
+    disposition = part.get_content_disposition()
+    if disposition:
+        disposition_params = part.get_params(header="content-disposition")[1:]
+        fields += ["NIL", f"({_quote(disposition.upper())} {_param_list(disposition_params)})"]
+    return "(" + " ".join(fields) + ")"
+
+
+def _section_bytes(msg: Message, section: str) -> bytes:
+    node = msg
+    for index in section.split("."):
+        if node.is_multipart():
+            node = node.get_payload()[int(index) - 1]
+    return _encoded_payload(node)
+
+
+def _parse_uid_set(spec: str, max_uid: int):
+    uids = set()
+    for part in spec.split(","):
+        if ":" in part:
+            start, end = part.split(":")
+            start = max_uid if start == "*" else int(start)
+            end = max_uid if end == "*" else int(end)
+            uids.update(range(min(start, end), max(start, end) + 1))
+        else:
+            uids.add(max_uid if part == "*" else int(part))
+    return uids
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def send(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.wfile.write(data)
+
+    def handle(self):
+        mailbox: FakeMailbox = self.server.mailbox
+        self.send("* OK [CAPABILITY IMAP4rev1] stand-in ready\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            parts = line.decode("utf-8").rstrip("\r\n").split(" ", 2)
+            tag, command = parts[0], parts[1].upper()
+            args = parts[2] if len(parts) > 2 else ""
+
+            if command == "CAPABILITY":
+                self.send(f"* CAPABILITY IMAP4rev1\r\n{tag} OK CAPABILITY completed\r\n")
+            elif command == "LOGIN":
+                mailbox.logins += 1
+                self.send(f"{tag} OK LOGIN completed\r\n")
+            elif command in ("SELECT", "EXAMINE"):
+                self.send(
+                    f"* {len(mailbox.messages)} EXISTS\r\n"
+                    f"* OK [UIDVALIDITY {mailbox.uidvalidity}] UIDs valid\r\n"
+                    f"* OK [UIDNEXT {mailbox.next_uid}] Predicted next UID\r\n"
+                    f"{tag} OK [READ-WRITE] {command} completed\r\n"
+                )
+            elif command == "NOOP":
+                self.send(f"{tag} OK NOOP completed\r\n")
+            elif command == "UID":
+                sub, _, rest = args.partition(" ")
+                if sub.upper() == "SEARCH":
+                    self.uid_search(tag, rest, mailbox)
+                elif sub.upper() == "FETCH":
+                    self.uid_fetch(tag, rest, mailbox)
+                else:
+                    self.send(f"{tag} BAD unsupported UID command\r\n")
+            elif command == "CLOSE":
+                self.send(f"{tag} OK CLOSE completed\r\n")
+            elif command == "LOGOUT":
+                self.send(f"* BYE logging out\r\n{tag} OK LOGOUT completed\r\n")
+                return
+            else:
+                self.send(f"{tag} BAD unsupported command\r\n")
+
+    def uid_search(self, tag, criteria, mailbox):
+        criteria = criteria.strip().strip("()")
+        max_uid = mailbox.messages[-1][0] if mailbox.messages else 0
+        matches = []
+        since = re.search(r'SINCE "?(\d{1,2}-\w{3}-\d{4})"?', criteria, re.I)
+        uid_range = re.search(r"UID (\S+)", criteria, re.I)
+        for uid, _, received in mailbox.messages:
+            if since and received < datetime.strptime(since.group(1), "%d-%b-%Y").date():
+                continue
+            if uid_range and uid not in _parse_uid_set(uid_range.group(1), max_uid):
+                continue
+            matches.append(str(uid))
+        self.send(f"* SEARCH {' '.join(matches)}\r\n{tag} OK SEARCH completed\r\n")
+
+    def uid_fetch(self, tag, args, mailbox):
+        uid_spec, _, items = args.partition(" ")
+        max_uid = mailbox.messages[-1][0] if mailbox.messages else 0
+        wanted = _parse_uid_set(uid_spec, max_uid)
+        for seq, (uid, raw, _) in enumerate(mailbox.messages, start=1):
+            if uid not in wanted:
+                continue
+            self.send(f"* {seq} FETCH (UID {uid}")
+            for item in re.findall(r"RFC822|BODY(?:\.PEEK)?\[[^\]]*\](?:<\d+\.\d+>)?|BODYSTRUCTURE", items, re.I):
+                mailbox.fetches.append((uid, item.upper()))
+                name, data, literal = self.server.render_item(item, raw)
+                if literal:
+                    self.send(f" {name} {{{len(data)}}}\r\n".encode("utf-8") + data)
+                else:
+                    self.send(f" {name} {data}")
+            self.send(")\r\n")
+        self.send(f"{tag} OK FETCH completed\r\n")
+
+
+class IMAPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, mailbox: FakeMailbox):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.mailbox = mailbox
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def render_item(self, item: str, raw: bytes):
+        """Returns (response name, data, whether data is sent as a literal)."""
+        item = item.upper()
+        if item == "RFC822":
+            return "RFC822", raw, True
+        msg = message_from_bytes(raw)
+        if item == "BODYSTRUCTURE":
+            return "BODYSTRUCTURE", _bodystructure(msg), False
+
+        match = re.match(r"BODY(?:\.PEEK)?\[([^\]]*)\](?:<(\d+)\.(\d+)>)?", item)
+        section, offset, length = match.groups()
+        if section.startswith("HEADER.FIELDS"):
+            fields = re.search(r"\((.*)\)", section).group(1).split()
+            lines = "".join(f"{f.title()}: {msg[f]}\r\n" for f in fields if msg[f] is not None)
+            return f"BODY[{section}]", (lines + "\r\n").encode("utf-8"), True
+
+        data = _section_bytes(msg, section)
+        if offset is None:
+            return f"BODY[{section}]", data, True
+        offset, length = int(offset), int(length)
+        return f"BODY[{section}]<{offset}>", data[offset:offset + length], True
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
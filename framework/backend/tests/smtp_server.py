@@ -0,0 +1,104 @@
+"""
+In-process SMTP stand-in for the email sender tests.
+
+Speaks enough ESMTP for smtplib (EHLO, AUTH PLAIN, MAIL, RCPT, DATA, RSET,
+NOOP, QUIT) and records connections, logins and delivered messages. Recipients
+containing "reject" are refused with 550 so per-recipient results can be
+exercised; drop_connections() closes every open session from the server side.
+"""
+import socketserver
+import threading
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def send(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode("utf-8"))
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            server.open_sockets.append(self.connection)
+        self.send("220 stand-in ESMTP ready")
+        sender, recipients = None, []
+        while True:
+            try:
+                line = self.rfile.readline()
+            except OSError:
+                return
+            if not line:
+                return
+            command = line.decode("utf-8").rstrip("\r\n")
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-stand-in\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n")
+            elif verb == "AUTH":
+                with server.lock:
+                    server.logins += 1
+                self.send("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                sender, recipients = command.split(":", 1)[1].strip(" <>"), []
+                self.send("250 OK")
+            elif verb == "RCPT":
+                recipient = command.split(":", 1)[1].strip(" <>")
+                if "reject" in recipient:
+                    self.send("550 5.1.1 No such user")
+                else:
+                    recipients.append(recipient)
+                    self.send("250 OK")
+            elif verb == "DATA":
+                self.send("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b".\r\n", b".\n", b""):
+                        break
+                    data.append(data_line)
+                with server.lock:
+                    server.messages.append((sender, recipients, b"".join(data)))
+                self.send("250 OK queued")
+            elif verb == "RSET":
+                sender, recipients = None, []
+                self.send("250 OK")
+            elif verb == "NOOP":
+                self.send("250 OK")
+            elif verb == "QUIT":
+                self.send("221 Bye")
+                return
+            else:
+                self.send("502 Command not implemented")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.logins = 0
+        self.messages = []
+        self.open_sockets = []
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def drop_connections(self):
+        with self.lock:
+            sockets, self.open_sockets = self.open_sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(2)
+            except OSError:
+                pass
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,71 @@
+import os
+import pytest
+from agent_validation import check_source, validate_agent
+
+GOOD = '''
+from agents.base import BaseAgent
+
+class WordCountAgent(BaseAgent):
+    def run(self, message: str) -> str:
+        return str(len(message.split()))
+'''
+
+# The SkillsFinderAgent failure modes: nltk used without import, __init__ without name/config
+BROKEN = '''
+from agents.base import BaseAgent
+
+class SkillsFinderAgent(BaseAgent):
+    def __init__(self):
+        self.stopwords = set()
+
+    def run(self, message: str) -> str:
+        return " ".join(nltk.word_tokenize(message))
+'''
+
+
+def test_good_agent_passes_static_checks():
+    report = check_source(GOOD, "WordCountAgent")
+    assert report["errors"] == []
+    assert report["class_name"] == "WordCountAgent"
+
+
+def test_missing_import_and_bad_init_are_reported():
+    errors = check_source(BROKEN, "SkillsFinderAgent")["errors"]
+    assert any("'nltk' is used but never imported" in e for e in errors)
+    assert any("does not accept the 'name' keyword" in e for e in errors)
+    assert any("does not accept the 'config' keyword" in e for e in errors)
+
+
+def test_uninstalled_module_syntax_and_missing_run():
+    assert "module 'surely_not_installed_pkg' is not installed" in check_source(
+        "import surely_not_installed_pkg\n" + GOOD, "WordCountAgent")["errors"][0]
+    optional = "try:\n    import surely_not_installed_pkg\nexcept ImportError:\n    surely_not_installed_pkg = None\n"
+    assert check_source(optional + GOOD, "WordCountAgent")["errors"] == []
+    assert check_source("def broken(:\n", "XAgent")["errors"][0].startswith("Syntax error on line 1")
+    no_run = "from agents.base import BaseAgent\nclass XAgent(BaseAgent):\n    pass\n"
+    assert "implements neither run" in check_source(no_run, "XAgent")["errors"][0]
+
+
+@pytest.mark.asyncio
+async def test_validate_precompiles_and_smoke_runs(tmp_path):
+    path = tmp_path / "wordcount.py"
+    path.write_text(GOOD, encoding="utf-8")
+    report = await validate_agent(str(path), "Word Count", {}, smoke=True)
+    assert report["status"] == "passed"
+    assert os.path.exists(report["bytecode"])
+    assert report["smoke"]["ok"] and report["smoke"]["output_preview"] == "1"
+
+    crashing = tmp_path / "crashing.py"
+    crashing.write_text(GOOD.replace("return str(len(message.split()))", "raise RuntimeError('boom')"), encoding="utf-8")
+    report = await validate_agent(str(crashing), "Word Count", {}, smoke=True)
+    # Could be an outage rather than bad code, so it only warns
+    assert report["status"] == "passed"
+    assert report["errors"] == [] and "boom" in report["warnings"][0]
+
+
+@pytest.mark.asyncio
+async def test_smoke_run_is_off_by_default(tmp_path):
+    path = tmp_path / "wordcount.py"
+    path.write_text(GOOD, encoding="utf-8")
+    report = await validate_agent(str(path), "Word Count", {})
+    assert report["status"] == "passed" and report["smoke"] is None
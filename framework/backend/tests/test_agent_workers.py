@@ -0,0 +1,149 @@
+import asyncio
+import os
+import textwrap
+import time
+import pytest
+from agent_workers import AgentWorkerError, AgentWorkerPool, AgentWorkerUnavailable, agent_files
+
+AGENT_CODE = '''
+import os
+import asyncio
+import time
+from agents.base import BaseAgent
+
+RUNS = []
+
+class EchoAgent(BaseAgent):
+    def run(self, message: str) -> str:
+        if message == "crash":
+            os._exit(1)
+        if message == "hang":
+            time.sleep(30)
+        if message.startswith("sleep"):
+            time.sleep(float(message[5:]))
+        RUNS.append(message)
+        return f"{os.getpid()}:{len(RUNS)}:{message}"
+
+class AsyncEchoAgent(BaseAgent):
+    async def arun(self, message: str) -> str:
+        await asyncio.sleep(float(message) if message.replace(".", "").isdigit() else 0)
+        return f"async:{message}"
+'''
+
+
+@pytest.fixture
+def agent_file(tmp_path):
+    path = tmp_path / "echo_agent.py"
+    path.write_text(textwrap.dedent(AGENT_CODE), encoding="utf-8")
+    (tmp_path / "helper.py").write_text("VALUE = 1\n", encoding="utf-8")
+    return str(path)
+
+
+def test_only_agent_modules_are_preloaded(agent_file):
+    assert agent_files(os.path.dirname(agent_file)) == [os.path.abspath(agent_file)]
+
+
+@pytest.mark.asyncio
+async def test_runs_in_warm_worker_and_recycles(agent_file):
+    pool = AgentWorkerPool(size=1, max_runs=2, preload=[agent_file])
+    try:
+        first = await pool.run(agent_file, "Echo", {}, "a")
+        second = await pool.run(agent_file, "Echo", {}, "b")
+        pid, runs, _ = first.split(":")
+        assert int(pid) != os.getpid()
+        # Same process, module state kept between runs
+        assert second == f"{pid}:2:b"
+        assert runs == "1"
+
+        third = await pool.run(agent_file, "Echo", {}, "c")
+        assert third.split(":")[0] != pid
+        assert pool.stats["recycled"] == 1
+
+        assert await pool.run(agent_file, "AsyncEcho", {}, "x") == "async:x"
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_crash_and_timeout_replace_worker(agent_file):
+    pool = AgentWorkerPool(size=1, preload=[agent_file])
+    try:
+        with pytest.raises(AgentWorkerError):
+            await pool.run(agent_file, "Echo", {}, "crash")
+        with pytest.raises(TimeoutError):
+            await pool.run(agent_file, "Echo", {}, "hang", timeout=1)
+        assert (await pool.run(agent_file, "Echo", {}, "ok")).endswith(":1:ok")
+        assert pool.stats["crashed"] == 1 and pool.stats["timed_out"] == 1
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_one_worker_serves_concurrent_runs(agent_file):
+    pool = AgentWorkerPool(size=1, preload=[agent_file])
+    try:
+        await pool.start()
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(pool.run(agent_file, "AsyncEcho", {}, "0.5") for _ in range(8)),
+            *(pool.run(agent_file, "Echo", {}, "sleep0.5") for _ in range(4)),
+        )
+        assert time.monotonic() - started < 2
+        assert results[:8] == ["async:0.5"] * 8
+        assert len({r.split(":")[0] for r in results[8:]}) == 1
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timeout_leaves_other_runs_on_the_worker_alone(agent_file):
+    pool = AgentWorkerPool(size=1, preload=[agent_file])
+    try:
+        slow = asyncio.ensure_future(pool.run(agent_file, "AsyncEcho", {}, "1.5"))
+        await asyncio.sleep(0.2)
+        with pytest.raises(TimeoutError):
+            await pool.run(agent_file, "Echo", {}, "hang", timeout=0.5)
+        assert await slow == "async:1.5"
+        assert await pool.run(agent_file, "AsyncEcho", {}, "x") == "async:x"
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_failed_respawn_is_retried(agent_file, monkeypatch):
+    import agent_workers
+    pool = AgentWorkerPool(size=1, max_runs=1, preload=[agent_file])
+    pool.spawn_retry_delay = 0.05
+    real_worker = agent_workers._Worker
+    failures = []
+
+    def flaky_worker(*args):
+        if len(failures) < 2:
+            failures.append(1)
+            raise OSError("too many open files")
+        return real_worker(*args)
+
+    try:
+        await pool.start()
+        monkeypatch.setattr(agent_workers, "_Worker", flaky_worker)
+        await pool.run(agent_file, "Echo", {}, "a")
+        assert (await pool.run(agent_file, "Echo", {}, "b")).endswith(":1:b")
+        assert pool.stats["spawn_failures"] == 2
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_waiting_for_a_worker_counts_against_the_timeout(agent_file):
+    pool = AgentWorkerPool(size=1, preload=[agent_file], concurrency=1)
+    try:
+        busy = asyncio.ensure_future(pool.run(agent_file, "AsyncEcho", {}, "1.5"))
+        await asyncio.sleep(0.2)
+        started = time.monotonic()
+        with pytest.raises(AgentWorkerUnavailable):
+            await pool.run(agent_file, "AsyncEcho", {}, "x", timeout=0.5)
+        assert time.monotonic() - started < 1
+        assert pool.stats["unavailable"] == 1
+        assert await busy == "async:1.5"
+    finally:
+        await pool.shutdown()
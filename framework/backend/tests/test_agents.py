@@ -25,3 +25,17 @@ async def test_param_validation(client_app: AsyncClient, admin_token: str):
     }
     response = await client_app.post("/agents", json=agent_data, headers=headers)
     assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_revalidate_agent(client_app: AsyncClient, admin_token: str):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    agent_data = {"name": "Revalidated Agent", "description": "Counts words", "type": "custom", "config": {}}
+    created = (await client_app.post("/agents", json=agent_data, headers=headers)).json()
+    first_check = created["validation"]["checked_at"]
+
+    response = await client_app.post(f"/agents/{created['_id']}/validate", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["validation"]["checked_at"] != first_check
+
+    missing = await client_app.post("/agents/000000000000000000000000/validate", headers=headers)
+    assert missing.status_code == 404
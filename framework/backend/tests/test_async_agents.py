@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import time
+import pytest
+from agents.base import BaseAgent, has_native_arun, invoke_agent
+from project_generator import is_io_bound
+
+
+class SyncAgent(BaseAgent):
+    def run(self, message: str) -> str:
+        return f"{threading.current_thread().name}:{message}"
+
+
+class AsyncAgent(BaseAgent):
+    async def arun(self, message: str) -> str:
+        await asyncio.sleep(0.05)
+        return message.upper()
+
+
+class EmptyAgent(BaseAgent):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_sync_agent_runs_on_agent_executor():
+    assert not has_native_arun(SyncAgent())
+    result = await invoke_agent(SyncAgent(), "hi")
+    assert result.startswith("agent-sync") and result.endswith(":hi")
+    assert (await SyncAgent().arun("hi")).startswith("agent-sync")
+
+
+@pytest.mark.asyncio
+async def test_async_agents_share_one_loop():
+    agents = [AsyncAgent() for _ in range(200)]
+    started = time.perf_counter()
+    results = await asyncio.gather(*(invoke_agent(a, f"m{i}") for i, a in enumerate(agents)))
+    # 200 calls of 50ms each finish in roughly one call's time, not 10s
+    assert time.perf_counter() - started < 2
+    assert results[:2] == ["M0", "M1"]
+
+
+def test_async_agent_still_offers_sync_run():
+    assert has_native_arun(AsyncAgent())
+    assert AsyncAgent().run("ok") == "OK"
+    with pytest.raises(NotImplementedError):
+        EmptyAgent().run("x")
+
+
+def test_io_bound_descriptions_get_async_agents():
+    assert is_io_bound("Fetch the latest prices from a REST API")
+    assert is_io_bound("Send an email summary to the team")
+    assert not is_io_bound("Add two numbers and return the sum", "calculator")
+    # Local, blocking work stays synchronous
+    assert not is_io_bound("Read PDF files and extract keywords with nltk")
+    assert not is_io_bound("Search the document and send back a summary")
@@ -0,0 +1,71 @@
+import time
+from agents.attachment_text import ExtractionPool, extract_text
+
+
+def slow_extract(filepath: str, filename: str) -> str:
+    # The file content is the number of seconds to "parse" it for
+    with open(filepath, "r", encoding="utf-8") as f:
+        delay = float(f.read())
+    time.sleep(delay)
+    return f"[{filename}]"
+
+
+def write(tmp_path, name: str, content: str) -> str:
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+def test_results_keep_submission_order(tmp_path):
+    pool = ExtractionPool(workers=3, extractor=slow_extract)
+    try:
+        pending = [(name, pool.submit(write(tmp_path, name, delay), name)) for name, delay in [("a", "0.4"), ("b", "0"), ("c", "0.1")]]
+        assert pool.collect(pending, timeout=5) == ["[a]", "[b]", "[c]"]
+    finally:
+        pool.close()
+
+
+def test_stuck_file_times_out_without_blocking_others(tmp_path):
+    pool = ExtractionPool(workers=2, extractor=slow_extract)
+    try:
+        pending = [
+            ("stuck.pdf", pool.submit(write(tmp_path, "stuck.pdf", "30"), "stuck.pdf")),
+            ("ok.txt", pool.submit(write(tmp_path, "ok.txt", "0"), "ok.txt")),
+        ]
+        started = time.monotonic()
+        results = pool.collect(pending, timeout=0.5)
+        assert time.monotonic() - started < 5
+        assert "stuck.pdf: extraction timed out" in results[0]
+        assert results[1] == "[ok.txt]"
+
+        # The stuck worker was terminated; a fresh pool serves the next run
+        retry = [("b", pool.submit(write(tmp_path, "b", "0"), "b"))]
+        assert pool.collect(retry, timeout=5) == ["[b]"]
+    finally:
+        pool.close()
+
+
+def test_timeout_does_not_kill_other_runs_extractions(tmp_path):
+    pool = ExtractionPool(workers=2, extractor=slow_extract)
+    try:
+        stuck = [("stuck.pdf", pool.submit(write(tmp_path, "stuck.pdf", "30"), "stuck.pdf"))]
+        # A concurrent run's slower file, sharing the same workers
+        other = [("slow.txt", pool.submit(write(tmp_path, "slow.txt", "1"), "slow.txt"))]
+
+        assert "timed out" in pool.collect(stuck, timeout=0.3)[0]
+        assert pool.collect(other, timeout=5) == ["[slow.txt]"]
+
+        retired = stuck[0][1][0]
+        deadline = time.monotonic() + 5
+        while pool._retired and time.monotonic() < deadline:
+            time.sleep(0.05)
+        # Terminated once the other run's file was done, not before
+        assert not pool._retired
+        assert retired.pool._state != "RUN"
+    finally:
+        pool.close()
+
+
+def test_extract_text_formats(tmp_path):
+    assert extract_text(write(tmp_path, "notes.txt", "hello"), "notes.txt") == "\n\n--- Content of notes.txt ---\nhello"
+    assert "Error reading broken.pdf" in extract_text(write(tmp_path, "broken.pdf", "not a pdf"), "broken.pdf")
@@ -39,3 +39,28 @@ async def test_login_success(client_app: AsyncClient, db):
 async def test_login_failure(client_app: AsyncClient):
     response = await client_app.post("/token", data={"username": "wrong@test.com", "password": "wrongpassword"})
     assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_login_attempts_are_rate_limited(client_app: AsyncClient):
+    from auth import login_account_limiter
+    for _ in range(login_account_limiter.burst):
+        response = await client_app.post("/token", data={"username": "flood@test.com", "password": "x"})
+        assert response.status_code == 401
+    response = await client_app.post("/token", data={"username": "flood@test.com", "password": "x"})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+def test_account_limit_is_per_client_ip(monkeypatch):
+    import auth
+    from fastapi import HTTPException
+    from rate_limit import TokenBucketLimiter
+    monkeypatch.setattr(auth, "login_ip_limiter", TokenBucketLimiter(rate_per_minute=0, burst=100))
+    monkeypatch.setattr(auth, "login_account_limiter", TokenBucketLimiter(rate_per_minute=0, burst=2))
+    # An attacker exhausts the account's budget from their address...
+    auth.check_login_admission("Owner@test.com", "203.0.113.9")
+    auth.check_login_admission("owner@test.com", "203.0.113.9")
+    with pytest.raises(HTTPException) as shed:
+        auth.check_login_admission("owner@test.com", "203.0.113.9")
+    assert shed.value.status_code == 429
+    # ...which doesn't lock the owner out from theirs
+    auth.check_login_admission("owner@test.com", "198.51.100.7")
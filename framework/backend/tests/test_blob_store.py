@@ -0,0 +1,112 @@
+import hashlib
+import io
+import os
+import pytest
+from blob_store import BlobStore, BlobTooLarge
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    data = b"scanned policy " * 10000
+
+    first = store.put_stream(io.BytesIO(data), chunk_size=4096)
+    second = store.put_stream(io.BytesIO(data))
+
+    assert first.sha256 == hashlib.sha256(data).hexdigest()
+    assert first.size == len(data)
+    assert first.created and not second.created
+    assert first.path == second.path == store.path_for(first.sha256)
+    assert os.listdir(store.tmp_dir) == []
+
+
+def test_views_are_hard_links_and_replace_stale_content(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    old = store.put_stream(io.BytesIO(b"v1"))
+    new = store.put_stream(io.BytesIO(b"v2"))
+    view = str(tmp_path / "documents" / "p1" / "report.txt")
+
+    store.link(old, view)
+    store.link(new, view)
+
+    assert os.path.samefile(view, new.path)
+    assert os.stat(new.path).st_nlink == 2
+    # Relinking never writes through to the previous blob
+    with open(old.path, "rb") as f:
+        assert f.read() == b"v1"
+
+
+def test_same_name_with_different_content_gets_its_own_entry(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    repo = str(tmp_path / "repo")
+    a = store.put_stream(io.BytesIO(b"project A"))
+    b = store.put_stream(io.BytesIO(b"project B"))
+
+    first = store.link_unique(a, repo, "notes.txt")
+    again = store.link_unique(a, repo, "notes.txt")
+    other = store.link_unique(b, repo, "notes.txt")
+
+    assert first == again == os.path.join(repo, "notes.txt")
+    assert other == os.path.join(repo, f"notes-{b.sha256[:8]}.txt")
+    assert sorted(os.listdir(repo)) == sorted(["notes.txt", f"notes-{b.sha256[:8]}.txt"])
+
+
+def test_failed_write_leaves_nothing_behind(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    with pytest.raises(RuntimeError):
+        with store.writer() as writer:
+            writer.write(b"partial")
+            raise RuntimeError("connection dropped")
+    assert os.listdir(store.tmp_dir) == []
+    assert sorted(os.listdir(store.root)) == ["tmp"]
+
+
+class ChunkedUpload:
+    """Async reader shaped like UploadFile."""
+
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+        self.reads = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads += 1
+        return self._stream.read(size)
+
+
+@pytest.mark.asyncio
+async def test_async_upload_is_hashed_in_one_pass(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    data = os.urandom(300_000)
+    upload = ChunkedUpload(data)
+
+    blob = await store.put_async(upload, max_bytes=len(data), chunk_size=65536)
+
+    assert blob.sha256 == hashlib.sha256(data).hexdigest()
+    assert blob.size == len(data)
+    assert upload.reads == 6
+    with open(blob.path, "rb") as f:
+        assert f.read() == data
+
+
+@pytest.mark.asyncio
+async def test_async_upload_over_the_limit_stops_early(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    upload = ChunkedUpload(b"x" * 1_000_000)
+
+    with pytest.raises(BlobTooLarge):
+        await store.put_async(upload, max_bytes=100_000, chunk_size=65536)
+
+    assert upload.reads == 2
+    assert os.listdir(store.tmp_dir) == []
+
+
+def test_concurrent_links_to_the_same_name_all_succeed(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    store = BlobStore(str(tmp_path / "blobs"))
+    blobs = [store.put_stream(io.BytesIO(f"version {i}".encode())) for i in range(8)]
+    dest = str(tmp_path / "documents" / "p1" / "report.txt")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda blob: store.link(blob, dest), blobs * 10))
+
+    assert results == [dest] * 80
+    assert os.listdir(os.path.dirname(dest)) == ["report.txt"]
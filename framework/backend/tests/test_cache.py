@@ -0,0 +1,32 @@
+from cache import TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a@test.com", "user")
+    assert cache.get("a@test.com") == "user"
+    clock.now = 5.1
+    assert cache.get("a@test.com") is None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert len(cache) == 2
+
+def test_invalidate_removes_entry():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.invalidate("a")
+    assert cache.get("a") is None
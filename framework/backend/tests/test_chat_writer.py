@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+import chat_writer as chat_writer_module
+import stats_service
+from chat_writer import ChatHistoryWriter
+
+class RecordingSessions:
+    def __init__(self):
+        self.batches = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.batches.append(operations)
+        class Result:
+            upserted_ids = {}
+        return Result()
+
+class RecordingDB:
+    def __init__(self):
+        self.chat_sessions = RecordingSessions()
+
+@pytest.fixture
+def recording_db(monkeypatch):
+    db = RecordingDB()
+    async def get_database():
+        return db
+    async def noop(*args, **kwargs):
+        return None
+    monkeypatch.setattr(chat_writer_module, "get_database", get_database)
+    monkeypatch.setattr(stats_service, "record_usage", noop)
+    return db
+
+@pytest.mark.asyncio
+async def test_turns_are_coalesced_per_session(recording_db):
+    writer = ChatHistoryWriter(flush_interval=0.05)
+    writer.start()
+    await asyncio.gather(
+        writer.enqueue("p1", "a@test.com", [{"content": "q1"}, {"content": "a1"}], []),
+        writer.enqueue("p1", "a@test.com", [{"content": "q2"}, {"content": "a2"}], [{"agent_id": "x"}]),
+        writer.enqueue("p2", "b@test.com", [{"content": "q3"}, {"content": "a3"}], []),
+    )
+    await writer.stop()
+
+    operations = [op for batch in recording_db.chat_sessions.batches for op in batch]
+    assert len(operations) == 2
+    first = operations[0]._doc
+    assert [m["content"] for m in first["$push"]["messages"]["$each"]] == ["q1", "a1", "q2", "a2"]
+    assert first["$set"]["current_chain"] == [{"agent_id": "x"}]
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending_turns(recording_db):
+    writer = ChatHistoryWriter(flush_interval=10)
+    writer.start()
+    await writer.enqueue("p1", "a@test.com", [{"content": "q"}], [])
+    await asyncio.wait_for(writer.stop(), timeout=1)
+    assert len(recording_db.chat_sessions.batches) == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_enqueue_is_not_counted_as_pending(recording_db):
+    writer = ChatHistoryWriter(max_pending=1, flush_interval=10)
+    writer.start()
+    await writer.enqueue("p1", "a@test.com", [{"content": "q1"}], [])
+    await asyncio.sleep(0)
+    await writer.enqueue("p1", "a@test.com", [{"content": "q2"}], [])
+    # Queue full: this turn blocks on backpressure and the client goes away
+    blocked = asyncio.ensure_future(writer.enqueue("p2", "b@test.com", [{"content": "q3"}], []))
+    await asyncio.sleep(0.05)
+    blocked.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await blocked
+    assert ("p2", "b@test.com") not in writer._pending
+    await asyncio.wait_for(writer.stop(), timeout=1)
+    assert writer._pending == {}
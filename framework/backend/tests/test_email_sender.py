@@ -0,0 +1,86 @@
+import pytest
+from agents.email_sender_agent import EmailSenderAgent
+from agents.mail_sessions import session_key, smtp_sessions
+from tests.smtp_server import SMTPStandIn
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPStandIn().start()
+    yield server
+    smtp_sessions.close_all()
+    server.stop()
+
+
+def make_agent(server):
+    return EmailSenderAgent(config={
+        "email_user": "bot@example.com",
+        "email_pass": "secret",
+        "smtp_server": "127.0.0.1",
+        "smtp_port": server.port,
+        "smtp_starttls": False,
+    })
+
+
+def test_single_send_keeps_original_reply(smtp_server):
+    result = make_agent(smtp_server).run("To: alice@example.com\nSubject: Hello\n\nHi Alice")
+    assert result == "Email sent successfully to alice@example.com with subject 'Hello'."
+    sender, recipients, data = smtp_server.messages[0]
+    assert (sender, recipients) == ("bot@example.com", ["alice@example.com"])
+    assert b"Hi Alice" in data
+
+
+def test_session_reused_across_runs(smtp_server):
+    for name in ("alice", "bob", "carol"):
+        make_agent(smtp_server).run(f"To: {name}@example.com\nSubject: Hi\n\nHello")
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.connections == 1
+    assert smtp_server.logins == 1
+
+
+def test_batch_reports_per_recipient_results(smtp_server):
+    message = (
+        "To: alice@example.com, reject@example.com\nSubject: Update\n\nShared body\n"
+        "---\n"
+        "To: bob@example.com\nSubject: Personal\n\nJust for Bob"
+    )
+    results = make_agent(smtp_server).send_batch([
+        {"to": "alice@example.com", "subject": "A", "body": "a"},
+        {"to": "reject@example.com", "subject": "B", "body": "b"},
+        {"to": "bob@example.com", "subject": "C", "body": "c"},
+    ])
+    assert [r["status"] for r in results] == ["sent", "refused", "sent"]
+    assert results[1]["error"].startswith("550")
+
+    summary = make_agent(smtp_server).run(message)
+    assert summary.splitlines()[0] == "Sent 2 of 3 emails."
+    assert "- reject@example.com: refused (550" in summary
+    assert smtp_server.connections == 1
+
+
+def test_dropped_session_is_replaced(smtp_server):
+    make_agent(smtp_server).run("To: alice@example.com\nSubject: Hi\n\nHello")
+    smtp_server.drop_connections()
+
+    result = make_agent(smtp_server).run("To: bob@example.com\nSubject: Hi\n\nHello")
+    assert result.startswith("Email sent successfully to bob@example.com")
+    assert smtp_server.connections == 2
+
+
+def test_long_batch_rotates_sessions_at_the_cap(smtp_server, monkeypatch):
+    monkeypatch.setattr(smtp_sessions, "max_messages", 2)
+    results = make_agent(smtp_server).send_batch([
+        {"to": f"user{i}@example.com", "subject": "Hi", "body": "b"} for i in range(5)
+    ])
+    assert [r["status"] for r in results] == ["sent"] * 5
+    assert smtp_server.connections == 3
+
+
+def test_sessions_are_not_shared_across_credentials_or_tls_mode(smtp_server):
+    make_agent(smtp_server).run("To: alice@example.com\nSubject: Hi\n\nHello")
+    changed = make_agent(smtp_server)
+    changed.EMAIL_PASS = "rotated"
+    changed.run("To: bob@example.com\nSubject: Hi\n\nHello")
+    assert smtp_server.logins == 2
+
+    assert session_key("h", 25, "u", "p", True) != session_key("h", 25, "u", "p", False)
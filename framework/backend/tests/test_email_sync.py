@@ -0,0 +1,147 @@
+from email.message import EmailMessage
+import pytest
+from agents.email_attachment_agent import EmailDownloaderAgent
+from agents.mail_sessions import imap_sessions
+from agents.imap_parts import AttachmentPart, _Decoder, attachment_parts, parse_fetch_response
+from tests.imap_server import FakeMailbox, IMAPStandIn
+
+
+def make_email(subject: str, filename: str, body: str) -> bytes:
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = "sender@example.com"
+    msg["To"] = "me@example.com"
+    msg.set_content("See attached.")
+    msg.add_attachment(body.encode("utf-8"), maintype="text", subtype="plain", filename=filename)
+    return msg.as_bytes()
+
+
+@pytest.fixture
+def mailbox():
+    box = FakeMailbox(uidvalidity=7)
+    server = IMAPStandIn(box).start()
+    box.port = server.port
+    yield box
+    imap_sessions.close_all()
+    server.stop()
+
+
+def make_agent(mailbox, tmp_path, **overrides):
+    config = {
+        "email_user": "me@example.com",
+        "email_pass": "secret",
+        "imap_server": "127.0.0.1",
+        "imap_port": mailbox.port,
+        "imap_ssl": False,
+        "output_folder": str(tmp_path / "attachments"),
+        "blob_store_dir": str(tmp_path / "blobs"),
+    }
+    config.update(overrides)
+    return EmailDownloaderAgent(config=config)
+
+
+def fetched_uids(mailbox):
+    return [uid for uid, item in mailbox.fetches if item == "BODYSTRUCTURE"]
+
+
+def test_second_run_fetches_only_new_messages(mailbox, tmp_path):
+    mailbox.add(make_email("First", "one.txt", "alpha"))
+    mailbox.add(make_email("Second", "two.txt", "beta"))
+
+    result = make_agent(mailbox, tmp_path).run("check mail")
+    assert "alpha" in result and "beta" in result
+    assert fetched_uids(mailbox) == [1, 2]
+
+    mailbox.fetches.clear()
+    result = make_agent(mailbox, tmp_path).run("check mail")
+    assert "No new emails since the last sync" in result
+    assert fetched_uids(mailbox) == []
+
+    mailbox.add(make_email("Third", "three.txt", "gamma"))
+    result = make_agent(mailbox, tmp_path).run("check mail")
+    assert "gamma" in result and "alpha" not in result
+    assert fetched_uids(mailbox) == [3]
+
+
+def test_failed_run_does_not_advance_past_processed_messages(mailbox, tmp_path, monkeypatch):
+    import agents.email_attachment_agent as agent_module
+    for subject, name, body in (("First", "one.txt", "alpha"), ("Second", "two.txt", "beta"), ("Third", "three.txt", "gamma")):
+        mailbox.add(make_email(subject, name, body))
+
+    real_stream_part = agent_module.stream_part
+
+    def failing_stream_part(mail, uid, *args, **kwargs):
+        if uid == 3:
+            raise RuntimeError("connection reset")
+        return real_stream_part(mail, uid, *args, **kwargs)
+
+    monkeypatch.setattr(agent_module, "stream_part", failing_stream_part)
+    assert make_agent(mailbox, tmp_path).run("check mail") == "Error: connection reset"
+
+    monkeypatch.setattr(agent_module, "stream_part", real_stream_part)
+    result = make_agent(mailbox, tmp_path).run("check mail")
+    assert "alpha" in result and "beta" in result and "gamma" in result
+
+
+def test_uidvalidity_change_resets_state(mailbox, tmp_path):
+    mailbox.add(make_email("First", "one.txt", "alpha"))
+    make_agent(mailbox, tmp_path).run("check mail")
+
+    mailbox.reset_uids(uidvalidity=8)
+    mailbox.fetches.clear()
+    result = make_agent(mailbox, tmp_path).run("check mail")
+    assert "alpha" in result
+    assert fetched_uids(mailbox) == [1]
+
+
+def test_connection_reused_until_idle_timeout(mailbox, tmp_path):
+    mailbox.add(make_email("First", "one.txt", "alpha"))
+    make_agent(mailbox, tmp_path).run("check mail")
+    make_agent(mailbox, tmp_path).run("check mail")
+    assert mailbox.logins == 1
+
+    make_agent(mailbox, tmp_path, idle_timeout=0).run("check mail")
+    assert mailbox.logins == 2
+
+
+def test_only_extractable_attachments_are_fetched(mailbox, tmp_path):
+    report = "quarterly numbers line\n" * 400
+    msg = EmailMessage()
+    msg["Subject"] = "Newsletter"
+    msg.set_content("plain body")
+    msg.add_alternative("<html><body>" + "x" * 5000 + "</body></html>", subtype="html")
+    msg.add_attachment(b"\x89PNG" + b"\0" * 4000, maintype="image", subtype="png", filename="chart.png")
+    msg.add_attachment(report.encode("utf-8"), maintype="text", subtype="plain", filename="report.txt")
+    uid = mailbox.add(msg.as_bytes())
+
+    result = make_agent(mailbox, tmp_path, fetch_chunk_size=1000).run("check mail")
+
+    items = [item for fetched_uid, item in mailbox.fetches if fetched_uid == uid]
+    assert "RFC822" not in items
+    body_fetches = [item for item in items if item.startswith("BODY.PEEK[") and "HEADER" not in item]
+    # Only the text attachment (section 3), fetched in several partial chunks
+    assert len(body_fetches) > 1
+    assert all(item.startswith("BODY.PEEK[3]<") for item in body_fetches)
+    assert (tmp_path / "attachments" / "report.txt").read_text(encoding="utf-8") == report
+    assert not (tmp_path / "attachments" / "chart.png").exists()
+    assert "quarterly numbers line" in result
+    assert "chart.png (Not supported for text extraction)" in result
+
+
+def test_bodystructure_parsing_and_streaming_decoder():
+    data = [
+        (b'1 (UID 9 BODYSTRUCTURE (("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 5 1 NIL NIL)'
+         b'("APPLICATION" "PDF" ("NAME" "a.pdf") NIL NIL "BASE64" 12 NIL ("ATTACHMENT" ("FILENAME*" "utf-8\'\'r%C3%A9sum%C3%A9.pdf")))'
+         b' "MIXED") BODY[HEADER.FIELDS (SUBJECT)] {15}', b"Subject: Hi\r\n\r\n"),
+        b")",
+    ]
+    items = parse_fetch_response(data)[9]
+    assert items["BODY[HEADER.FIELDS (SUBJECT)]"] == b"Subject: Hi\r\n\r\n"
+    assert attachment_parts(items["BODYSTRUCTURE"]) == [
+        AttachmentPart(section="2", filename="r\u00e9sum\u00e9.pdf", content_type="application/pdf", encoding="base64", size=12)
+    ]
+
+    decoder = _Decoder("quoted-printable")
+    encoded = b"caf=C3=A9 au=\r\n lait\r\nend"
+    decoded = b"".join(decoder.feed(encoded[i:i + 3]) for i in range(0, len(encoded), 3)) + decoder.finish()
+    assert decoded == "caf\u00e9 au lait\r\nend".encode("utf-8")
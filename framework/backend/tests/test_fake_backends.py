@@ -0,0 +1,29 @@
+import pytest
+from langchain_core.messages import HumanMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+from fake_backends import FakeChatGroq, HashEmbeddings, InMemoryVectorStore
+
+def test_hash_embeddings_are_deterministic():
+    embeddings = HashEmbeddings(dimensions=64)
+    assert embeddings.embed_query("leave policy") == embeddings.embed_query("leave policy")
+    assert embeddings.embed_query("leave policy") != embeddings.embed_query("expense report")
+
+def test_memory_vector_store_applies_pre_filter():
+    store = InMemoryVectorStore(HashEmbeddings(dimensions=64))
+    store.add_texts(["cat policy", "cat rules"], metadatas=[{"project_id": "a"}, {"project_id": "b"}])
+    docs = store.similarity_search("cat", k=5, pre_filter={"project_id": {"$eq": "a"}})
+    assert [d.page_content for d in docs] == ["cat policy"]
+
+@pytest.mark.asyncio
+async def test_fake_llm_calls_tool_then_answers():
+    def search(query: str):
+        return f"found: {query}"
+    tool = StructuredTool.from_function(name="KnowledgeBase", func=search, description="search")
+    llm = FakeChatGroq().bind_tools([tool])
+
+    first = await llm.ainvoke([HumanMessage("hello")])
+    assert first.tool_calls[0]["name"] == "KnowledgeBase"
+    assert first.tool_calls[0]["args"] == {"query": "hello"}
+
+    second = await llm.ainvoke([HumanMessage("hello"), first, ToolMessage("found: hello", tool_call_id=first.tool_calls[0]["id"])])
+    assert second.content == "found: hello"
@@ -0,0 +1,16 @@
+import pytest
+from httpx import AsyncClient
+
+@pytest.mark.asyncio
+async def test_liveness(client_app: AsyncClient):
+    response = await client_app.get("/health/live")
+    assert response.status_code == 200
+    assert response.json()["status"] == "alive"
+
+@pytest.mark.asyncio
+async def test_readiness_reports_components(client_app: AsyncClient):
+    response = await client_app.get("/health/ready")
+    assert response.status_code in (200, 503)
+    data = response.json()
+    assert "warmup" in data
+    assert "import_seconds" in data
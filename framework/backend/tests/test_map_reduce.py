@@ -0,0 +1,84 @@
+import asyncio
+import re
+import pytest
+from rate_limit import TokenBucketLimiter
+from agents.llm_map_reduce import MapReduce, split_by_tokens
+
+
+def words(text: str) -> int:
+    return len(text.split())
+
+
+class StubLLM:
+    def __init__(self):
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        kind, _, body = prompt.partition(":")
+        if kind == "MAP":
+            return f"skills({body.split()[0]})"
+        if kind == "REDUCE":
+            # Condenses like a real summary: keeps only the facts it was given
+            return "merged[" + " ".join(re.findall(r"skills\(section\d+\)|note\d+", body)) + "]"
+        return f"single({len(body.split())})"
+
+
+def make(stub, **kwargs):
+    limiter = TokenBucketLimiter(rate_per_minute=60000, burst=100)
+    return MapReduce(stub, map_prompt="MAP:{text}", reduce_prompt="REDUCE:{partials}", single_prompt="ONE:{text}",
+                     limiter=limiter, counter=words, **kwargs)
+
+
+def test_split_respects_budget_and_keeps_everything():
+    text = "\n\n".join(" ".join(f"p{p}w{w}." for w in range(30)) for p in range(5))
+    chunks = split_by_tokens(text, max_tokens=40, counter=words)
+    assert all(words(c) <= 40 for c in chunks)
+    assert " ".join(" ".join(chunks).split()) == " ".join(text.split())
+
+
+@pytest.mark.asyncio
+async def test_short_input_is_one_call():
+    stub = StubLLM()
+    assert await make(stub, max_tokens=100).run("a short resume") == "single(3)"
+    assert len(stub.prompts) == 1
+
+
+@pytest.mark.asyncio
+async def test_long_input_is_mapped_concurrently_then_reduced():
+    stub = StubLLM()
+    text = "\n\n".join(f"section{i} " + "word " * 20 for i in range(8))
+    result = await make(stub, max_tokens=25, concurrency=3).run(text)
+
+    map_prompts = [p for p in stub.prompts if p.startswith("MAP:")]
+    assert len(map_prompts) == 8
+    assert stub.max_active == 3
+    # Nothing past the first chunk is dropped
+    assert all(f"skills(section{i})" in result for i in range(8))
+
+
+@pytest.mark.asyncio
+async def test_reduce_is_hierarchical_when_partials_overflow():
+    stub = StubLLM()
+    mapper = make(stub, max_tokens=6)
+    result = await mapper.reduce([f"note{i} a b" for i in range(6)])
+    reduce_calls = [p for p in stub.prompts if p.startswith("REDUCE:")]
+    assert len(reduce_calls) > 1
+    assert all(f"note{i}" in result for i in range(6))
+
+
+@pytest.mark.asyncio
+async def test_oversized_partials_are_truncated_not_sent_in_one_call():
+    stub = StubLLM()
+    mapper = make(stub, max_tokens=6)
+    result = await mapper.reduce([f"note{i} " + "x " * 10 for i in range(3)])
+    reduce_calls = [p for p in stub.prompts if p.startswith("REDUCE:")]
+    # Every call stayed within the budget
+    assert all(words(p.partition(":")[2]) <= 6 for p in reduce_calls)
+    assert all(f"note{i}" in result for i in range(3))
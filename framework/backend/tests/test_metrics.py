@@ -0,0 +1,26 @@
+from metrics import Counter, Histogram
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_duration_seconds", "test", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(2.0, route="/a")
+    lines = histogram.render()
+    assert 'test_duration_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_duration_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'test_duration_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_duration_seconds_count{route="/a"} 3' in lines
+
+def test_histogram_snapshot_interpolates_quantiles():
+    histogram = Histogram("test_latency_seconds", "test", buckets=(1.0, 2.0))
+    for _ in range(10):
+        histogram.observe(1.5)
+    snapshot = histogram.snapshot()[()]
+    assert snapshot["count"] == 10
+    assert 1.0 < snapshot["p50"] <= 2.0
+
+def test_counter_labels():
+    counter = Counter("test_total", "test", ("status",))
+    counter.inc(status=200)
+    counter.inc(2, status=200)
+    assert counter.values() == {("200",): 3.0}
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from project_cache import CachedProject, ProjectCache
+
+def test_chain_config_is_parsed_once_with_allowed_agent_ids():
+    agent_id = str(ObjectId())
+    cached = CachedProject({
+        "_id": ObjectId(),
+        "chain_config": [{"agent_id": agent_id, "name": "Translator"}],
+        "allow_user_chaining": True,
+    })
+    assert cached.chain_config[0].name == "Translator"
+    assert cached.chain_agent_ids == frozenset({agent_id})
+    assert cached.allow_user_chaining
+
+def test_legacy_agents_list_is_used_without_chain_config():
+    legacy_id = ObjectId()
+    cached = CachedProject({"_id": ObjectId(), "agents": [legacy_id, "not-an-id"]})
+    assert [c.agent_id for c in cached.chain_config] == [str(legacy_id)]
+
+class FakeStream:
+    def __init__(self, events, error):
+        self.events = events
+        self.error = error
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.events:
+            change = self.events.pop(0)
+            self.resume_token = {"_data": str(change["documentKey"]["_id"])}
+            return change
+        raise self.error
+
+
+class FakeProjects:
+    """Each watch() yields the scripted events, then fails with the scripted error."""
+
+    def __init__(self, script):
+        self.script = script
+        self.resumed_from = []
+
+    def watch(self, resume_after=None):
+        self.resumed_from.append(resume_after)
+        events, error = self.script.pop(0)
+        return FakeStream(events, error)
+
+
+@pytest.mark.asyncio
+async def test_watcher_retries_transient_errors_and_resumes():
+    from pymongo.errors import AutoReconnect, OperationFailure
+    cache = ProjectCache()
+    first, second = ObjectId(), ObjectId()
+    for oid in (first, second):
+        cache._cache.set(str(oid), CachedProject({"_id": oid}))
+    projects = FakeProjects([
+        ([{"documentKey": {"_id": first}}], AutoReconnect("primary stepped down")),
+        ([{"documentKey": {"_id": second}}], OperationFailure("not a replica set", code=40573)),
+    ])
+
+    await asyncio.wait_for(cache.watch_changes(collection=projects, retry_delay=0.01), timeout=2)
+
+    assert projects.resumed_from == [None, {"_data": str(first)}]
+    # Both invalidations were applied, across the reconnect
+    assert cache._cache.get(str(first)) is None
+    assert cache._cache.get(str(second)) is None
@@ -39,3 +39,19 @@ async def test_get_project_details(client_app: AsyncClient, admin_token: str):
     response = await client_app.get(f"/projects/{project_id}", headers=headers)
     assert response.status_code == 200
     assert response.json()["_id"] == project_id
+
+@pytest.mark.asyncio
+async def test_list_projects_is_paginated(client_app: AsyncClient, admin_token: str):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    for i in range(3):
+        await client_app.post("/projects", json={"name": f"Paged {i}"}, headers=headers)
+
+    first = await client_app.get("/projects", params={"limit": 2}, headers=headers)
+    assert first.status_code == 200
+    assert len(first.json()) == 2
+    assert "screens" not in first.json()[0]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = await client_app.get("/projects", params={"limit": 2, "cursor": cursor}, headers=headers)
+    assert [p["name"] for p in second.json()] == ["Paged 2"]
+    assert "X-Next-Cursor" not in second.headers
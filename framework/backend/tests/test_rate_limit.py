@@ -0,0 +1,50 @@
+import time
+import pytest
+from rate_limit import TokenBucketLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_burst_then_shed():
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=3, clock=FakeClock())
+    assert [limiter.allow("10.0.0.1") for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("10.0.0.2")
+
+def test_tokens_refill_over_time():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=1, clock=clock)
+    assert limiter.allow("user@test.com")
+    assert not limiter.allow("user@test.com")
+    assert limiter.retry_after("user@test.com") == 1
+    clock.now = 1.0
+    assert limiter.allow("user@test.com")
+
+def test_key_count_is_bounded():
+    limiter = TokenBucketLimiter(rate_per_minute=1, burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.allow(key)
+    assert len(limiter._buckets) == 2
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_refill():
+    limiter = TokenBucketLimiter(rate_per_minute=600, burst=1)
+    started = time.monotonic()
+    for _ in range(3):
+        await limiter.acquire("llm")
+    # Two refills at 10 tokens/second
+    assert 0.15 < time.monotonic() - started < 1
+
+
+
+def test_chat_llm_is_unthrottled_unless_a_budget_is_set(monkeypatch):
+    import backends
+    import rate_limit
+    monkeypatch.setattr(rate_limit, "llm_rate_limiter", None)
+    assert backends.shared_llm_rate_limiter() is None
+    monkeypatch.setattr(rate_limit, "llm_rate_limiter", TokenBucketLimiter(rate_per_minute=60, burst=1))
+    limiter = backends.shared_llm_rate_limiter()
+    assert limiter.acquire(blocking=False) and not limiter.acquire(blocking=False)
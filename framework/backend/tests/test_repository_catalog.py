@@ -0,0 +1,43 @@
+import hashlib
+import pytest
+from httpx import AsyncClient
+import repository_catalog
+
+
+def test_filters_map_to_indexed_fields():
+    assert repository_catalog.build_query() == {}
+    query = repository_catalog.build_query(project_id="p1", status="ingested", q="Policy (v1", extension="PDF")
+    assert query == {
+        "projects": "p1",
+        "status": "ingested",
+        "name": {"$regex": r"^Policy\ \(v1"},
+        "extension": ".pdf",
+    }
+
+
+def test_describe_file_hashes_existing_files(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"quarterly notes")
+    entry = repository_catalog._describe_file(str(path))
+    assert entry["sha256"] == hashlib.sha256(b"quarterly notes").hexdigest()
+    assert entry["size"] == 15
+    assert entry["page_count"] is None
+
+
+@pytest.mark.asyncio
+async def test_repositories_are_paged_and_filtered(client_app: AsyncClient, admin_token: str):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    for i in range(3):
+        await repository_catalog.record_upload(f"doc{i}.pdf", f"{i:064x}", 100 + i, "p1" if i < 2 else "p2")
+    await repository_catalog.record_ingest("doc0.pdf", page_count=4)
+    await repository_catalog.record_ingest("doc1.pdf", error="Unsupported file type")
+
+    first = await client_app.get("/repositories", params={"limit": 2}, headers=headers)
+    assert [f["name"] for f in first.json()] == ["doc0.pdf", "doc1.pdf"]
+    rest = await client_app.get("/repositories", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]}, headers=headers)
+    assert [f["name"] for f in rest.json()] == ["doc2.pdf"]
+
+    ingested = (await client_app.get("/repositories", params={"status": "ingested"}, headers=headers)).json()
+    assert [(f["name"], f["page_count"], f["projects"]) for f in ingested] == [("doc0.pdf", 4, ["p1"])]
+    in_p2 = (await client_app.get("/repositories", params={"project_id": "p2"}, headers=headers)).json()
+    assert [f["name"] for f in in_p2] == ["doc2.pdf"]
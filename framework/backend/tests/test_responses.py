@@ -0,0 +1,24 @@
+from datetime import datetime
+from bson import ObjectId
+import orjson
+from responses import FastJSONResponse
+
+def test_mongo_documents_serialize_directly():
+    oid = ObjectId()
+    doc = {"_id": oid, "created_at": datetime(2024, 5, 1, 12, 30), "messages": [{"role": "user", "content": "hi"}]}
+    body = orjson.loads(FastJSONResponse(doc).body)
+    assert body["_id"] == str(oid)
+    assert body["created_at"] == "2024-05-01T12:30:00"
+    assert body["messages"][0]["content"] == "hi"
+
+def test_model_responses_apply_defaults_and_drop_undeclared_fields():
+    from typing import List
+    from models import ProjectSummary
+    from responses import ModelJSONResponse
+    oid = ObjectId()
+    doc = {"_id": oid, "name": "Legacy", "created_at": datetime(2024, 5, 1), "internal": "x"}
+    body = orjson.loads(ModelJSONResponse([doc], List[ProjectSummary]).body)
+    assert body == [{
+        "_id": str(oid), "name": "Legacy", "description": None, "agents": [], "chain_config": [],
+        "allow_user_chaining": False, "created_at": "2024-05-01T00:00:00",
+    }]
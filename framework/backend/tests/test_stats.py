@@ -0,0 +1,95 @@
+import pytest
+from httpx import AsyncClient
+
+@pytest.mark.asyncio
+async def test_stats_track_created_projects(client_app: AsyncClient, admin_token: str):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    before = (await client_app.get("/api/stats", headers=headers)).json()
+
+    await client_app.post("/projects", json={"name": "Counted"}, headers=headers)
+
+    after = (await client_app.get("/api/stats", headers=headers)).json()
+    assert after["total_projects"] == before["total_projects"] + 1
+    assert after["total_users"] == 1
+
+@pytest.mark.asyncio
+async def test_usage_series_records_logins(client_app: AsyncClient, admin_token: str):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client_app.get("/api/stats/usage", params={"hours": 3}, headers=headers)
+    assert response.status_code == 200
+    series = response.json()
+    assert len(series) == 3
+    assert series[-1]["counts"].get("logins", 0) >= 1
+
+@pytest.mark.asyncio
+async def test_reconcile_drops_projects_without_sessions(db):
+    import stats_service
+    await db.chat_sessions.insert_many([{"project_id": "a"}, {"project_id": "b"}])
+    await stats_service.reconcile()
+    assert sorted(await db[stats_service.ACTIVE_PROJECTS_COLLECTION].distinct("_id")) == ["a", "b"]
+
+    await db.chat_sessions.delete_many({"project_id": "b"})
+    counters = await stats_service.reconcile()
+    assert counters["active_projects"] == 1
+    assert await db[stats_service.ACTIVE_PROJECTS_COLLECTION].distinct("_id") == ["a"]
+
+
+class FakeCollection:
+    def __init__(self, count=0, on_count=None):
+        self.count = count
+        self.on_count = on_count
+        self.docs = {}
+
+    async def count_documents(self, query):
+        if self.on_count:
+            await self.on_count()
+        return self.count
+
+    async def distinct(self, field):
+        return []
+
+    async def delete_many(self, query):
+        pass
+
+    async def find_one(self, query):
+        doc = self.docs.get(query["_id"])
+        return dict(doc) if doc is not None else None
+
+    async def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["_id"], {})
+        doc.update(update.get("$set", {}))
+        for name, amount in update.get("$inc", {}).items():
+            doc[name] = doc.get(name, 0) + amount
+
+
+class FakeDB(dict):
+    def __getattr__(self, name):
+        return self[name]
+
+
+@pytest.mark.asyncio
+async def test_reconcile_keeps_increments_made_while_counting(monkeypatch):
+    import stats_service
+    db = FakeDB()
+
+    async def user_signs_up():
+        # A registration lands after the users were counted, before the write
+        await stats_service.increment("total_users")
+
+    db.update({
+        "users": FakeCollection(count=3),
+        "projects": FakeCollection(count=2, on_count=user_signs_up),
+        "agents": FakeCollection(), "chat_sessions": FakeCollection(),
+        stats_service.ACTIVE_PROJECTS_COLLECTION: FakeCollection(),
+        stats_service.STATS_COLLECTION: FakeCollection(),
+    })
+    db[stats_service.STATS_COLLECTION].docs[stats_service.STATS_ID] = {"total_users": 1, "total_projects": 2}
+
+    async def get_database():
+        return db
+    monkeypatch.setattr(stats_service, "get_database", get_database)
+
+    await stats_service.reconcile()
+    stored = db[stats_service.STATS_COLLECTION].docs[stats_service.STATS_ID]
+    assert stored["total_users"] == 4
+    assert stored["total_projects"] == 2
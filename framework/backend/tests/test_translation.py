@@ -0,0 +1,72 @@
+import threading
+import time
+import pytest
+from cache import TTLCache
+from agents.translation import ChunkedTranslator, chunk_paragraph
+
+
+class StubTranslator:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, segment: str) -> str:
+        with self.lock:
+            self.calls.append(segment)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return f"<{segment.upper()}>"
+
+
+def make_translator(stub, **kwargs):
+    return ChunkedTranslator(stub, source="en", target="hi", cache=TTLCache(maxsize=100, ttl=60), **kwargs)
+
+
+def test_chunks_end_at_sentence_boundaries():
+    paragraph = " ".join(f"Sentence number {i} is here." for i in range(50))
+    chunks = chunk_paragraph(paragraph, max_chars=120)
+    assert all(len(c) <= 120 for c in chunks)
+    assert all(c.endswith(".") for c in chunks)
+    assert " ".join(chunks) == paragraph
+
+
+@pytest.mark.asyncio
+async def test_translates_concurrently_in_order_with_bounded_pool():
+    stub = StubTranslator(delay=0.05)
+    text = "\n\n".join(f"Paragraph {i} says hello." for i in range(12))
+    started = time.perf_counter()
+    result = await make_translator(stub, concurrency=4).translate(text)
+    assert time.perf_counter() - started < 0.05 * 12
+    assert stub.max_active <= 4
+    assert result == "\n\n".join(f"<PARAGRAPH {i} SAYS HELLO.>" for i in range(12))
+
+
+@pytest.mark.asyncio
+async def test_repeated_boilerplate_is_translated_once():
+    stub = StubTranslator()
+    translator = make_translator(stub)
+    header = "This message is confidential and intended only for the recipient."
+    await translator.translate(f"{header}\n\nFirst letter.")
+    result = await translator.translate(f"{header}\n\nSecond letter.\n\n{header}")
+    assert stub.calls.count(header) == 1
+    assert result.startswith(f"<{header.upper()}>")
+
+
+@pytest.mark.asyncio
+async def test_failed_segment_is_empty_and_not_cached():
+    calls = []
+
+    def flaky(segment):
+        calls.append(segment)
+        raise RuntimeError("service unavailable")
+
+    translator = ChunkedTranslator(flaky, source="en", target="hi", cache=TTLCache(maxsize=10, ttl=60))
+    assert await translator.translate("Hello there.") == ""
+    await translator.translate("Hello there.")
+    assert len(calls) == 2
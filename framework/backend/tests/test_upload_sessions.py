@@ -0,0 +1,87 @@
+import hashlib
+import os
+import pytest
+from blob_store import BlobStore
+from upload_sessions import UploadSessionError, UploadSessions
+
+
+async def body(data: bytes, piece: int = 1000):
+    for i in range(0, len(data), piece):
+        yield data[i:i + piece]
+
+
+def make_sessions(tmp_path, chunk_size=4096):
+    return UploadSessions(root=str(tmp_path / "uploads"), chunk_size=chunk_size, max_bytes=1_000_000)
+
+
+def chunks_of(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.asyncio
+async def test_chunks_in_any_order_commit_to_one_blob(tmp_path):
+    sessions = make_sessions(tmp_path)
+    store = BlobStore(str(tmp_path / "blobs"))
+    data = os.urandom(10_000)
+    session = sessions.create("p1", "a@example.com", "scan.pdf", len(data), hashlib.sha256(data).hexdigest())
+    assert session["total_chunks"] == 3
+
+    parts = chunks_of(data, 4096)
+    for index in (2, 0):
+        await sessions.put_chunk(session, index, body(parts[index]))
+    assert sessions.status(session)["missing"] == [1]
+    with pytest.raises(UploadSessionError) as missing:
+        await sessions.assemble(session, store)
+    assert missing.value.status_code == 409
+
+    await sessions.put_chunk(session, 1, body(parts[1]))
+    blob = await sessions.assemble(session, store)
+
+    assert blob.sha256 == hashlib.sha256(data).hexdigest()
+    with open(blob.path, "rb") as f:
+        assert f.read() == data
+
+
+@pytest.mark.asyncio
+async def test_interrupted_chunk_is_not_recorded_and_can_be_retried(tmp_path):
+    sessions = make_sessions(tmp_path)
+    data = os.urandom(5000)
+    session = sessions.create("p1", "a@example.com", "notes.txt", len(data))
+
+    with pytest.raises(UploadSessionError):
+        await sessions.put_chunk(session, 0, body(data[:3000]))
+    assert sessions.status(session)["received"] == []
+
+    await sessions.put_chunk(session, 0, body(data[:4096]))
+    assert sessions.status(session)["received"] == [0]
+    # Re-sending a chunk simply replaces it
+    await sessions.put_chunk(session, 0, body(data[:4096]))
+    assert sorted(os.listdir(os.path.join(sessions.root, session["upload_id"]))) == ["0.chunk", "session.json"]
+
+
+@pytest.mark.asyncio
+async def test_hash_mismatch_discards_the_session(tmp_path):
+    sessions = make_sessions(tmp_path)
+    store = BlobStore(str(tmp_path / "blobs"))
+    session = sessions.create("p1", "a@example.com", "notes.txt", 10, "0" * 64)
+    await sessions.put_chunk(session, 0, body(b"0123456789"))
+
+    with pytest.raises(UploadSessionError) as mismatch:
+        await sessions.assemble(session, store)
+
+    assert mismatch.value.status_code == 422
+    with pytest.raises(UploadSessionError):
+        sessions.get(session["upload_id"])
+    assert os.listdir(store.tmp_dir) == []
+
+
+def test_rejects_bad_requests_up_front(tmp_path):
+    sessions = make_sessions(tmp_path)
+    with pytest.raises(UploadSessionError):
+        sessions.create("p1", "a@example.com", "archive.zip", 100)
+    with pytest.raises(UploadSessionError) as too_large:
+        sessions.create("p1", "a@example.com", "scan.pdf", 2_000_000)
+    assert too_large.value.status_code == 413
+    with pytest.raises(UploadSessionError) as traversal:
+        sessions.get("../../etc")
+    assert traversal.value.status_code == 404
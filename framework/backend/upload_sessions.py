@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from typing import AsyncIterator, List, Optional
+from blob_store import BLOB_STORE_DIR, MAX_UPLOAD_BYTES, Blob, BlobStore
+
+# Resumable uploads: a client initiates a session for a file of known size,
+# PUTs it in fixed-size chunks (in any order, retrying any that fail), then
+# commits. Chunks are kept server-side as numbered files until the commit
+# streams them, in order, into the blob store. The set of received chunks is
+# read from disk, so parallel chunk uploads never contend on the manifest
+# and a session survives a restart of the API.
+
+UPLOAD_SESSIONS_DIR = os.getenv("UPLOAD_SESSIONS_DIR", os.path.join(BLOB_STORE_DIR, "uploads"))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(8 * 1024 * 1024)))
+UPLOAD_SESSION_TTL_SECONDS = float(os.getenv("UPLOAD_SESSION_TTL_SECONDS", str(24 * 3600)))
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt")
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+_CHUNK_FILE = re.compile(r"^(\d+)\.chunk$")
+
+
+class UploadSessionError(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadSessions:
+    def __init__(self, root: str = UPLOAD_SESSIONS_DIR, chunk_size: int = UPLOAD_CHUNK_BYTES,
+                 ttl: float = UPLOAD_SESSION_TTL_SECONDS, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.root = os.path.abspath(root)
+        self.chunk_size = chunk_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._committing = set()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _dir(self, upload_id: str) -> str:
+        if not _UPLOAD_ID.match(upload_id or ""):
+            raise UploadSessionError("Upload not found", 404)
+        return os.path.join(self.root, upload_id)
+
+    def _chunk_path(self, upload_id: str, index: int) -> str:
+        return os.path.join(self._dir(upload_id), f"{index}.chunk")
+
+    def create(self, project_id: str, owner: str, filename: str, size: int, sha256: Optional[str] = None) -> dict:
+        filename = os.path.basename(filename or "")
+        if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            raise UploadSessionError(f"Unsupported file type; expected one of {', '.join(SUPPORTED_EXTENSIONS)}")
+        if size <= 0:
+            raise UploadSessionError("File size must be positive")
+        if self.max_bytes and size > self.max_bytes:
+            raise UploadSessionError(f"File exceeds the {self.max_bytes}-byte upload limit", 413)
+        self.sweep()
+
+        session = {
+            "upload_id": uuid.uuid4().hex,
+            "project_id": project_id,
+            "owner": owner,
+            "filename": filename,
+            "size": size,
+            "sha256": sha256.lower() if sha256 else None,
+            "chunk_size": self.chunk_size,
+            "total_chunks": -(-size // self.chunk_size),
+            "created_at": time.time(),
+        }
+        directory = self._dir(session["upload_id"])
+        os.makedirs(directory)
+        with open(os.path.join(directory, "session.json"), "w", encoding="utf-8") as f:
+            json.dump(session, f)
+        return session
+
+    def get(self, upload_id: str) -> dict:
+        try:
+            with open(os.path.join(self._dir(upload_id), "session.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise UploadSessionError("Upload not found", 404)
+
+    def received(self, session: dict) -> List[int]:
+        indices = []
+        for name in os.listdir(self._dir(session["upload_id"])):
+            match = _CHUNK_FILE.match(name)
+            if match:
+                indices.append(int(match.group(1)))
+        return sorted(indices)
+
+    def status(self, session: dict) -> dict:
+        received = self.received(session)
+        missing = sorted(set(range(session["total_chunks"])) - set(received))
+        return {**session, "received": received, "missing": missing}
+
+    def expected_length(self, session: dict, index: int) -> int:
+        if not 0 <= index < session["total_chunks"]:
+            raise UploadSessionError(f"Chunk index must be between 0 and {session['total_chunks'] - 1}")
+        if index == session["total_chunks"] - 1:
+            return session["size"] - index * session["chunk_size"]
+        return session["chunk_size"]
+
+    async def put_chunk(self, session: dict, index: int, stream: AsyncIterator[bytes]) -> int:
+        """Writes chunk `index` from an async byte stream; the chunk only appears once it is complete."""
+        expected = self.expected_length(session, index)
+        directory = self._dir(session["upload_id"])
+        fd, tmp_path = await asyncio.to_thread(tempfile.mkstemp, dir=directory, suffix=".part")
+        written = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for data in stream:
+                    written += len(data)
+                    if written > expected:
+                        raise UploadSessionError(f"Chunk {index} must be {expected} bytes")
+                    await asyncio.to_thread(f.write, data)
+            if written != expected:
+                raise UploadSessionError(f"Chunk {index} must be {expected} bytes, received {written}")
+            await asyncio.to_thread(os.replace, tmp_path, self._chunk_path(session["upload_id"], index))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return written
+
+    async def assemble(self, session: dict, blob_store: BlobStore) -> Blob:
+        """Streams the chunks in order into the blob store and verifies size and hash."""
+        upload_id = session["upload_id"]
+        if upload_id in self._committing:
+            raise UploadSessionError("Upload is already being committed", 409)
+        missing = self.status(session)["missing"]
+        if missing:
+            raise UploadSessionError(f"Missing chunks: {', '.join(map(str, missing[:20]))}", 409)
+
+        self._committing.add(upload_id)
+        writer = await asyncio.to_thread(blob_store.writer)
+        try:
+            for index in range(session["total_chunks"]):
+                await asyncio.to_thread(self._copy_chunk, self._chunk_path(upload_id, index), writer)
+            if writer.size != session["size"]:
+                raise UploadSessionError(f"Assembled {writer.size} bytes, expected {session['size']}", 409)
+            if session["sha256"] and writer.sha256 != session["sha256"]:
+                # Some chunk is corrupt and there is no telling which; start over
+                await asyncio.to_thread(self.discard, upload_id)
+                raise UploadSessionError("Uploaded content does not match the declared SHA-256", 422)
+            return await asyncio.to_thread(writer.commit)
+        except BaseException:
+            await asyncio.to_thread(writer.abort)
+            raise
+        finally:
+            self._committing.discard(upload_id)
+
+    @staticmethod
+    def _copy_chunk(path: str, writer):
+        with open(path, "rb") as f:
+            for data in iter(lambda: f.read(1024 * 1024), b""):
+                writer.write(data)
+
+    def discard(self, upload_id: str):
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+    def sweep(self):
+        """Drops sessions not committed within the TTL."""
+        cutoff = time.time() - self.ttl
+        for upload_id in os.listdir(self.root):
+            if not _UPLOAD_ID.match(upload_id) or upload_id in self._committing:
+                continue
+            try:
+                if os.path.getmtime(os.path.join(self.root, upload_id)) < cutoff:
+                    self.discard(upload_id)
+            except OSError:
+                continue
+
+
+_upload_sessions: Optional[UploadSessions] = None
+
+
+def get_upload_sessions() -> UploadSessions:
+    global _upload_sessions
+    if _upload_sessions is None:
+        _upload_sessions = UploadSessions()
+    return _upload_sessions
@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+# Document layout matches langchain_mongodb's MongoDBAtlasVectorSearch, so
+# vectors written before this adapter existed remain searchable.
+TEXT_KEY = "text"
+EMBEDDING_KEY = "embedding"
+
+
+class AsyncMongoVectorStore:
+    """
+    Atlas vector store on the shared Motor client. Searches run as $vectorSearch
+    aggregations and inserts as unordered bulk writes, both without blocking the
+    event loop; embedding runs in a worker thread since it is CPU bound.
+    """
+
+    def __init__(self, collection, embedding: Embeddings, index_name: str, insert_batch_size: int = 500, num_candidates_factor: int = 10):
+        self.collection = collection
+        self.embedding = embedding
+        self.index_name = index_name
+        self.insert_batch_size = insert_batch_size
+        self.num_candidates_factor = num_candidates_factor
+
+    async def aadd_documents(self, documents: List[Document], **kwargs: Any) -> List[str]:
+        texts = [d.page_content for d in documents]
+        vectors = await asyncio.to_thread(self.embedding.embed_documents, texts)
+
+        records = [
+            {**doc.metadata, TEXT_KEY: text, EMBEDDING_KEY: vector}
+            for doc, text, vector in zip(documents, texts, vectors)
+        ]
+        ids = []
+        for start in range(0, len(records), self.insert_batch_size):
+            result = await self.collection.insert_many(records[start:start + self.insert_batch_size], ordered=False)
+            ids.extend(str(i) for i in result.inserted_ids)
+        return ids
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 4, pre_filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[tuple]:
+        query_vector = await asyncio.to_thread(self.embedding.embed_query, query)
+
+        vector_search = {
+            "index": self.index_name,
+            "path": EMBEDDING_KEY,
+            "queryVector": query_vector,
+            "numCandidates": k * self.num_candidates_factor,
+            "limit": k,
+        }
+        if pre_filter:
+            vector_search["filter"] = pre_filter
+
+        pipeline = [
+            {"$vectorSearch": vector_search},
+            {"$project": {EMBEDDING_KEY: 0, "score": {"$meta": "vectorSearchScore"}}},
+        ]
+        results = []
+        async for record in self.collection.aggregate(pipeline):
+            score = record.pop("score", 0.0)
+            text = record.pop(TEXT_KEY, "")
+            record_id = str(record.pop("_id"))
+            results.append((Document(page_content=text, metadata=record, id=record_id), score))
+        return results
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k=k, **kwargs)]
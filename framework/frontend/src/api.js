@@ -22,5 +22,26 @@ api.interceptors.request.use(
   }
 );
 
+// List endpoints return one page at a time with the next page's cursor in
+// X-Next-Cursor. Lists that grow (agents in the store, users, projects in the
+// admin pages) page through getPage behind a "Load more" button.
+export const getPage = async (url, params = {}, cursor = null) => {
+  const response = await api.get(url, { params: cursor ? { ...params, cursor } : params });
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+};
+
+// Small, bounded lookups only (pickers and menus): follows X-Next-Cursor but
+// stops after maxItems so it never downloads a whole large collection.
+export const getAll = async (url, params = {}, maxItems = 500) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const page = await getPage(url, params, cursor);
+    items.push(...page.items);
+    cursor = page.nextCursor;
+  } while (cursor && items.length < maxItems);
+  return items.slice(0, maxItems);
+};
+
 export default api;
 
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Bot, ArrowRight } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
-import api from '../api';
+import { getAll } from '../api';
 
 const AgentList = () => {
     const [agents, setAgents] = useState([]);
@@ -11,8 +11,7 @@ const AgentList = () => {
     useEffect(() => {
         const fetchAgents = async () => {
             try {
-                const response = await api.get('/agents');
-                setAgents(response.data);
+                setAgents(await getAll('/agents'));
             } catch (error) {
                 console.error("Failed to fetch agents", error);
             } finally {
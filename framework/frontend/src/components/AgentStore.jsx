@@ -1,27 +1,32 @@
 import React, { useState, useEffect } from 'react';
 import { Plus, Bot, Search } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
-import api from '../api';
+import { getPage } from '../api';
 import CreateAgentModal from './CreateAgentModal';
 
 const AgentStore = () => {
     const [agents, setAgents] = useState([]);
     const [isCreateModalOpen, setIsCreateModalOpen] = useState(false);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const navigate = useNavigate();
 
     useEffect(() => {
         fetchAgents();
     }, []);
 
-    const fetchAgents = async () => {
+    const fetchAgents = async (cursor = null) => {
+        if (cursor) setLoadingMore(true);
         try {
-            const response = await api.get('/agents');
-            setAgents(response.data);
+            const page = await getPage('/agents', {}, cursor);
+            setAgents(cursor ? (prev) => [...prev, ...page.items] : page.items);
+            setNextCursor(page.nextCursor);
         } catch (error) {
             console.error("Failed to fetch agents", error);
         } finally {
             setLoading(false);
+            setLoadingMore(false);
         }
     };
 
@@ -75,6 +80,18 @@ const AgentStore = () => {
                         ))}
                     </div>
                 )}
+
+                {nextCursor && !loading && (
+                    <div className="flex justify-center mt-6">
+                        <button
+                            onClick={() => fetchAgents(nextCursor)}
+                            disabled={loadingMore}
+                            className="px-4 py-2 text-sm rounded-lg border border-[var(--border-color)] text-[var(--text-secondary)] hover:bg-[var(--bg-secondary)] transition-colors disabled:opacity-50"
+                        >
+                            Load more
+                        </button>
+                    </div>
+                )}
             </div>
 
             <CreateAgentModal
@@ -2,7 +2,7 @@ import React, { useState, useRef, useEffect } from 'react';
 import { Send, Paperclip, Bot, User, Loader2, Plus, X, ArrowRight, FileText, Settings, ChevronRight } from 'lucide-react';
 import { useParams, useSearchParams } from 'react-router-dom';
 import { motion, AnimatePresence } from 'framer-motion';
-import api from '../api';
+import api, { getAll } from '../api';
 import { useAuth } from '../context/AuthContext';
 
 // Logos (Keeping existing)
@@ -101,8 +101,7 @@ const ChatInterface = () => {
     useEffect(() => {
         const fetchAgents = async () => {
             try {
-                const response = await api.get('/agents');
-                setAvailableAgents(response.data);
+                setAvailableAgents(await getAll('/agents'));
             } catch (error) {
                 console.error("Failed to fetch agents", error);
             }
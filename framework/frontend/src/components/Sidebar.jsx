@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Plus, MessageSquare, Box, FolderOpen, ShoppingBag, Settings, LogOut, Shield, FileText } from 'lucide-react';
 import { useNavigate, useParams, NavLink } from 'react-router-dom';
-import api from '../api';
+import { getAll } from '../api';
 import { useAuth } from '../context/AuthContext';
 
 const Sidebar = ({ onOpenCreateModal }) => {
@@ -27,8 +27,7 @@ const Sidebar = ({ onOpenCreateModal }) => {
 
     const fetchProjects = async () => {
         try {
-            const response = await api.get('/projects');
-            setProjects(response.data);
+            setProjects(await getAll('/projects'));
         } catch (error) {
             console.error("Failed to fetch projects", error);
         }
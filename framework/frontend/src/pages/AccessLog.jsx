@@ -1,12 +1,15 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../context/AuthContext';
 import { motion } from 'framer-motion';
+import { getPage } from '../api';
 
 const AccessLog = () => {
     const { token } = useAuth();
     const [users, setUsers] = useState([]);
     const [projects, setProjects] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [usersCursor, setUsersCursor] = useState(null);
+    const [projectsCursor, setProjectsCursor] = useState(null);
 
     // New User Form State
     const [newUserEmail, setNewUserEmail] = useState('');
@@ -23,21 +26,12 @@ const AccessLog = () => {
     const fetchData = async () => {
         setLoading(true);
         try {
-            const [usersRes, projectsRes] = await Promise.all([
-                fetch(`${import.meta.env.VITE_API_URL || 'http://localhost:8000'}/users`, {
-                    headers: { 'Authorization': `Bearer ${token}` }
-                }),
-                fetch(`${import.meta.env.VITE_API_URL || 'http://localhost:8000'}/projects`, {
-                    headers: { 'Authorization': `Bearer ${token}` }
-                })
-            ]);
-
-            if (usersRes.ok && projectsRes.ok) {
-                const usersData = await usersRes.json();
-                const projectsData = await projectsRes.json();
-                setUsers(usersData);
-                setProjects(projectsData);
-            }
+            // First page of each; further pages load on demand
+            const [usersPage, projectsPage] = await Promise.all([getPage('/users'), getPage('/projects')]);
+            setUsers(usersPage.items);
+            setUsersCursor(usersPage.nextCursor);
+            setProjects(projectsPage.items);
+            setProjectsCursor(projectsPage.nextCursor);
         } catch (error) {
             console.error("Error fetching admin data", error);
         } finally {
@@ -45,6 +39,26 @@ const AccessLog = () => {
         }
     };
 
+    const loadMoreUsers = async () => {
+        try {
+            const page = await getPage('/users', {}, usersCursor);
+            setUsers((prev) => [...prev, ...page.items]);
+            setUsersCursor(page.nextCursor);
+        } catch (error) {
+            console.error("Error fetching users", error);
+        }
+    };
+
+    const loadMoreProjects = async () => {
+        try {
+            const page = await getPage('/projects', {}, projectsCursor);
+            setProjects((prev) => [...prev, ...page.items]);
+            setProjectsCursor(page.nextCursor);
+        } catch (error) {
+            console.error("Error fetching projects", error);
+        }
+    };
+
     const handleCreateUser = async (e) => {
         e.preventDefault();
         setActionError('');
@@ -171,6 +185,11 @@ const AccessLog = () => {
                                     ))}
                                 </div>
                                 {projects.length === 0 && <p className="text-gray-500 text-sm mt-2">No projects available to assign.</p>}
+                                {projectsCursor && (
+                                    <button type="button" onClick={loadMoreProjects} className="mt-3 px-4 py-2 text-sm rounded-lg border border-white/10 text-gray-400 hover:bg-white/5 transition-colors">
+                                        Load more projects
+                                    </button>
+                                )}
                             </div>
                         )}
 
@@ -221,6 +240,13 @@ const AccessLog = () => {
                             </tbody>
                         </table>
                     </div>
+                    {usersCursor && (
+                        <div className="flex justify-center mt-6">
+                            <button onClick={loadMoreUsers} className="px-4 py-2 text-sm rounded-lg border border-white/10 text-gray-400 hover:bg-white/5 transition-colors">
+                                Load more
+                            </button>
+                        </div>
+                    )}
                 </section>
 
             </div>
@@ -2,15 +2,24 @@ import React, { useState, useEffect } from 'react';
 import { FileText, Folder, RefreshCw } from 'lucide-react';
 import api from '../api';
 
+const formatSize = (bytes) => {
+    if (bytes == null) return 'Unknown size';
+    if (bytes < 1024) return `${bytes} B`;
+    if (bytes < 1024 * 1024) return `${(bytes / 1024).toFixed(1)} KB`;
+    return `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
+};
+
 const Repositories = () => {
     const [files, setFiles] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
 
-    const fetchFiles = async () => {
+    const fetchFiles = async (cursor = null) => {
         setLoading(true);
         try {
-            const response = await api.get('/repositories');
-            setFiles(response.data);
+            const response = await api.get('/repositories', { params: cursor ? { cursor } : {} });
+            setFiles(cursor ? (prev) => [...prev, ...response.data] : response.data);
+            setNextCursor(response.headers['x-next-cursor'] || null);
         } catch (error) {
             console.error("Failed to fetch repositories", error);
         } finally {
@@ -30,7 +39,7 @@ const Repositories = () => {
                     <p className="text-[var(--text-secondary)]">Files stored in the local repository.</p>
                 </div>
                 <button
-                    onClick={fetchFiles}
+                    onClick={() => fetchFiles()}
                     className="p-2 hover:bg-[var(--bg-secondary)] rounded-lg transition-colors text-[var(--text-secondary)]"
                 >
                     <RefreshCw className={`w-5 h-5 ${loading ? 'animate-spin' : ''}`} />
@@ -45,18 +54,35 @@ const Repositories = () => {
                     </div>
                 )}
 
-                {files.map((file, index) => (
-                    <div key={index} className="bg-[var(--bg-secondary)] border border-[var(--border-color)] p-4 rounded-xl flex items-center gap-4 hover:border-[var(--accent-primary)] transition-colors">
+                {files.map((file) => (
+                    <div key={file._id} className="bg-[var(--bg-secondary)] border border-[var(--border-color)] p-4 rounded-xl flex items-center gap-4 hover:border-[var(--accent-primary)] transition-colors">
                         <div className="w-10 h-10 bg-[var(--bg-tertiary)] rounded-lg flex items-center justify-center text-[var(--accent-primary)]">
                             <FileText className="w-5 h-5" />
                         </div>
                         <div className="flex-1 min-w-0">
-                            <p className="font-medium text-[var(--text-primary)] truncate">{file}</p>
-                            <p className="text-xs text-[var(--text-secondary)]">Local File</p>
+                            <p className="font-medium text-[var(--text-primary)] truncate">{file.name}</p>
+                            <p className="text-xs text-[var(--text-secondary)]">
+                                {formatSize(file.size)}
+                                {file.page_count ? ` · ${file.page_count} pages` : ''}
+                                {` · ${file.status}`}
+                                {file.projects?.length ? ` · ${file.projects.length} project${file.projects.length > 1 ? 's' : ''}` : ''}
+                            </p>
                         </div>
                     </div>
                 ))}
             </div>
+
+            {nextCursor && (
+                <div className="flex justify-center mt-6">
+                    <button
+                        onClick={() => fetchFiles(nextCursor)}
+                        disabled={loading}
+                        className="px-4 py-2 text-sm rounded-lg border border-[var(--border-color)] text-[var(--text-secondary)] hover:bg-[var(--bg-secondary)] transition-colors disabled:opacity-50"
+                    >
+                        Load more
+                    </button>
+                </div>
+            )}
         </div>
     );
 };